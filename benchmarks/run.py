@@ -0,0 +1,142 @@
+"""
+Benchmarks the diff and formatting hot paths, reporting time and peak memory per
+handler and workload.
+
+    python -m benchmarks.run                    # print the results
+    python -m benchmarks.run --save             # store the results as the baseline
+    python -m benchmarks.run --compare          # fail on regressions from the baseline
+"""
+import argparse
+import json
+import os
+import sys
+from timeit import default_timer
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None
+
+from benchmarks.workloads import WORKLOADS
+from nose_dehaze.config import config
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+REGRESSION_MSG = "REGRESSION {key} {metric}: {before} -> {after} ({ratio:.2f}x)\n"
+
+
+def measure_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = default_timer()
+        func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def measure_peak_memory(func):
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(repeat, only=None):
+    # measure the diffs themselves rather than hits of the diff cache
+    config.cache_size = 0
+    results = {}
+    for workload in WORKLOADS:
+        key = "{handler}/{name}".format(handler=workload.handler, name=workload.name)
+        if only and only not in key:
+            continue
+        func = workload.setup()
+        results[key] = {
+            "time": measure_time(func, repeat),
+            "peak_memory": measure_peak_memory(func),
+        }
+    return results
+
+
+def find_regressions(results, baseline, threshold):
+    regressions = []
+    for key, result in sorted(results.items()):
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for metric in ("time", "peak_memory"):
+            if not result[metric] or not base.get(metric):
+                continue
+            ratio = float(result[metric]) / base[metric]
+            if ratio > 1 + threshold:
+                regressions.append((key, metric, base[metric], result[metric], ratio))
+    return regressions
+
+
+def print_results(results, baseline, stream):
+    stream.write(
+        "{:<45} {:>12} {:>12} {:>9}\n".format(
+            "handler/workload", "time (ms)", "peak (KiB)", "vs base"
+        )
+    )
+    for key, result in sorted(results.items()):
+        base = baseline.get(key, {})
+        change = ""
+        if base.get("time"):
+            change = "{:+.0%}".format(result["time"] / base["time"] - 1)
+        peak = result["peak_memory"]
+        stream.write(
+            "{:<45} {:>12.2f} {:>12} {:>9}\n".format(
+                key,
+                result["time"] * 1000,
+                "-" if peak is None else peak // 1024,
+                change,
+            )
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save", action="store_true", help="store as baseline")
+    parser.add_argument("--compare", action="store_true", help="exit 1 on regressions")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="relative increase counted as a regression, default 0.25",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", help="only run handler/workload keys containing this")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    results = run(args.repeat, args.only)
+    print_results(results, baseline, sys.stdout)
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        regressions = find_regressions(results, baseline, args.threshold)
+        for key, metric, before, after, ratio in regressions:
+            sys.stdout.write(
+                REGRESSION_MSG.format(
+                    key=key, metric=metric, before=before, after=after, ratio=ratio
+                )
+            )
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
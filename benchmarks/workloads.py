@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+synthetic workloads exercising the diff and formatting hot paths
+"""
+
+from collections import namedtuple
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+from nose_dehaze.config import config
+from nose_dehaze.diff import (
+    build_args_diff,
+    build_call_args_diff_output,
+    build_split_diff,
+    dehaze,
+)
+
+# `setup` builds the inputs outside of the measurement and returns a zero argument
+# callable running the handler under test
+Workload = namedtuple("Workload", ["name", "handler", "setup"])
+
+
+def long_strings(size):
+    expected = "".join(chr(97 + i % 26) for i in range(size))
+    actual = expected[: size // 2] + "X" + expected[size // 2 + 1 :]
+    return expected, actual
+
+
+def wide_dicts(size):
+    expected = {"key_{}".format(i): i for i in range(size)}
+    actual = dict(expected, key_0=-1)
+    actual["key_{}".format(size - 1)] = -1
+    return expected, actual
+
+
+def deep_nesting(depth):
+    expected = actual = "leaf"
+    for i in range(depth):
+        expected = {"level": i, "child": [expected]}
+        actual = {"level": i, "child": [actual]}
+    actual["level"] = -1
+    return expected, actual
+
+
+def unicode_data(size):
+    expected = ["é中文\U0001f600 {}".format(i) for i in range(size)]
+    actual = list(expected)
+    actual[size // 2] = "è中文\U0001f601"
+    return expected, actual
+
+
+def many_lines(size):
+    expected = "\n".join("line {}".format(i) for i in range(size))
+    actual = "\n".join("line {}".format(-i) for i in range(1, size + 1))
+    return expected, actual
+
+
+def called_mock(calls):
+    mock_instance = Mock(name="huge")
+    for i in range(calls):
+        mock_instance(i, key="value_{}".format(i))
+    return mock_instance
+
+
+def assert_equal_setup(make_values, size):
+    def setup():
+        expected, actual = make_values(size)
+        frame_locals = {"first": expected, "second": actual}
+        return lambda: dehaze("assertEqual", frame_locals)
+
+    return setup
+
+
+def split_diff_setup(make_values, size):
+    def setup():
+        expected, actual = make_values(size)
+        return lambda: build_split_diff(repr(actual), repr(expected))
+
+    return setup
+
+
+def line_split_diff_setup(make_values, size, color):
+    def setup():
+        expected, actual = make_values(size)
+
+        def run():
+            previous, config.color = config.color, color
+            try:
+                return build_split_diff(actual, expected)
+            finally:
+                config.color = previous
+
+        return run
+
+    return setup
+
+
+def args_diff_setup(make_values, size):
+    def setup():
+        expected, actual = make_values(size)
+        return lambda: build_args_diff((expected, expected), (actual, actual))
+
+    return setup
+
+
+def assert_has_calls_setup(calls):
+    def setup():
+        mock_instance = called_mock(calls)
+        frame_locals = {"self": mock_instance, "expected": []}
+        return lambda: dehaze("assert_has_calls", frame_locals)
+
+    return setup
+
+
+def call_args_diff_setup(calls):
+    def setup():
+        mock_instance = called_mock(calls)
+        return lambda: build_call_args_diff_output(
+            mock_instance, (-1,), {"key": "value"}
+        )
+
+    return setup
+
+
+WORKLOADS = [
+    Workload("long_strings", "dehaze", assert_equal_setup(long_strings, 200000)),
+    Workload("wide_dicts", "dehaze", assert_equal_setup(wide_dicts, 20000)),
+    Workload("deep_nesting", "dehaze", assert_equal_setup(deep_nesting, 25)),
+    Workload("unicode_data", "dehaze", assert_equal_setup(unicode_data, 5000)),
+    Workload("huge_call_list", "dehaze", assert_has_calls_setup(20000)),
+    Workload("long_strings", "build_split_diff", split_diff_setup(long_strings, 20000)),
+    Workload("wide_dicts", "build_split_diff", split_diff_setup(wide_dicts, 2000)),
+    Workload("unicode_data", "build_split_diff", split_diff_setup(unicode_data, 2000)),
+    # every one of the 100k lines differs, so each line is styled as a fragment
+    Workload(
+        "many_lines",
+        "build_split_diff",
+        line_split_diff_setup(many_lines, 100000, True),
+    ),
+    Workload(
+        "many_lines_no_color",
+        "build_split_diff",
+        line_split_diff_setup(many_lines, 100000, False),
+    ),
+    Workload("wide_dicts", "build_args_diff", args_diff_setup(wide_dicts, 2000)),
+    Workload(
+        "huge_call_list",
+        "build_call_args_diff_output",
+        call_args_diff_setup(20000),
+    ),
+]
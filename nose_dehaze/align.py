@@ -0,0 +1,220 @@
+"""
+sequence alignment utils narrowing down what SequenceMatcher has to compare, by
+trimming the common head and tail and anchoring on lines unique to both sides
+"""
+from bisect import bisect_left
+from collections import Counter
+from typing import TYPE_CHECKING
+
+from nose_dehaze.constants import AUTOJUNK_MIN_LENGTH
+from nose_dehaze.deadline import SequenceMatcher, deadline
+
+if TYPE_CHECKING:
+    from typing import Any, List, Sequence, Tuple
+
+
+def common_prefix_length(lhs, rhs):
+    # type: (Sequence, Sequence) -> int
+    """
+    Length of the common head of two strings or lists. Compares slices of doubling
+    size, so the work is linear in the length of the head but done by a handful of
+    slice comparisons rather than per item.
+    """
+    limit = min(len(lhs), len(rhs))
+    length = 0
+    step = 1
+    while step:
+        end = min(length + step, limit)
+        if end > length and lhs[length:end] == rhs[length:end]:
+            length = end
+            step *= 2
+        else:
+            step //= 2
+    return length
+
+
+def common_suffix_length(lhs, rhs, limit):
+    # type: (Sequence, Sequence, int) -> int
+    """
+    Length of the common tail of two strings or lists, up to `limit` so that the
+    tail never overlaps an already trimmed head.
+    """
+    lhs_end = len(lhs)
+    rhs_end = len(rhs)
+    length = 0
+    step = 1
+    while step:
+        end = min(length + step, limit)
+        if (
+            end > length
+            and lhs[lhs_end - end : lhs_end - length]
+            == rhs[rhs_end - end : rhs_end - length]
+        ):
+            length = end
+            step *= 2
+        else:
+            step //= 2
+    return length
+
+
+def unique_anchors(lhs, rhs):
+    # type: (Sequence, Sequence) -> List[Tuple[int, int]]
+    """
+    Patience style anchors: the items occurring exactly once on each side, keeping
+    the longest run of them in the same order on both sides.
+
+    :return: list of (lhs index, rhs index) pairs, increasing on both sides
+    """
+    # cheap bail out when no item is shared at all, e.g. every line changed
+    if not set(lhs).intersection(rhs):
+        return []
+
+    lhs_counts = Counter(lhs)
+    rhs_counts = Counter(rhs)
+    common = [
+        item
+        for item, count in lhs_counts.items()
+        if count == 1 and rhs_counts.get(item) == 1
+    ]
+    if not common:
+        return []
+
+    lhs_index = {item: i for i, item in enumerate(lhs)}
+    rhs_index = {item: j for j, item in enumerate(rhs)}
+    pairs = sorted((lhs_index[item], rhs_index[item]) for item in common)
+    rhs_indices = [j for _, j in pairs]
+    if rhs_indices == sorted(rhs_indices):
+        # nothing moved, e.g. a few changed lines, every anchor is kept
+        return pairs
+
+    # longest increasing run of rhs indices, by patience sorting
+    tails = []  # type: List[int]
+    tail_pairs = []  # type: List[int]
+    previous = [-1] * len(pairs)
+    for k, (_, j) in enumerate(pairs):
+        pile = bisect_left(tails, j)
+        if pile == len(tails):
+            tails.append(j)
+            tail_pairs.append(k)
+        else:
+            tails[pile] = j
+            tail_pairs[pile] = k
+        previous[k] = tail_pairs[pile - 1] if pile else -1
+
+    anchors = []
+    k = tail_pairs[-1] if tail_pairs else -1
+    while k != -1:
+        anchors.append(pairs[k])
+        k = previous[k]
+    anchors.reverse()
+    return anchors
+
+
+def append_opcode(opcodes, op, i1, i2, j1, j2):
+    # type: (list, str, int, int, int, int) -> None
+    if i1 == i2 and j1 == j2:
+        return
+    if opcodes and op == "equal" and opcodes[-1][0] == "equal":
+        opcodes[-1] = ("equal", opcodes[-1][1], i2, opcodes[-1][3], j2)
+    else:
+        opcodes.append((op, i1, i2, j1, j2))
+
+
+def anchored_opcodes(lhs, rhs):
+    # type: (Sequence, Sequence) -> List[tuple]
+    """
+    Same as `SequenceMatcher.get_opcodes`, but the common head and tail are trimmed
+    first and only the gaps between unique anchors are left to SequenceMatcher. Its
+    popular item heuristic misbehaves on repetitive text, so it is only kept for
+    gaps longer than `AUTOJUNK_MIN_LENGTH`, where turning it off risks quadratic
+    time.
+
+    :param lhs: the "left" lines
+    :param rhs: the "right" lines
+    :return: list of (op, i1, i2, j1, j2) opcodes, adjacent equal opcodes merged
+    """
+    prefix = common_prefix_length(lhs, rhs)
+    suffix = common_suffix_length(lhs, rhs, min(len(lhs), len(rhs)) - prefix)
+    lhs_end = len(lhs) - suffix
+    rhs_end = len(rhs) - suffix
+
+    opcodes = []  # type: list
+    append_opcode(opcodes, "equal", 0, prefix, 0, prefix)
+
+    i = j = prefix
+    anchors = unique_anchors(lhs[prefix:lhs_end], rhs[prefix:rhs_end])
+    for anchor_i, anchor_j in anchors + [(lhs_end - prefix, rhs_end - prefix)]:
+        anchor_i += prefix
+        anchor_j += prefix
+        if anchor_i > i or anchor_j > j:
+            deadline.check()
+            lhs_gap = lhs[i:anchor_i]
+            rhs_gap = rhs[j:anchor_j]
+            matcher = SequenceMatcher(
+                None,
+                lhs_gap,
+                rhs_gap,
+                autojunk=len(rhs_gap) > AUTOJUNK_MIN_LENGTH,
+            )
+            for op, i1, i2, j1, j2 in matcher.get_opcodes():
+                append_opcode(opcodes, op, i + i1, i + i2, j + j1, j + j2)
+        # the last pair is the end of the gaps rather than an anchor
+        if anchor_i < lhs_end:
+            append_opcode(
+                opcodes, "equal", anchor_i, anchor_i + 1, anchor_j, anchor_j + 1
+            )
+        i = anchor_i + 1
+        j = anchor_j + 1
+
+    append_opcode(opcodes, "equal", lhs_end, len(lhs), rhs_end, len(rhs))
+    return opcodes
+
+
+# tags the repr of an unhashable element, so it never equals a hashable element
+UNHASHABLE = object()
+
+
+def element_key(value):
+    # type: (Any) -> Any
+    """
+    :return: the element itself when hashable, else a key hashing its repr
+    """
+    if isinstance(value, (list, dict, set)):
+        return UNHASHABLE, repr(value)
+    try:
+        hash(value)
+    except TypeError:
+        return UNHASHABLE, repr(value)
+    return value
+
+
+def sequence_opcodes(expected, actual):
+    # type: (Sequence, Sequence) -> List[tuple]
+    """
+    Aligns the elements of two sequences by their hash, see `anchored_opcodes`, so
+    that an inserted or deleted element does not shift every following element
+    out of place. The common head and tail are compared as they are, only the
+    elements in between are hashed.
+    """
+    try:
+        prefix = common_prefix_length(expected, actual)
+        suffix = common_suffix_length(
+            expected, actual, min(len(expected), len(actual)) - prefix
+        )
+    except (TypeError, ValueError):
+        # elements that do not compare to a bool, e.g. NumPy arrays
+        prefix = suffix = 0
+    expected_end = len(expected) - suffix
+    actual_end = len(actual) - suffix
+
+    opcodes = []  # type: list
+    append_opcode(opcodes, "equal", 0, prefix, 0, prefix)
+    for op, i1, i2, j1, j2 in anchored_opcodes(
+        [element_key(value) for value in expected[prefix:expected_end]],
+        [element_key(value) for value in actual[prefix:actual_end]],
+    ):
+        append_opcode(opcodes, op, prefix + i1, prefix + i2, prefix + j1, prefix + j2)
+    append_opcode(
+        opcodes, "equal", expected_end, len(expected), actual_end, len(actual)
+    )
+    return opcodes
@@ -0,0 +1,223 @@
+"""
+content addressed LRU caches of rendered diffs, shared by identical failures
+"""
+import errno
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from six import text_type
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import DISK_CACHE_FILENAME, DISK_CACHE_VERSION
+
+if TYPE_CHECKING:
+    from typing import Any, Optional
+
+log = logging.getLogger(__name__)
+
+
+def make_key(*parts):
+    # type: (*str) -> str
+    """
+    Builds a stable hash of the given strings together with the config settings the
+    rendered output depends upon. Each part is length prefixed so that different
+    splits of the same characters never collide.
+    """
+    digest = hashlib.sha1()
+    for part in (config.fingerprint(),) + parts:
+        encoded = part if isinstance(part, bytes) else part.encode("utf-8", "replace")
+        digest.update(str(len(encoded)).encode("ascii") + b":" + encoded)
+    return digest.hexdigest()
+
+
+class DiffCache(object):
+    """
+    LRU cache evicting the least recently used entries once the total size of the
+    cached values, in characters, exceeds the configured `cache_size`.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()  # type: OrderedDict
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        # type: () -> bool
+        return config.cache_size > 0
+
+    def get(self, key):
+        # type: (str) -> Optional[Any]
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        # re-insert as the most recently used entry
+        self.entries[key] = entry
+        self.hits += 1
+        return entry[0]
+
+    def set(self, key, value, size):
+        # type: (str, Any, int) -> None
+        if size > config.cache_size:
+            return
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+
+        self.entries[key] = (value, size)
+        self.size += size
+        while self.size > config.cache_size:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.size -= evicted_size
+
+    def clear(self):
+        # type: () -> None
+        self.entries.clear()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+
+class DiskCache(object):
+    """
+    SQLite backed LRU cache of rendered dehaze output, stored under the configured
+    `cache_dir` so that reruns and CI shards sharing the directory reuse each others
+    renders. Entries past the configured `disk_cache_size`, in characters, are evicted
+    least recently used first.
+
+    SQLite's locking makes concurrent access from multiple nose processes safe, with
+    writers waiting on each other up to `timeout` seconds. Any database error is
+    logged and treated as a cache miss so that the cache can never fail a test run.
+    """
+
+    timeout = 30
+
+    def __init__(self):
+        self.connection = None  # type: Optional[sqlite3.Connection]
+        self.path = None  # type: Optional[str]
+        self.pid = None  # type: Optional[int]
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self):
+        # type: () -> bool
+        return bool(config.cache_dir) and config.disk_cache_size > 0
+
+    def connect(self):
+        # type: () -> sqlite3.Connection
+        path = os.path.join(config.cache_dir, DISK_CACHE_FILENAME)
+        # connections must not be shared with forked worker processes
+        if (
+            self.connection is not None
+            and self.path == path
+            and self.pid == os.getpid()
+        ):
+            return self.connection
+
+        try:
+            os.makedirs(config.cache_dir)
+        except OSError as e:
+            if e.errno != errno.EEXIST:
+                raise
+
+        connection = sqlite3.connect(path, timeout=self.timeout)
+        try:
+            connection.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.Error:
+            # e.g. unsupported on network file systems, the default journal works too
+            pass
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value TEXT, size INTEGER, accessed REAL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)"
+            )
+
+        self.connection = connection
+        self.path = path
+        self.pid = os.getpid()
+        return connection
+
+    def make_key(self, *parts):
+        # type: (*str) -> str
+        return make_key(DISK_CACHE_VERSION, *parts)
+
+    def get(self, key):
+        # type: (str) -> Optional[str]
+        try:
+            connection = self.connect()
+            with connection:
+                row = connection.execute(
+                    "SELECT value FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    connection.execute(
+                        "UPDATE entries SET accessed = ? WHERE key = ?",
+                        (time.time(), key),
+                    )
+        except (sqlite3.Error, OSError) as e:
+            log.debug("dehaze disk cache read failed: %s", e)
+            row = None
+
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return row[0]
+
+    def set(self, key, value):
+        # type: (str, str) -> None
+        size = len(value)
+        if size > config.disk_cache_size:
+            return
+
+        try:
+            connection = self.connect()
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed) "
+                    "VALUES (?, ?, ?, ?)",
+                    (key, text_type(value), size, time.time()),
+                )
+                self.evict(connection)
+        except (sqlite3.Error, OSError) as e:
+            log.debug("dehaze disk cache write failed: %s", e)
+
+    def evict(self, connection):
+        # type: (sqlite3.Connection) -> None
+        total = connection.execute("SELECT SUM(size) FROM entries").fetchone()[0]
+        excess = (total or 0) - config.disk_cache_size
+        if excess <= 0:
+            return
+
+        evicted = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY accessed"
+        ):
+            evicted.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        connection.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def close(self):
+        # type: () -> None
+        if self.connection is not None and self.pid == os.getpid():
+            self.connection.close()
+        self.connection = None
+
+
+diff_cache = DiffCache()
+disk_cache = DiskCache()
@@ -0,0 +1,207 @@
+"""
+mock call utils to align expected calls with their closest actual calls
+"""
+import heapq
+from collections import Counter
+from itertools import chain
+from typing import TYPE_CHECKING
+
+from six import viewkeys
+
+from nose_dehaze.constants import CALL_DIFF_MAX_SCORED
+from nose_dehaze.deadline import deadline
+from nose_dehaze.structural import is_equal
+
+if TYPE_CHECKING:
+    from typing import (
+        AbstractSet,
+        Any,
+        Dict,
+        Iterable,
+        Iterator,
+        List,
+        Optional,
+        Set,
+        Tuple,
+    )
+
+
+def split_call(mock_call):
+    # type: (tuple) -> Tuple[tuple, dict]
+    """
+    Extracts the args and kwargs of a mock `call`, which is either a 2-tuple of
+    (args, kwargs) as found in `call_args_list` or a 3-tuple of (name, args, kwargs)
+    as built by `call(...)`.
+    """
+    if len(mock_call) == 3:
+        _, args, kwargs = mock_call
+    else:
+        args, kwargs = mock_call
+    return tuple(args), dict(kwargs)
+
+
+def is_hashable(value):
+    # type: (Any) -> bool
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def call_features(args, kwargs):
+    # type: (tuple, dict) -> Tuple[List[tuple], bool]
+    """
+    :return: tuple of the hashable (position, value) and (key, value) pairs of a
+        call, and whether every arg and kwarg value was hashable
+    """
+    features = [(i, value) for i, value in enumerate(args) if is_hashable(value)]
+    features.extend((key, value) for key, value in kwargs.items() if is_hashable(value))
+    return features, len(features) == len(args) + len(kwargs)
+
+
+def call_similarity(args, kwargs, other_args, other_kwargs):
+    # type: (tuple, dict, tuple, dict) -> int
+    """
+    Cheap similarity score of two calls: the number of positional args equal at the
+    same position plus the number of kwargs with equal values, minus the number of
+    args and kwargs only present in one of the calls.
+    """
+    score = sum(1 for a, b in zip(args, other_args) if is_equal(a, b))
+    score -= abs(len(args) - len(other_args))
+    for key, value in kwargs.items():
+        if key not in other_kwargs:
+            score -= 1
+        elif is_equal(value, other_kwargs[key]):
+            score += 1
+    score -= sum(1 for key in other_kwargs if key not in kwargs)
+    return score
+
+
+class CallIndex(object):
+    """
+    Index of a mock's actual calls by the hashable arg and kwarg values they share
+    with the expected calls. Only the calls sharing the most values with an
+    expected call are scored, up to `CALL_DIFF_MAX_SCORED` calls, topped up with
+    the calls sharing a value held by more than `CALL_DIFF_MAX_SCORED` calls, the
+    calls shaped like it, i.e. with as many args and the same kwargs keys, and then
+    every call when too few are found, e.g. when the expected call has unhashable
+    values.
+    """
+
+    def __init__(self, calls, expected_calls):
+        # type: (Iterable[tuple], Iterable[tuple]) -> None
+        """
+        :param calls: the actual calls
+        :param expected_calls: the calls looked up, only the values they hold are
+            indexed
+        """
+        wanted = set()  # type: Set[tuple]
+        for mock_call in expected_calls:
+            wanted.update(call_features(*split_call(mock_call))[0])
+
+        self.calls = []  # type: List[Tuple[tuple, dict]]
+        self.features = {}  # type: Dict[tuple, List[int]]
+        for i, mock_call in enumerate(calls):
+            args, kwargs = split_call(mock_call)
+            self.calls.append((args, kwargs))
+            for feature in chain(enumerate(args), kwargs.items()):
+                try:
+                    if feature in wanted:
+                        self.features.setdefault(feature, []).append(i)
+                except TypeError:
+                    # unhashable value
+                    pass
+
+    def shaped_like(self, args, kwargs):
+        # type: (tuple, dict) -> Iterator[int]
+        keys = viewkeys(kwargs)
+        for i, (other_args, other_kwargs) in enumerate(self.calls):
+            if len(other_args) == len(args) and viewkeys(other_kwargs) == keys:
+                yield i
+
+    def candidates(self, args, kwargs, num, exclude):
+        # type: (tuple, dict, int, AbstractSet[int]) -> List[int]
+        """
+        :return: the indices of the actual calls worth scoring against the call
+        """
+        features, hashable = call_features(args, kwargs)
+        shared = Counter()  # type: Counter
+        common = []  # type: List[List[int]]
+        for feature in features:
+            indices = self.features.get(feature, [])
+            if len(indices) > CALL_DIFF_MAX_SCORED:
+                # a value most calls hold barely tells them apart, counting it
+                # would walk every call for every expected call
+                common.append(indices)
+            else:
+                shared.update(indices)
+        for i in exclude:
+            shared.pop(i, None)
+        candidates = heapq.nsmallest(
+            CALL_DIFF_MAX_SCORED, shared, key=lambda i: (-shared[i], i)
+        )
+
+        # unhashable values are only compared when scoring, so more calls are
+        # scored against calls holding them
+        wanted = num if hashable else CALL_DIFF_MAX_SCORED
+        if len(candidates) < wanted:
+            seen = set(shared)
+            for i in chain(
+                chain.from_iterable(common),
+                self.shaped_like(args, kwargs),
+                range(len(self.calls)),
+            ):
+                if len(candidates) >= wanted:
+                    break
+                if i not in exclude and i not in seen:
+                    seen.add(i)
+                    candidates.append(i)
+        return candidates
+
+    def nearest(self, mock_call, num, exclude=frozenset()):
+        # type: (tuple, int, AbstractSet[int]) -> List[int]
+        """
+        :param mock_call: the expected call
+        :param num: the number of actual calls to return
+        :param exclude: indices of actual calls not to consider
+        :return: the indices of the `num` actual calls closest to the expected call,
+            closest first, ties broken by call order
+        """
+        args, kwargs = split_call(mock_call)
+        return heapq.nsmallest(
+            num,
+            self.candidates(args, kwargs, num, exclude),
+            key=lambda i: (-call_similarity(args, kwargs, *self.calls[i]), i),
+        )
+
+
+def nearest_calls(expected_call, actual_calls, num):
+    # type: (tuple, List[tuple], int) -> List[int]
+    """
+    :return: the indices of the `num` actual calls closest to the expected call
+    """
+    return CallIndex(actual_calls, [expected_call]).nearest(expected_call, num)
+
+
+def align_calls(expected_calls, actual_calls):
+    # type: (List[tuple], List[tuple]) -> List[Optional[int]]
+    """
+    Aligns each expected call, in order, with its closest actual call not already
+    aligned with a previous expected call.
+
+    :return: the index of the aligned actual call per expected call, or None once
+        every actual call has been aligned
+    """
+    index = CallIndex(actual_calls, expected_calls)
+    used = set()  # type: Set[int]
+    aligned = []  # type: List[Optional[int]]
+    for expected_call in expected_calls:
+        deadline.check()
+        nearest = index.nearest(expected_call, 1, used)
+        if not nearest:
+            aligned.append(None)
+            continue
+        used.add(nearest[0])
+        aligned.append(nearest[0])
+    return aligned
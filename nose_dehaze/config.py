@@ -0,0 +1,71 @@
+"""
+runtime settings shared by the diff functions, populated from the plugin options
+"""
+from nose_dehaze.constants import (
+    CACHE_SIZE,
+    CALL_DIFF_CANDIDATES,
+    CHAR_DIFF_LIMIT,
+    DICT_DIFF_CONTEXT,
+    DISK_CACHE_SIZE,
+    FORMAT,
+    HUNK_DIFF_LIMIT,
+    MAX_CHARS,
+    MAX_DEPTH,
+    MAX_ITEMS,
+    MAX_STRING,
+    STRUCTURAL_DIFF_LIMIT,
+    STRUCTURAL_DIFF_MAX_PATHS,
+    TIMEOUT_MS,
+)
+
+
+class Config(object):
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.char_diff_limit = CHAR_DIFF_LIMIT
+        self.hunk_diff_limit = HUNK_DIFF_LIMIT
+        self.structural_diff_limit = STRUCTURAL_DIFF_LIMIT
+        self.structural_diff_max_paths = STRUCTURAL_DIFF_MAX_PATHS
+        self.dict_diff_context = DICT_DIFF_CONTEXT
+        self.call_diff_candidates = CALL_DIFF_CANDIDATES
+        self.timeout_ms = TIMEOUT_MS
+        self.max_depth = MAX_DEPTH
+        self.max_items = MAX_ITEMS
+        self.max_string = MAX_STRING
+        self.max_chars = MAX_CHARS
+        self.color = True
+        self.format = FORMAT
+        self.snapshot = False
+        self.stats = False
+        self.report = False
+        self.workers = 0
+        self.cache_size = CACHE_SIZE
+        self.cache_dir = None
+        self.disk_cache_size = DISK_CACHE_SIZE
+
+    def fingerprint(self):
+        # type: () -> str
+        """
+        Identifies the settings rendered output depends upon, for cache keys.
+        """
+        return repr(
+            (
+                self.char_diff_limit,
+                self.hunk_diff_limit,
+                self.structural_diff_limit,
+                self.structural_diff_max_paths,
+                self.dict_diff_context,
+                self.call_diff_candidates,
+                self.max_depth,
+                self.max_items,
+                self.max_string,
+                self.max_chars,
+                self.color,
+                self.format,
+            )
+        )
+
+
+config = Config()
@@ -1,11 +1,129 @@
-from functools import partial
-
-from termcolor import colored
-
 PADDED_NEWLINE = "\n{}".format(" " * 10)
 MOCK_CALL_COUNT_MSG = "{padding}{label}Mock {mock_name} called {num} times."
 TYPE_MISMATCH_HINT_MSG = "{padding}{label} {vtype}"
 
+# combined expected + actual repr length above which build_split_diff switches from
+# a character level diff to a line level diff
+CHAR_DIFF_LIMIT = 10000
+# combined length of a changed line hunk above which the hunk is highlighted as a
+# whole instead of character diffed
+HUNK_DIFF_LIMIT = 2000
+# number of nested nodes above which dict/list/tuple comparisons only render the
+# differing paths instead of the pretty printed values
+STRUCTURAL_DIFF_LIMIT = 200
+STRUCTURAL_DIFF_MAX_PATHS = 50
+STRUCTURAL_DIFF_HINT_MSG = "showing the first {num} differing paths"
+MISSING_VALUE_REPR = "<missing>"
+# equal keys shown around each difference of a keyed dict diff
+DICT_DIFF_CONTEXT = 2
+COLLAPSED_KEYS_MSG = "... {num} equal keys ..."
+DICT_DIFF_HINT_MSG = (
+    "{missing} missing keys, {extra} unexpected keys, {changed} changed values"
+)
+COLLAPSED_ITEMS_MSG = "... {num} equal items ..."
+SEQUENCE_DIFF_HINT_MSG = (
+    "{inserted} inserted, {deleted} deleted, {changed} changed and {moved} moved"
+    " items"
+)
+# output formats, ANSI colored text by default
+FORMAT_ANSI = "ansi"
+FORMAT_PLAIN = "plain"
+FORMAT_HTML = "html"
+FORMAT_JSON = "json"
+FORMAT = FORMAT_ANSI
+FORMAT_CHOICES = (FORMAT_ANSI, FORMAT_PLAIN, FORMAT_HTML, FORMAT_JSON)
+
+# colour mode of the output, one of "auto", "always" or "never"
+COLOR = "auto"
+COLOR_CHOICES = ("auto", "always", "never")
+
+# gaps between anchors of a line diff longer than this keep SequenceMatcher's
+# popular item heuristic, avoiding its quadratic worst case on repetitive lines
+AUTOJUNK_MIN_LENGTH = 2000
+
+# unchanged lines shown around each change of a long string diff
+TEXT_DIFF_CONTEXT = 3
+COLLAPSED_LINES_MSG = "... {num} identical lines ..."
+# carriage returns in changed lines, escaped since the terminal would not show them
+CARRIAGE_RETURN_REPR = "\\r"
+
+# time budget in milliseconds to dehaze a failure, 0 for no limit
+TIMEOUT_MS = 10000
+# characters of expected and actual shown undiffed when the time budget is exceeded
+TIMEOUT_FALLBACK_CHARS = 2000
+TIMEOUT_HINT_MSG = (
+    "diff exceeded the {timeout_ms} ms time budget, showing values undiffed"
+)
+
+SET_DIFF_HINT_MSG = (
+    "expected shows the {missing} members missing from actual, actual the "
+    "{unexpected} members not expected"
+)
+SET_DIFF_TRUNCATED_MSG = ", showing the first {num} of each"
+SET_EMPTY_REPR = "<none>"
+NUMERIC_DIFF_HINT_MSG = (
+    "{num} of {total} elements differ at {ranges}, max absolute error "
+    "{absolute:g}, max relative error {relative:g}"
+)
+NUMERIC_RANGES_MORE_MSG = " and {num} more ranges"
+NUMERIC_LENGTH_HINT_MSG = "expected {expected} elements, actual {actual} elements"
+
+# number of mock calls above which expected calls are only shown against their
+# closest actual calls instead of the whole call_args_list
+CALL_DIFF_CANDIDATES = 5
+# actual calls scored against each expected call, picked by their shared values
+CALL_DIFF_MAX_SCORED = 1000
+CLOSEST_CALLS_HINT_MSG = (
+    "showing the {num} closest of {total} calls, at indices {indices}"
+)
+ALIGNED_CALLS_HINT_MSG = (
+    "each expected call is shown against its closest of {total} calls, "
+    "at indices {indices}"
+)
+
+# limits of the bounded reprs rendered in place of full pformat output
+MAX_DEPTH = 30
+MAX_ITEMS = 10000
+MAX_STRING = 100000
+MAX_CHARS = 1000000
+MORE_ITEMS_REPR = "...<{num} more items>"
+MORE_CHARS_REPR = "...<{num} more chars>"
+RECURSION_REPR = "<Recursion on {vtype} with id={id}>"
+CONTAINER_SUBCLASS_REPR = "{vtype}({items})"
+TRUNCATED_OUTPUT_REPR = "...<truncated>"
+# values rendered longer than this are summarized in hints, by their first items
+SUMMARY_MAX_CHARS = 200
+SUMMARY_ITEMS = 3
+SUMMARY_REPR = "{vtype} of len {length}: {items}"
+SIZED_TYPE_REPR = "{vtype} of len {length}"
+
+# total size in characters of the rendered diffs kept for identical failures
+CACHE_SIZE = 16 * 1024 * 1024
+CACHE_STATS_MSG = "dehaze cache: {hits} hits, {misses} misses"
+# total size in characters of the rendered output kept in the on-disk cache
+DISK_CACHE_SIZE = 256 * 1024 * 1024
+DISK_CACHE_FILENAME = "dehaze-cache.sqlite3"
+# bumped whenever the rendered output changes, invalidating previous entries
+DISK_CACHE_VERSION = "6"
+DISK_CACHE_STATS_MSG = "dehaze disk cache: {hits} hits, {misses} misses"
+
+# number of slowest failures listed by the stats summary
+STATS_TOP_N = 10
+STATS_SUMMARY_MSG = (
+    "dehaze stats: {num} failures rendered in {time:.2f} ms, {chars} characters"
+)
+STATS_HANDLER_HEADER = "  {:<40} {:>8} {:>12} {:>12}"
+STATS_HANDLER_ROW = "  {:<40} {:>8} {:>12.2f} {:>12}"
+STATS_FAILURE_HEADER = "  {:<60} {:>12} {:>12}"
+STATS_FAILURE_ROW = "  {:<60} {:>12.2f} {:>12}"
+# SequenceMatcher inputs are sequences of characters, words, lines or elements
+STATS_MATCHER_MSG = (
+    "  SequenceMatcher inputs: {calls} matchers, {items} items, largest {max_items}"
+)
+
+# write buffer of the JSON lines failure report, in bytes
+REPORT_BUFFER_SIZE = 1024 * 1024
+
 FRAME_LOCALS_EXPECTED_ACTUAL_KEYS = {
     "assertEqual": ("first", "second"),
     "assertEquals": ("first", "second"),
@@ -19,20 +137,18 @@ FRAME_LOCALS_EXPECTED_ACTUAL_KEYS = {
     "assertIsNot": ("expr1", "expr2"),
 }
 
-
-class Colour(object):
-    red = "red"
-    green = "green"
-    cyan = "cyan"
-    yellow = "yellow"
-    stop = "\033[0m"
-
-
-class Attr(object):
-    bold = "bold"
-
-
-deleted_text = partial(colored, color=Colour.red, attrs=[Attr.bold])
-diff_intro_text = partial(colored, color=Colour.cyan, attrs=[Attr.bold])
-inserted_text = partial(colored, color=Colour.green, attrs=[Attr.bold])
-header_text = partial(colored, color=Colour.yellow, attrs=[Attr.bold])
+# frame locals each assert method's diff function reads
+FRAME_LOCALS_KEYS = dict(
+    FRAME_LOCALS_EXPECTED_ACTUAL_KEYS,
+    assertIsNone=("obj",),
+    assertIsNotNone=("obj",),
+    assertIsInstance=("cls", "obj"),
+    assertNotIsInstance=("cls", "obj"),
+    assertTrue=("expr",),
+    assertFalse=("expr",),
+    assert_called_once=("self",),
+    assert_not_called=("self",),
+    assert_called_with=("self", "args", "kwargs"),
+    assert_called_once_with=("self", "args", "kwargs"),
+    assert_has_calls=("self", "expected"),
+)
@@ -0,0 +1,68 @@
+"""
+cooperative per failure time budget, checked between chunks of diffing work
+"""
+import difflib
+from contextlib import contextmanager
+from timeit import default_timer
+from typing import TYPE_CHECKING
+
+from nose_dehaze.stats import stats
+
+if TYPE_CHECKING:
+    from typing import Iterator, Optional
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class Deadline(object):
+    """
+    Deadline of the failure being dehazed. Long running loops call `check` between
+    chunks of work, which raises `DeadlineExceeded` once the deadline passed.
+    """
+
+    def __init__(self):
+        self.expires = None  # type: Optional[float]
+
+    @contextmanager
+    def limit(self, timeout_ms):
+        # type: (int) -> Iterator[None]
+        """
+        Sets the deadline `timeout_ms` from now for the duration of the block. A
+        timeout of 0 or less, or an already running deadline, leaves it unchanged.
+        """
+        if timeout_ms <= 0 or self.expires is not None:
+            yield
+            return
+
+        self.expires = default_timer() + timeout_ms / 1000.0
+        try:
+            yield
+        finally:
+            self.expires = None
+
+    def check(self):
+        # type: () -> None
+        if self.expires is not None and default_timer() > self.expires:
+            raise DeadlineExceeded()
+
+
+deadline = Deadline()
+
+
+class SequenceMatcher(difflib.SequenceMatcher):
+    """
+    SequenceMatcher checking the deadline before every search for the longest
+    matching block, i.e. between the chunks `get_matching_blocks` splits the
+    comparison into. Every matcher counts its input sizes towards the stats.
+    """
+
+    def __init__(self, isjunk=None, a="", b="", autojunk=True):
+        stats.add_matcher_input(len(a), len(b))
+        difflib.SequenceMatcher.__init__(self, isjunk, a, b, autojunk)
+
+    def find_longest_match(self, *args, **kwargs):
+        deadline.check()
+        # explicit base call, difflib.SequenceMatcher is an old style class on py2
+        return difflib.SequenceMatcher.find_longest_match(self, *args, **kwargs)
@@ -0,0 +1,179 @@
+"""
+keyed dict diff, partitioning the keys by set operations and only recursing into
+the values that changed
+"""
+from typing import TYPE_CHECKING
+
+from six import viewkeys
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    COLLAPSED_KEYS_MSG,
+    DICT_DIFF_HINT_MSG,
+    STRUCTURAL_DIFF_HINT_MSG,
+)
+from nose_dehaze.deadline import deadline
+from nose_dehaze.structural import (
+    MISSING,
+    exceeds_size,
+    format_difference,
+    is_equal,
+    iter_differences,
+)
+
+if TYPE_CHECKING:
+    from typing import Any, List, Optional, Tuple
+
+
+def key_path(key):
+    # type: (Any) -> str
+    return "[{key!r}]".format(key=key)
+
+
+def context_windows(positions, context, length):
+    # type: (List[int], int, int) -> List[Tuple[int, int]]
+    """
+    Merges the `context` positions around each differing position into windows.
+
+    :param positions: the sorted positions of the differing keys
+    :param context: the number of equal keys shown on either side of a difference
+    :param length: the number of keys
+    :return: list of (start, stop) windows of positions to render
+    """
+    windows = []  # type: List[Tuple[int, int]]
+    for position in positions:
+        start = max(position - context, 0)
+        stop = min(position + context + 1, length)
+        if windows and start <= windows[-1][1]:
+            windows[-1] = (windows[-1][0], stop)
+        else:
+            windows.append((start, stop))
+    return windows
+
+
+class KeyedDiff(object):
+    """
+    Collects the lines of both sides, counting the differing paths rendered so that
+    rendering stops after `max_paths`.
+    """
+
+    def __init__(self, max_paths, collapsed_msg=COLLAPSED_KEYS_MSG):
+        # type: (int, str) -> None
+        self.max_paths = max_paths
+        self.collapsed_msg = collapsed_msg
+        self.paths = 0
+        self.truncated = False
+        self.expected_lines = []  # type: List[str]
+        self.actual_lines = []  # type: List[str]
+
+    @property
+    def full(self):
+        # type: () -> bool
+        return self.paths >= self.max_paths
+
+    def add_equal(self, path, value):
+        # type: (str, Any) -> None
+        line = format_difference(path, value)
+        self.expected_lines.append(line)
+        self.actual_lines.append(line)
+
+    def add_collapsed(self, num):
+        # type: (int) -> None
+        line = self.collapsed_msg.format(num=num)
+        self.expected_lines.append(line)
+        self.actual_lines.append(line)
+
+    def add_difference(self, path, expected, actual, actual_path=None):
+        # type: (str, Any, Any, Optional[str]) -> None
+        """
+        Renders the paths at which expected and actual differ, recursing into them
+        only now that they are known to differ.
+
+        :param actual_path: the path of the actual value when it differs from the
+            expected one, e.g. the index of a shifted list element
+        """
+        if expected is MISSING or actual is MISSING:
+            differences = iter([(path, expected, actual)])
+        else:
+            differences = iter_differences(expected, actual, path)
+        for difference_path, expected_value, actual_value in differences:
+            if self.full:
+                self.truncated = True
+                return
+            deadline.check()
+            self.paths += 1
+            self.expected_lines.append(
+                format_difference(difference_path, expected_value)
+            )
+            if actual_path is not None:
+                difference_path = actual_path + difference_path[len(path) :]
+            self.actual_lines.append(format_difference(difference_path, actual_value))
+
+
+def build_dict_diff(expected, actual):
+    # type: (Any, Any) -> Optional[tuple]
+    """
+    Compares dicts by key: set operations partition the keys into missing, extra
+    and shared keys, and only the changed values among the shared keys are diffed.
+    Each difference is shown with `dict_diff_context` equal keys around it, in the
+    order of the expected dict, and the equal keys in between are collapsed.
+
+    :param expected: the expected value
+    :param actual: the actual value
+    :return: tuple of the expected str, actual str and hint, or None if the values
+        are not dicts of the same type with more than `structural_diff_limit`
+        nested items
+    """
+    if type(expected) is not type(actual) or not isinstance(expected, dict):
+        return None
+    limit = config.structural_diff_limit
+    if not (exceeds_size(expected, limit) or exceeds_size(actual, limit)):
+        return None
+
+    expected_keys = viewkeys(expected)
+    actual_keys = viewkeys(actual)
+    missing = expected_keys - actual_keys
+    extra = actual_keys - expected_keys
+    changed = set(
+        key
+        for key in expected_keys & actual_keys
+        if not is_equal(expected[key], actual[key])
+    )
+
+    keys = list(expected)
+    positions = [i for i, key in enumerate(keys) if key in missing or key in changed]
+    diff = KeyedDiff(config.structural_diff_max_paths)
+    rendered = 0
+    for start, stop in context_windows(positions, config.dict_diff_context, len(keys)):
+        if diff.full:
+            diff.truncated = True
+            break
+        if start > rendered:
+            diff.add_collapsed(start - rendered)
+        for key in keys[start:stop]:
+            path = key_path(key)
+            if key in missing:
+                diff.add_difference(path, expected[key], MISSING)
+            elif key in changed:
+                diff.add_difference(path, expected[key], actual[key])
+            else:
+                diff.add_equal(path, expected[key])
+        rendered = stop
+    if rendered < len(keys) and not diff.full:
+        diff.add_collapsed(len(keys) - rendered)
+
+    # extra keys have no position in the expected dict, they are listed last
+    for key in actual if extra else ():
+        if key not in extra:
+            continue
+        if diff.full:
+            diff.truncated = True
+            break
+        diff.add_difference(key_path(key), MISSING, actual[key])
+
+    hint = DICT_DIFF_HINT_MSG.format(
+        missing=len(missing), extra=len(extra), changed=len(changed)
+    )
+    if diff.truncated:
+        hint += ", " + STRUCTURAL_DIFF_HINT_MSG.format(num=diff.max_paths)
+    return "\n".join(diff.expected_lines), "\n".join(diff.actual_lines), hint
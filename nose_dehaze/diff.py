@@ -1,9 +1,7 @@
 """
 diff utils to extract assert values and build colorized diff output
 """
-import difflib
 from functools import partial
-from pprint import pformat
 from typing import TYPE_CHECKING
 
 try:
@@ -13,21 +11,44 @@ except ImportError:
 
 from six import text_type
 
+from nose_dehaze.align import anchored_opcodes
+from nose_dehaze.cache import diff_cache, disk_cache, make_key
+from nose_dehaze.calls import align_calls, nearest_calls
+from nose_dehaze.config import config
 from nose_dehaze.constants import (
+    ALIGNED_CALLS_HINT_MSG,
+    CLOSEST_CALLS_HINT_MSG,
     FRAME_LOCALS_EXPECTED_ACTUAL_KEYS,
     MOCK_CALL_COUNT_MSG,
     PADDED_NEWLINE,
+    SIZED_TYPE_REPR,
+    SUMMARY_MAX_CHARS,
+    TIMEOUT_FALLBACK_CHARS,
+    TIMEOUT_HINT_MSG,
+    TRUNCATED_OUTPUT_REPR,
     TYPE_MISMATCH_HINT_MSG,
-    Colour,
+)
+from nose_dehaze.deadline import DeadlineExceeded, SequenceMatcher, deadline
+from nose_dehaze.dicts import build_dict_diff
+from nose_dehaze.mocks import format_call, format_calls, mock_names
+from nose_dehaze.numeric import build_numeric_diff
+from nose_dehaze.pretty import bounded_pformat, summarize
+from nose_dehaze.render import (
+    Style,
     deleted_text,
-    diff_intro_text,
+    get_renderer,
     header_text,
     inserted_text,
 )
-from nose_dehaze.utils import extract_mock_name
+from nose_dehaze.sequences import build_sequence_diff
+from nose_dehaze.sets import build_set_diff
+from nose_dehaze.stats import stats
+from nose_dehaze.structural import MISSING
+from nose_dehaze.text import collapse_lines, is_long_text, text_split_diff_spans
+from nose_dehaze.writer import LineWriter, Writer
 
 if TYPE_CHECKING:
-    from typing import Optional
+    from typing import Any, Callable, List, Optional, Tuple
 
     from mock import Mock
 
@@ -39,51 +60,270 @@ def utf8_replace(s):
         return s
 
 
-def build_split_diff(lhs_repr, rhs_repr):
+def utf8_replace_spans(spans):
+    return [(style, utf8_replace(text)) for style, text in spans]
+
+
+def char_split_diff_spans(lhs_repr, rhs_repr):
     # type: (str, str) -> tuple
     """
     Copy pasted from pytest-clarity.
 
-    Compares string representations of expected and actual, building the colorized
-    diff output for consumption.
+    Compares string representations of expected and actual character by character,
+    building the styled diff output for consumption.
 
     :param lhs_repr: the string representation of the "left" i.e. expected
     :param rhs_repr: the string representation of the "right" i.e. actual
-    :return: tuple of the "left" and "right" colorized newline separated strings
+    :return: tuple of the "left" and "right" lists of lines of (style, text) spans
     """
-    lhs_out, rhs_out = "", ""
+    lhs_out = LineWriter()
+    rhs_out = LineWriter()
 
-    matcher = difflib.SequenceMatcher(None, lhs_repr, rhs_repr)
+    matcher = SequenceMatcher(None, lhs_repr, rhs_repr)
     for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        deadline.check()
 
-        lhs_substring_lines = lhs_repr[i1:i2].splitlines()
-        rhs_substring_lines = rhs_repr[j1:j2].splitlines()
+        # split on "\n" rather than splitlines, which drops a trailing newline
+        lhs_substring_lines = lhs_repr[i1:i2].split("\n") if i2 > i1 else []
+        rhs_substring_lines = rhs_repr[j1:j2].split("\n") if j2 > j1 else []
 
         for i, lhs_substring in enumerate(lhs_substring_lines):
-            if op == "replace":
-                lhs_out += inserted_text(lhs_substring)
+            if not lhs_substring:
+                pass
+            elif op == "replace":
+                lhs_out.write(lhs_substring, Style.inserted)
             elif op == "delete":
-                lhs_out += inserted_text(lhs_substring)
+                lhs_out.write(lhs_substring, Style.inserted)
             elif op == "insert":
-                lhs_out += Colour.stop + lhs_substring
+                lhs_out.write(lhs_substring, Style.reset)
             elif op == "equal":
-                lhs_out += Colour.stop + lhs_substring
+                lhs_out.write(lhs_substring, Style.reset)
 
             if i != len(lhs_substring_lines) - 1:
-                lhs_out += "\n"
+                lhs_out.newline()
 
         for j, rhs_substring in enumerate(rhs_substring_lines):
-            if op == "replace":
-                rhs_out += deleted_text(rhs_substring)
+            if not rhs_substring:
+                pass
+            elif op == "replace":
+                rhs_out.write(rhs_substring, Style.deleted)
             elif op == "insert":
-                rhs_out += deleted_text(rhs_substring)
+                rhs_out.write(rhs_substring, Style.deleted)
             elif op == "equal":
-                rhs_out += Colour.stop + rhs_substring
+                rhs_out.write(rhs_substring, Style.reset)
 
             if j != len(rhs_substring_lines) - 1:
-                rhs_out += "\n"
+                rhs_out.newline()
+
+    return lhs_out.getlines(), rhs_out.getlines()
+
+
+def line_split_diff_spans(lhs_repr, rhs_repr):
+    # type: (str, str) -> tuple
+    """
+    Compares string representations of expected and actual line by line, only
+    character diffing the changed hunks small enough to stay under the configured
+    `hunk_diff_limit`. Larger hunks are highlighted line by line as a whole, which
+    keeps the cost roughly linear in the size of the reprs.
+
+    Lines are aligned by `anchored_opcodes`, and unchanged lines are collapsed
+    around the changes.
+
+    :param lhs_repr: the string representation of the "left" i.e. expected
+    :param rhs_repr: the string representation of the "right" i.e. actual
+    :return: tuple of the "left" and "right" lists of lines of (style, text) spans
+    """
+    lhs_lines = lhs_repr.splitlines()
+    rhs_lines = rhs_repr.splitlines()
+    lhs_out = []  # type: list
+    rhs_out = []  # type: list
+
+    for op, i1, i2, j1, j2 in anchored_opcodes(lhs_lines, rhs_lines):
+        deadline.check()
+        lhs_hunk = lhs_lines[i1:i2]
+        rhs_hunk = rhs_lines[j1:j2]
+
+        if op == "equal":
+            lines = collapse_lines(
+                lhs_hunk,
+                i1 > 0 or j1 > 0,
+                i2 < len(lhs_lines) or j2 < len(rhs_lines),
+            )
+            lhs_out.extend(lines)
+            rhs_out.extend(lines)
+            continue
+
+        if op == "replace":
+            hunk_size = sum(len(line) for line in lhs_hunk) + sum(
+                len(line) for line in rhs_hunk
+            )
+            if hunk_size <= config.hunk_diff_limit:
+                lhs_diff, rhs_diff = char_split_diff_spans(
+                    "\n".join(lhs_hunk), "\n".join(rhs_hunk)
+                )
+                lhs_out.extend(lhs_diff)
+                rhs_out.extend(rhs_diff)
+                continue
+
+        lhs_out.extend([(Style.inserted, line)] for line in lhs_hunk)
+        rhs_out.extend([(Style.deleted, line)] for line in rhs_hunk)
+
+    return lhs_out, rhs_out
+
+
+def lines_size(split_diff):
+    # type: (tuple) -> int
+    lhs_out, rhs_out = split_diff
+    return sum(len(line) for line in lhs_out) + sum(len(line) for line in rhs_out)
+
+
+def spans_size(split_diff):
+    # type: (tuple) -> int
+    lhs_out, rhs_out = split_diff
+    return sum(len(text) for line in lhs_out for _, text in line) + sum(
+        len(text) for line in rhs_out for _, text in line
+    )
+
+
+def cached_split_diff(name, diff_func, lhs, rhs):
+    # type: (str, Callable[[str, str], tuple], str, str) -> tuple
+    """
+    Memoizes `diff_func(lhs, rhs)` in the diff cache under `name`, so that failures
+    comparing identical values are only diffed once.
+
+    :return: tuple of the "left" and "right" lists of lines of (style, text) spans,
+        copied from the cache so that callers may modify them
+    """
+    key = None
+    if diff_cache.enabled:
+        key = make_key(name, lhs, rhs)
+        cached = diff_cache.get(key)
+        if cached is not None:
+            lhs_out, rhs_out = cached
+            return list(lhs_out), list(rhs_out)
+
+    lhs_out, rhs_out = diff_func(lhs, rhs)
+
+    if key is not None:
+        size = spans_size((lhs_out, rhs_out))
+        diff_cache.set(key, (tuple(lhs_out), tuple(rhs_out)), size)
+    return lhs_out, rhs_out
+
+
+def repr_split_diff_spans(lhs_repr, rhs_repr):
+    # type: (str, str) -> tuple
+    if len(lhs_repr) + len(rhs_repr) <= config.char_diff_limit:
+        return char_split_diff_spans(lhs_repr, rhs_repr)
+    return line_split_diff_spans(lhs_repr, rhs_repr)
+
+
+@stats.measure("split_diff_spans", size=spans_size)
+def split_diff_spans(lhs_repr, rhs_repr):
+    # type: (str, str) -> tuple
+    """
+    Compares string representations of expected and actual, building the styled
+    diff output for consumption by any renderer.
+
+    Small reprs are diffed character by character, anything larger than the
+    configured `char_diff_limit` is diffed line by line first to avoid the quadratic
+    worst case of a character level SequenceMatcher.
+
+    :param lhs_repr: the string representation of the "left" i.e. expected
+    :param rhs_repr: the string representation of the "right" i.e. actual
+    :return: tuple of the "left" and "right" lists of lines of (style, text) spans
+    """
+    return cached_split_diff(
+        "split_diff_spans", repr_split_diff_spans, lhs_repr, rhs_repr
+    )
+
+
+@stats.measure("text_diff_spans", size=spans_size)
+def text_diff_spans(lhs_text, rhs_text):
+    # type: (str, str) -> tuple
+    """
+    Compares long strings line by line and word by word, see
+    `nose_dehaze.text.text_split_diff_spans`.
+
+    :param lhs_text: the "left" string i.e. actual
+    :param rhs_text: the "right" string i.e. expected
+    :return: tuple of the "left" and "right" lists of lines of (style, text) spans
+    """
+    return cached_split_diff(
+        "text_diff_spans", text_split_diff_spans, lhs_text, rhs_text
+    )
+
+
+def render_lines(lines):
+    # type: (list) -> list
+    render = get_renderer().render
+    return [render(spans) for spans in lines]
+
+
+@stats.measure("build_split_diff", size=lines_size)
+def build_split_diff(lhs_repr, rhs_repr):
+    # type: (str, str) -> tuple
+    """
+    Compares string representations of expected and actual, building the diff
+    output rendered in the configured format, see `split_diff_spans`.
+
+    :param lhs_repr: the string representation of the "left" i.e. expected
+    :param rhs_repr: the string representation of the "right" i.e. actual
+    :return: tuple of the "left" and "right" lists of rendered lines
+    """
+    lhs_out, rhs_out = split_diff_spans(lhs_repr, rhs_repr)
+    return render_lines(lhs_out), render_lines(rhs_out)
+
+
+def write_label(writer, label):
+    # type: (Writer, str) -> None
+    writer.write("", Style.reset)
+    writer.write(label, Style.diff_intro)
+    writer.write(" ")
+
+
+def write_hint(writer, hint):
+    # type: (Writer, str) -> None
+    writer.write("\n\n    ")
+    write_label(writer, "hint:")
+    # hints are styled inline by the active renderer already
+    writer.write(hint, Style.raw)
 
-    return lhs_out.splitlines(), rhs_out.splitlines()
+
+def fallback_lines(value):
+    # type: (str) -> List[list]
+    if len(value) > TIMEOUT_FALLBACK_CHARS:
+        value = value[:TIMEOUT_FALLBACK_CHARS] + TRUNCATED_OUTPUT_REPR
+    return [[(Style.reset, line)] for line in utf8_replace(value).splitlines()]
+
+
+def build_fallback_output(assert_method, expected, actual):
+    # type: (str, Optional[str], Optional[str]) -> Optional[str]
+    """
+    Renders expected and actual truncated and undiffed, for failures whose diff ran
+    out of its time budget.
+
+    :param assert_method: the test assertion method
+    :param expected: the expected str, None if the time ran out before it was built
+    :param actual: the actual str, None if the time ran out before it was built
+    :return: the fallback output, or None to show the original exception instead
+    """
+    if not (expected and actual):
+        return None
+
+    expected_lines = fallback_lines(expected)
+    actual_lines = fallback_lines(actual)
+    hint = TIMEOUT_HINT_MSG.format(timeout_ms=config.timeout_ms)
+    writer = Writer()
+    writer.write("\n\n")
+    write_label(writer, "Expected:")
+    writer.write_joined(PADDED_NEWLINE, expected_lines)
+    writer.write("\n  ")
+    write_label(writer, "Actual:")
+    writer.write_joined(PADDED_NEWLINE, actual_lines)
+    write_hint(writer, hint)
+    return get_renderer().document(
+        assert_method, writer.spans, expected_lines, actual_lines, hint
+    )
 
 
 def build_args_diff(expected, actual):
@@ -117,7 +357,7 @@ def build_args_diff(expected, actual):
                 )
             )
 
-        act, exp = build_split_diff(pformat(b), pformat(a))
+        act, exp = build_split_diff(bounded_pformat(b), bounded_pformat(a))
         expected_args.append("\n".join(exp))
         actual_args.append("\n".join(act))
 
@@ -126,11 +366,11 @@ def build_args_diff(expected, actual):
     # handle different arg lengths
     if i == actual_length and i < expected_length:
         for remaining_arg in expected[i:]:
-            expected_args.append(deleted_text(pformat(remaining_arg)))
+            expected_args.append(deleted_text(bounded_pformat(remaining_arg)))
 
     if i == expected_length and i < actual_length:
         for remaining_arg in actual[i:]:
-            actual_args.append(inserted_text(pformat(remaining_arg)))
+            actual_args.append(inserted_text(bounded_pformat(remaining_arg)))
 
     return expected_args, actual_args
 
@@ -148,7 +388,7 @@ def build_call_args_diff_output(mock_instance, e_args, e_kwargs):
     :param e_args: the expected function args the mock was called with
     :param e_kwargs: the expected function kwargs the mock was called with
     """
-    mock_name = extract_mock_name(mock_instance)
+    mock_name = mock_names.get(mock_instance)
 
     args = ()
     kwargs = {}
@@ -159,60 +399,68 @@ def build_call_args_diff_output(mock_instance, e_args, e_kwargs):
     pad = PADDED_NEWLINE + extra_padding
 
     kwarg_str = ",{}".format(pad).join(
-        ["{k}={v}".format(k=k, v=pformat(v)) for k, v in kwargs.items()]
+        ["{k}={v}".format(k=k, v=bounded_pformat(v)) for k, v in kwargs.items()]
     )
     e_kwarg_str = ",{}".format(pad).join(
-        ["{k}={v}".format(k=k, v=pformat(v)) for k, v in e_kwargs.items()]
+        ["{k}={v}".format(k=k, v=bounded_pformat(v)) for k, v in e_kwargs.items()]
     )
 
     expected_args, actual_args = build_args_diff(e_args, args)
     actual_kwargs, expected_kwargs = build_split_diff(kwarg_str, e_kwarg_str)
 
-    sep_e = ",{pad}".format(pad=pad) if e_args and e_kwargs else ""
-    sep_a = ",{pad}".format(pad=pad) if args and kwargs else ""
-    exp = "{mock_name}({exp}{sep}{ekw})".format(
-        mock_name=header_text(mock_name),
-        exp=", ".join(expected_args),
-        sep=sep_e,
-        ekw="\n".join(expected_kwargs) if e_kwargs else "",
+    # args and kwargs are rendered by build_split_diff already
+    writer = Writer()
+    writer.write("\n\n")
+    write_label(writer, "Expected:")
+    writer.write(mock_name, Style.header)
+    writer.write("(")
+    writer.write_joined(
+        ", ", ([(Style.raw, utf8_replace(arg))] for arg in expected_args)
     )
+    if e_args and e_kwargs:
+        writer.write(",{pad}".format(pad=pad))
+    if e_kwargs:
+        writer.write_joined(
+            "\n", ([(Style.raw, utf8_replace(kw))] for kw in expected_kwargs)
+        )
+    writer.write(")\n  ")
 
+    write_label(writer, "Actual:")
     if mock_instance.call_count:
-        act = "{mock_name}({act}{sep}{akw})".format(
-            mock_name=header_text(mock_name),
-            act=", ".join(actual_args),
-            sep=sep_a,
-            akw="\n".join(actual_kwargs) if kwargs else "",
+        writer.write(mock_name, Style.header)
+        writer.write("(")
+        writer.write_joined(
+            ", ", ([(Style.raw, utf8_replace(arg))] for arg in actual_args)
         )
+        if args and kwargs:
+            writer.write(",{pad}".format(pad=pad))
+        if kwargs:
+            writer.write_joined(
+                "\n", ([(Style.raw, utf8_replace(kw))] for kw in actual_kwargs)
+            )
+        writer.write(")")
     else:
-        act = "{mock_name} not called.".format(mock_name=header_text(mock_name))
-
-    formatted_output = (
-        "\n\n{expected_label} {expected}\n  {actual_label} {actual}"
-    ).format(
-        expected_label=Colour.stop + diff_intro_text("Expected:"),
-        expected=utf8_replace(exp),
-        actual_label=Colour.stop + diff_intro_text("Actual:"),
-        actual=utf8_replace(act),
-    )
+        writer.write(mock_name, Style.header)
+        writer.write(" not called.")
 
-    return formatted_output
+    return get_renderer().document("assert_called_once_with", writer.spans)
 
 
 def assert_bool_diff(assert_method, frame_locals):
     # type: (str, dict) -> tuple
     hint = None
     expected = assert_method == "assertTrue"
-    actual = frame_locals["expr"]
+    actual_value = frame_locals["expr"]
+    actual = bounded_pformat(actual_value)
 
-    if not isinstance(actual, bool):
+    if not isinstance(actual_value, bool):
         booly = "falsy" if assert_method == "assertTrue" else "truthy"
         hint = "{expr} is {booly}".format(
-            expr=deleted_text(pformat(actual)),
+            expr=deleted_text(summarize(actual_value, actual)),
             booly=deleted_text(booly),
         )
 
-    return pformat(expected), pformat(actual), hint
+    return bounded_pformat(expected), actual, hint
 
 
 def assert_is_none_diff(assert_method, frame_locals):
@@ -224,7 +472,9 @@ def assert_is_none_diff(assert_method, frame_locals):
     expected_op, actual_op = comparison
 
     actual_value = frame_locals["obj"]
-    message = partial("{actual} {op} None.".format, actual=pformat(actual_value))
+    message = partial(
+        "{actual} {op} None.".format, actual=bounded_pformat(actual_value)
+    )
 
     expected = message(op=expected_op)
     actual = message(op=actual_op)
@@ -245,12 +495,12 @@ def assert_is_instance_diff(assert_method, frame_locals):
     }[assert_method]
 
     hint = "{actual} {verb} an instance of {expected}.".format(
-        actual=header_text(actual_value),
+        actual=header_text(summarize(actual_value, bounded_pformat(actual_value))),
         verb=deleted_text(hint_verb),
         expected=header_text(expected),
     )
 
-    return pformat(expected, width=1), pformat(actual, width=1), hint
+    return bounded_pformat(expected, width=1), bounded_pformat(actual, width=1), hint
 
 
 def assert_call_count_diff(assert_method, mock_instance, mock_name):
@@ -263,7 +513,7 @@ def assert_call_count_diff(assert_method, mock_instance, mock_name):
 
     message = partial(
         "Mock {mock_name} called {count} times.".format,
-        mock_name=header_text(mock_name),
+        mock_name=header_text.in_diff(mock_name),
     )
     expected = message(count=expected_call_count)
     actual = message(count=actual_call_count)
@@ -275,14 +525,24 @@ def assert_called_with_diff(assert_method, mock_instance, mock_name, frame_local
     # type: (str, Mock, str, dict) -> tuple
     expected_args = frame_locals["args"]
     expected_kwargs = frame_locals["kwargs"]
+    actual_calls = list(mock_instance.call_args_list)
 
-    # TODO: diff against and colorize each call individually
-    expected = str(call(*expected_args, **expected_kwargs)).replace("call", mock_name)
-    actual = pformat([c for c in mock_instance.call_args_list], width=1).replace(
-        "call", mock_name
-    )
+    expected_call = call(*expected_args, **expected_kwargs)
+    expected = format_call(mock_name, expected_call)
 
     hint = None
+    num = config.call_diff_candidates
+    if len(actual_calls) > num:
+        indices = nearest_calls(expected_call, actual_calls, num)
+        actual_calls = [actual_calls[i] for i in indices]
+        hint = CLOSEST_CALLS_HINT_MSG.format(
+            num=num,
+            total=mock_instance.call_count,
+            indices=", ".join(str(i) for i in indices),
+        )
+
+    actual = format_calls(mock_name, actual_calls)
+
     if not mock_instance.call_count:
         hint = "{mock_name} not called.".format(mock_name=header_text(mock_name))
 
@@ -291,15 +551,23 @@ def assert_called_with_diff(assert_method, mock_instance, mock_name, frame_local
 
 def assert_has_calls_diff(assert_method, mock_instance, mock_name, frame_locals):
     # type: (str, Mock, str, dict) -> tuple
-    hint = None
+    hints = []
     expected_calls = frame_locals["expected"]
-
     # expected is a normal list, mock call_args_list is a CallList so we coerce to a
     # normal list for consistent formatting
-    expected = pformat(expected_calls, width=1).replace("call", mock_name)
-    actual = pformat(list(mock_instance.call_args_list), width=1).replace(
-        "call", mock_name
-    )
+    actual_calls = list(mock_instance.call_args_list)
+
+    aligned_hint = None
+    if len(actual_calls) > config.call_diff_candidates:
+        indices = align_calls(expected_calls, actual_calls)
+        actual_calls = [MISSING if i is None else actual_calls[i] for i in indices]
+        aligned_hint = ALIGNED_CALLS_HINT_MSG.format(
+            total=mock_instance.call_count,
+            indices=bounded_pformat([i for i in indices if i is not None]),
+        )
+
+    expected = format_calls(mock_name, expected_calls)
+    actual = format_calls(mock_name, actual_calls)
 
     if not mock_instance.call_count == len(expected_calls):
         expected_line = MOCK_CALL_COUNT_MSG.format(
@@ -314,17 +582,38 @@ def assert_has_calls_diff(assert_method, mock_instance, mock_name, frame_locals)
             mock_name=header_text(mock_name),
             num=inserted_text(mock_instance.call_count),
         )
-        hint = "\n".join(
-            [
-                "expected and actual call counts differ",
-                expected_line,
-                actual_line,
-            ]
+        hints.append(
+            "\n".join(
+                [
+                    "expected and actual call counts differ",
+                    expected_line,
+                    actual_line,
+                ]
+            )
         )
 
+    if aligned_hint is not None:
+        hints.append(aligned_hint)
+
+    hint = PADDED_NEWLINE.join(hints) or None
     return expected, actual, hint
 
 
+def summarize_type(value, text):
+    # type: (Any, str) -> str
+    """
+    :param text: the value as already rendered for the diff
+    :return: the type of the value, with its len when it rendered too long to
+        compare at a glance
+    """
+    if len(text) > SUMMARY_MAX_CHARS:
+        try:
+            return SIZED_TYPE_REPR.format(vtype=type(value), length=len(value))
+        except TypeError:
+            pass
+    return str(type(value))
+
+
 def get_assert_equal_diff(assert_method, frame_locals):
     # type: (str, dict) -> tuple
     expected_key, actual_key = FRAME_LOCALS_EXPECTED_ACTUAL_KEYS[assert_method]
@@ -347,28 +636,47 @@ def get_assert_equal_diff(assert_method, frame_locals):
         expected_op, actual_op = not_comparison
         comparison = partial(
             "{expected} {op} {actual}".format,
-            expected=pformat(expected_value),
-            actual=pformat(actual_value),
+            expected=bounded_pformat(expected_value),
+            actual=bounded_pformat(actual_value),
         )
         expected = comparison(op=expected_op)
         actual = comparison(op=actual_op)
         return expected, actual, hint
 
+    numeric_diff = build_numeric_diff(expected_value, actual_value)
+    if numeric_diff is not None:
+        return numeric_diff
+
+    set_diff = build_set_diff(expected_value, actual_value)
+    if set_diff is not None:
+        return set_diff
+
+    dict_diff = build_dict_diff(expected_value, actual_value)
+    if dict_diff is not None:
+        return dict_diff
+
+    sequence_diff = build_sequence_diff(expected_value, actual_value)
+    if sequence_diff is not None:
+        return sequence_diff
+
     if isinstance(expected_value, dict):
         expected_pformat_kwargs["width"] = 1
     if isinstance(actual_value, dict):
         actual_pformat_kwargs["width"] = 1
 
+    expected = bounded_pformat(expected_value, **expected_pformat_kwargs)
+    actual = bounded_pformat(actual_value, **actual_pformat_kwargs)
+
     if expected_type is not actual_type:
         hint_expected = TYPE_MISMATCH_HINT_MSG.format(
             padding=PADDED_NEWLINE,
             label=header_text("Expected:"),
-            vtype=deleted_text(expected_type),
+            vtype=deleted_text(summarize_type(expected_value, expected)),
         )
         hint_actual = TYPE_MISMATCH_HINT_MSG.format(
             padding=" " * 12,
             label=header_text("Actual:"),
-            vtype=inserted_text(actual_type),
+            vtype=inserted_text(summarize_type(actual_value, actual)),
         )
         hint = "\n".join(
             [
@@ -378,16 +686,31 @@ def get_assert_equal_diff(assert_method, frame_locals):
             ]
         )
 
-    expected = pformat(expected_value, **expected_pformat_kwargs)
-    actual = pformat(actual_value, **actual_pformat_kwargs)
-
     return expected, actual, hint
 
 
+def get_text_diff_values(assert_method, frame_locals):
+    # type: (str, dict) -> Optional[tuple]
+    """
+    :return: the expected and actual strings of an equality assert comparing long
+        strings, which are diffed as text rather than by their repr, None otherwise
+    """
+    keys = FRAME_LOCALS_EXPECTED_ACTUAL_KEYS.get(assert_method)
+    if keys is None or assert_method in ("assertNotEqual", "assertIs", "assertIsNot"):
+        return None
+
+    expected_key, actual_key = keys
+    expected = frame_locals.get(expected_key)
+    actual = frame_locals.get(actual_key)
+    if not is_long_text(expected, actual):
+        return None
+    return expected, actual
+
+
 def get_mock_assert_diff(assert_method, frame_locals):
     # type: (str, dict) -> tuple
     mock_instance = frame_locals["self"]
-    mock_name = extract_mock_name(mock_instance)
+    mock_name = mock_names.get(mock_instance)
 
     assert_diff_func = {
         "assert_called_once": partial(
@@ -445,16 +768,37 @@ ASSERT_METHOD_TO_DIFF_FUNC = {
 }
 
 
+@stats.measure("dehaze")
+def plain_hint(hint):
+    # type: (Optional[str]) -> Optional[str]
+    """
+    :return: the hint, styled inline by the active renderer, as plain text
+    """
+    return get_renderer().unstyle(hint) if hint else hint
+
+
 def dehaze(assert_method, frame_locals):
     # type: (str, dict) -> Optional[str]
     """
+    :return: the dehazed output string, see `dehaze_with_hint`
+    """
+    return dehaze_with_hint(assert_method, frame_locals)[0]
+
+
+def dehaze_with_hint(assert_method, frame_locals):
+    # type: (str, dict) -> Tuple[Optional[str], Optional[str]]
+    """
     Given a test assert method, e.g. assertEqual, extracts the corresponding relevant
     local variables needed to reconstruct the reason for assertion failure and render
     a "dehazed" output with coloring and formatting for readability.
 
     :param assert_method: the test assertion method
     :param frame_locals: the traceback frame local variables
-    :return: the dehazed (colorized, formatted) output string
+    :return: tuple of the dehazed (colorized, formatted) output string and the hint
+        of the diff as plain text, e.g. for the failure report
+
+    Diffing stops cooperatively once the configured `timeout_ms` budget is exceeded,
+    falling back to expected and actual undiffed, see `build_fallback_output`.
     """
     expected = None
     actual = None
@@ -462,33 +806,63 @@ def dehaze(assert_method, frame_locals):
     formatted_output = None
 
     diff_func = ASSERT_METHOD_TO_DIFF_FUNC.get(assert_method)
+    if diff_func is None and assert_method != "assert_called_once_with":
+        return None, None
+
+    key = None
+    spans_func = split_diff_spans
+    with deadline.limit(config.timeout_ms):
+        try:
+            text_values = get_text_diff_values(assert_method, frame_locals)
+            if text_values is not None:
+                expected, actual = text_values
+                spans_func = text_diff_spans
+            elif diff_func is not None:
+                with stats.timed(getattr(diff_func, "__name__", assert_method)):
+                    expected, actual, hint = diff_func(assert_method, frame_locals)
+            else:
+                with stats.timed("build_call_args_diff_output"):
+                    formatted_output = build_call_args_diff_output(
+                        frame_locals["self"],
+                        frame_locals["args"],
+                        frame_locals["kwargs"],
+                    )
+
+            if formatted_output is None and expected and actual and disk_cache.enabled:
+                key = disk_cache.make_key(
+                    assert_method,
+                    getattr(spans_func, "__name__", ""),
+                    expected,
+                    actual,
+                    hint or "",
+                )
+                cached = disk_cache.get(key)
+                if cached is not None:
+                    return cached, plain_hint(hint)
+
+            if formatted_output is None and expected and actual:
+                act, exp = spans_func(actual, expected)
+                exp = [utf8_replace_spans(line) for line in exp]
+                act = [utf8_replace_spans(line) for line in act]
+                writer = Writer()
+                writer.write("\n\n")
+                write_label(writer, "Expected:")
+                writer.write_joined(PADDED_NEWLINE, exp)
+                writer.write("\n  ")
+                write_label(writer, "Actual:")
+                writer.write_joined(PADDED_NEWLINE, act)
+                if hint is not None:
+                    write_hint(writer, hint)
+                formatted_output = get_renderer().document(
+                    assert_method, writer.spans, exp, act, hint
+                )
+        except DeadlineExceeded:
+            # fallback output depends on timing, so it is never cached
+            return (
+                build_fallback_output(assert_method, expected, actual),
+                plain_hint(hint),
+            )
 
-    if diff_func is not None:
-        expected, actual, hint = diff_func(assert_method, frame_locals)
-    elif assert_method == "assert_called_once_with":
-        formatted_output = build_call_args_diff_output(
-            frame_locals["self"],
-            frame_locals["args"],
-            frame_locals["kwargs"],
-        )
-    else:
-        return None
-
-    if formatted_output is None and expected and actual:
-        act, exp = build_split_diff(actual, expected)
-        formatted_output = (
-            "\n\n{expected_label} {expected}\n  {actual_label} {actual}"
-        ).format(
-            expected_label=Colour.stop + diff_intro_text("Expected:"),
-            expected=utf8_replace(PADDED_NEWLINE.join(exp)),
-            actual_label=Colour.stop + diff_intro_text("Actual:"),
-            actual=utf8_replace(PADDED_NEWLINE.join(act)),
-        )
-
-    if formatted_output is not None and hint is not None:
-        hint_output = "\n\n    {hint_label} {hint}".format(
-            hint_label=Colour.stop + diff_intro_text("hint:"),
-            hint=hint,
-        )
-        formatted_output += hint_output
-    return formatted_output
+    if key is not None and formatted_output is not None:
+        disk_cache.set(key, formatted_output)
+    return formatted_output, plain_hint(hint)
@@ -0,0 +1,130 @@
+"""
+lazy exception wrapper deferring the dehaze diff until a failure is rendered
+"""
+import traceback
+from timeit import default_timer
+from typing import TYPE_CHECKING
+
+from nose_dehaze.constants import FRAME_LOCALS_KEYS
+from nose_dehaze.report import dehaze_with_record
+from nose_dehaze.stats import MemoryPeak, stats
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from types import TracebackType
+    from typing import Optional
+
+
+def snapshot_frame_locals(assert_method, frame_locals):
+    # type: (str, dict) -> dict
+    """
+    Copies only the frame locals the assert method's diff function reads, so that the
+    snapshot does not keep every other local of the frame alive.
+
+    :param assert_method: the test assertion method
+    :param frame_locals: the traceback frame local variables
+    :return: the subset of the frame locals needed to dehaze the failure
+    """
+    return {
+        key: frame_locals[key]
+        for key in FRAME_LOCALS_KEYS.get(assert_method, ())
+        if key in frame_locals
+    }
+
+
+def clear_frames(trace):
+    # type: (TracebackType) -> None
+    """
+    Clears the locals of every finished frame in the traceback so that large test
+    data referenced only by those frames can be garbage collected. Frames still
+    executing, e.g. the test runner's, are left untouched.
+
+    `traceback.clear_frames` is python 3.4+ only, on older versions this is a no-op.
+    """
+    _clear_frames = getattr(traceback, "clear_frames", None)
+    if _clear_frames is not None:
+        _clear_frames(trace)
+
+
+class DehazedFailure(Exception):
+    """
+    Stands in for the original exception instance in nose's error tuple. The dehazed
+    output is only computed the first time the failure is converted to a string and
+    memoized from then on, so failures that are never printed cost next to nothing.
+
+    When the diff was submitted to a worker process, rendering joins its result
+    and merges the stats recorded by the worker instead, falling back to dehazing
+    in process if the worker failed.
+    """
+
+    def __init__(self, exc_instance, assert_method, frame_locals, future=None):
+        super(DehazedFailure, self).__init__()
+        self.exc_instance = exc_instance
+        self.assert_method = assert_method
+        self.frame_locals = frame_locals  # type: Optional[dict]
+        self.future = future  # type: Optional[Future]
+        self.output = None  # type: Optional[str]
+        # the failure report record built along with the output, see
+        # `nose_dehaze.report.dehaze_with_record`
+        self.record = None  # type: Optional[dict]
+        self.test_id = None  # type: Optional[str]
+
+    def render(self):
+        # type: () -> str
+        output = self.output
+        if output is None:
+            if stats.enabled:
+                with MemoryPeak() as memory:
+                    start = default_timer()
+                    output = self._render()
+                    seconds = default_timer() - start
+                stats.add_failure(
+                    self.test_id,
+                    self.assert_method,
+                    seconds,
+                    len(output),
+                    memory.peak,
+                )
+            else:
+                output = self._render()
+        return output
+
+    def _render(self):
+        # type: () -> str
+        output = None
+        if self.future is not None:
+            try:
+                output, self.record, worker_stats = self.future.result()
+                if worker_stats is not None:
+                    stats.merge(worker_stats)
+            except Exception:
+                output = None
+            self.future = None
+        if output is None and self.frame_locals is not None:
+            output, self.record = dehaze_with_record(
+                self.assert_method, self.frame_locals
+            )
+        rendered = output if output else str(self.exc_instance)
+        self.output = rendered
+        # the snapshot is no longer needed once rendered
+        self.frame_locals = None
+        return rendered
+
+    def snapshot(self, trace):
+        # type: (TracebackType) -> None
+        """
+        Renders the failure right away, with values bounded by the repr limits, then
+        drops the frame locals so the failure only keeps its rendered output alive.
+        Failures submitted to a worker process already hold a copy of their frame
+        locals in the worker and are not waited upon.
+        """
+        if self.future is None:
+            self.render()
+            self.exc_instance = None
+        else:
+            self.frame_locals = None
+            self.exc_instance = str(self.exc_instance)
+        clear_frames(trace)
+
+    def __str__(self):
+        return self.render()
@@ -0,0 +1,93 @@
+"""
+traceback utils to find the frame of the unittest/mock assert method that failed
+"""
+from typing import TYPE_CHECKING
+from unittest import TestCase
+
+from nose_dehaze.diff import ASSERT_METHOD_TO_DIFF_FUNC
+
+if TYPE_CHECKING:
+    from types import CodeType, FrameType, TracebackType
+    from typing import Dict, Iterable, Optional, Set, Tuple
+
+
+def _get_mock_classes():
+    # type: () -> list
+    classes = []
+    try:
+        from unittest.mock import NonCallableMock
+    except ImportError:
+        pass
+    else:
+        classes.append(NonCallableMock)
+    try:
+        from mock import NonCallableMock
+    except ImportError:
+        pass
+    else:
+        if NonCallableMock not in classes:
+            classes.append(NonCallableMock)
+    return classes
+
+
+def build_assert_code_index(classes, assert_methods):
+    # type: (Iterable[type], Iterable[str]) -> Tuple[Dict[CodeType, str], Set[CodeType]]
+    """
+    Indexes the code objects of the assert methods defined on the given classes, so
+    that a traceback frame can be matched by identity rather than by name.
+
+    :param classes: the classes defining the assert methods, e.g. TestCase
+    :param assert_methods: the names of the supported assert methods
+    :return: tuple of the supported assert method code objects mapped to their name,
+        and the code objects of the unsupported assert methods. Deprecated aliases
+        wrapping another assert method, e.g. assertEquals, are in neither.
+    """
+    assert_methods = set(assert_methods)
+    index = {}  # type: Dict[CodeType, str]
+    unsupported = set()  # type: Set[CodeType]
+
+    for cls in classes:
+        for name in dir(cls):
+            if not (name.startswith("assert") or name == "fail"):
+                continue
+            func = getattr(cls, name, None)
+            # python 2 unbound methods wrap the function
+            code = getattr(getattr(func, "__func__", func), "__code__", None)
+            if code is None:
+                continue
+
+            if code.co_name in assert_methods:
+                index[code] = code.co_name
+            elif code.co_name == name:
+                unsupported.add(code)
+
+    return index, unsupported
+
+
+ASSERT_CODE_INDEX, UNSUPPORTED_ASSERT_CODES = build_assert_code_index(
+    [TestCase] + _get_mock_classes(),
+    list(ASSERT_METHOD_TO_DIFF_FUNC) + ["assert_called_once_with"],
+)
+
+
+def find_assert_frame(trace):
+    # type: (Optional[TracebackType]) -> Optional[Tuple[str, FrameType]]
+    """
+    Walks the traceback for the outermost frame of a supported assert method. The walk
+    stops early at the first unsupported unittest/mock assert method, e.g. assertIn,
+    since whatever it calls into is not a supported assertion either.
+
+    :param trace: the failure traceback
+    :return: tuple of the assert method name and its frame, or None if not found
+    """
+    while trace is not None:
+        code = trace.tb_frame.f_code
+        assert_method = ASSERT_CODE_INDEX.get(code)
+        if assert_method is not None:
+            return assert_method, trace.tb_frame
+        if code in UNSUPPORTED_ASSERT_CODES:
+            return None
+
+        trace = trace.tb_next
+
+    return None
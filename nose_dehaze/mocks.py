@@ -0,0 +1,149 @@
+"""
+mock introspection utils, rendering calls with the name of their mock
+"""
+import weakref
+from functools import partial
+from typing import TYPE_CHECKING
+
+from nose_dehaze.calls import split_call
+from nose_dehaze.pretty import bounded_pformat, truncate
+from nose_dehaze.structural import MISSING
+
+try:
+    from unittest.mock import call
+except ImportError:
+    from mock import call
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Iterable, Tuple
+
+    from mock import Mock
+
+
+def extract_mock_name(mock_instance):
+    # type: (Mock) -> str
+    """
+    Copied directly from python 3.7+ `mock` for py2 usage.
+
+    Builds and returns the full mock name, e.g. `object.func().attribute`
+
+    :param mock_instance: a python Mock instance
+    :return: the full mock instance name
+    """
+    _name_list = [mock_instance._mock_new_name]
+    _parent = mock_instance._mock_new_parent
+    last = mock_instance
+
+    dot = "."
+    if _name_list == ["()"]:
+        dot = ""
+
+    while _parent is not None:
+        last = _parent
+
+        _name_list.append(_parent._mock_new_name + dot)
+        dot = "."
+        if _parent._mock_new_name == "()":
+            dot = ""
+
+        _parent = _parent._mock_new_parent
+
+    _name_list = list(reversed(_name_list))
+    _first = last._mock_name or "mock"
+    if len(_name_list) > 1:
+        if _name_list[1] not in ("()", "()."):
+            _first += "."
+    _name_list[0] = _first
+    return "".join(_name_list)
+
+
+class MockNames(object):
+    """
+    Memoizes the full name of each mock by id, which otherwise walks up its parents
+    on every lookup. Entries hold a weakref to their mock and are dropped once it is
+    garbage collected, so that a reused id never returns a stale name.
+    """
+
+    def __init__(self):
+        self.names = {}  # type: Dict[int, Tuple[weakref.ref, str]]
+
+    def get(self, mock_instance):
+        # type: (Mock) -> str
+        key = id(mock_instance)
+        entry = self.names.get(key)
+        if entry is not None and entry[0]() is mock_instance:
+            return entry[1]
+
+        name = extract_mock_name(mock_instance)
+        try:
+            ref = weakref.ref(mock_instance, partial(self.discard, key))
+        except TypeError:
+            # not weak referenceable, e.g. a mock class with __slots__
+            return name
+        self.names[key] = (ref, name)
+        return name
+
+    def discard(self, key, ref):
+        # type: (int, weakref.ref) -> None
+        entry = self.names.get(key)
+        if entry is not None and entry[0] is ref:
+            del self.names[key]
+
+
+def format_call(mock_name, mock_call):
+    # type: (str, tuple) -> str
+    """
+    Renders a call as made on the mock, e.g. `mock.method(1, a=2)`, with its args and
+    kwargs truncated to the configured repr limits.
+
+    :param mock_name: the full name of the mock
+    :param mock_call: a `call` or an entry of `call_args_list`
+    """
+    name = mock_call[0] if len(mock_call) == 3 else ""
+    args, kwargs = split_call(mock_call)
+    # an unnamed call renders as "call(...)"
+    signature = str(
+        call(*truncate(args), **{k: truncate(v) for k, v in kwargs.items()})
+    )[len("call") :]
+    if not name:
+        return mock_name + signature
+    if name.startswith("()"):
+        return mock_name + name + signature
+    return "{mock_name}.{name}{signature}".format(
+        mock_name=mock_name, name=name, signature=signature
+    )
+
+
+class CallRepr(object):
+    """
+    Stand-in for a call that renders as `format_call` when pretty printed, so that
+    only the calls within the repr limits are ever formatted.
+    """
+
+    __slots__ = ("mock_name", "mock_call")
+
+    def __init__(self, mock_name, mock_call):
+        # type: (str, tuple) -> None
+        self.mock_name = mock_name
+        self.mock_call = mock_call
+
+    def __repr__(self):
+        return format_call(self.mock_name, self.mock_call)
+
+
+def format_calls(mock_name, calls):
+    # type: (str, Iterable[Any]) -> str
+    """
+    Pretty prints a list of calls, one per line, see `format_call`. `MISSING`
+    entries are rendered as is.
+    """
+    return bounded_pformat(
+        [
+            mock_call if mock_call is MISSING else CallRepr(mock_name, mock_call)
+            for mock_call in calls
+        ],
+        width=1,
+    )
+
+
+mock_names = MockNames()
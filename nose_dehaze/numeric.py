@@ -0,0 +1,255 @@
+"""
+element-wise diff of long numeric sequences, compared in bulk rather than by repr
+"""
+from array import array
+from itertools import islice
+from typing import TYPE_CHECKING
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    NUMERIC_DIFF_HINT_MSG,
+    NUMERIC_LENGTH_HINT_MSG,
+    NUMERIC_RANGES_MORE_MSG,
+    PADDED_NEWLINE,
+)
+from nose_dehaze.deadline import deadline
+from nose_dehaze.structural import MISSING, format_difference
+
+try:
+    import numpy
+except ImportError:
+    numpy = None  # type: ignore
+
+if TYPE_CHECKING:
+    from typing import Any, List, Optional, Sequence, Tuple
+
+
+# checked every this many elements by the pure python comparison
+CHUNK_SIZE = 65536
+
+
+def is_ndarray(value):
+    # type: (Any) -> bool
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def as_numeric(value):
+    # type: (Any) -> Optional[Sequence]
+    """
+    Converts a flat sequence of ints/floats to a NumPy array when NumPy is available,
+    or an `array.array` otherwise, validating that every element is a number in the
+    process. Ints are kept as ints so that large values compare exactly.
+
+    :return: the numeric sequence, or None if the value holds anything else
+    """
+    if is_ndarray(value):
+        return value if value.ndim == 1 and value.dtype.kind in "biuf" else None
+    if not isinstance(value, (list, tuple, array)):
+        return None
+    if isinstance(value, array):
+        return value if value.typecode not in ("u", "w") else None
+
+    if numpy is not None:
+        try:
+            converted = numpy.asarray(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        # strings and objects also convert, only numbers are diffed in bulk
+        return (
+            converted
+            if converted.ndim == 1 and converted.dtype.kind in "biuf"
+            else None
+        )
+
+    try:
+        return array("q", value)
+    except TypeError:
+        # floats, or anything that is not a number
+        pass
+    except OverflowError:
+        # ints beyond 64 bits would lose precision as floats
+        return None
+    try:
+        return array("d", value)
+    except (TypeError, OverflowError):
+        return None
+
+
+def element(value, i):
+    # type: (Any, int) -> Any
+    """
+    :return: the i-th element, as a python number for NumPy arrays
+    """
+    item = value[i]
+    return item.item() if is_ndarray(value) else item
+
+
+def mismatch_indices(expected, actual, length):
+    # type: (Sequence, Sequence, int) -> Sequence[int]
+    """
+    :return: the indices below `length` at which expected and actual differ, NaN
+        being equal to NaN
+    """
+    if numpy is not None and is_ndarray(expected) and is_ndarray(actual):
+        lhs = expected[:length]  # type: Any
+        rhs = actual[:length]  # type: Any
+        differs = lhs != rhs
+        if lhs.dtype.kind == "f" and rhs.dtype.kind == "f":
+            differs &= ~(numpy.isnan(lhs) & numpy.isnan(rhs))
+        return numpy.flatnonzero(differs).tolist()
+
+    indices = []  # type: List[int]
+    for start in range(0, length, CHUNK_SIZE):
+        deadline.check()
+        end = min(start + CHUNK_SIZE, length)
+        indices.extend(
+            i
+            for i, e, a in zip(
+                range(start, end), expected[start:end], actual[start:end]
+            )
+            # NaN differs from everything, itself included
+            if e != a and (e == e or a == a)
+        )
+    return indices
+
+
+def index_ranges(indices):
+    # type: (Sequence[int]) -> List[Tuple[int, int]]
+    """
+    Groups sorted indices into (start, stop) ranges of consecutive indices.
+    """
+    ranges = []  # type: List[Tuple[int, int]]
+    for i in indices:
+        if ranges and ranges[-1][1] == i:
+            ranges[-1] = (ranges[-1][0], i + 1)
+        else:
+            ranges.append((i, i + 1))
+    return ranges
+
+
+def max_errors(expected, actual, indices):
+    # type: (Sequence, Sequence, Sequence[int]) -> Tuple[float, float]
+    """
+    :return: the max absolute and relative error over the differing indices, the
+        relative error being relative to the expected value and skipping zeros
+    """
+    if numpy is not None and is_ndarray(expected) and is_ndarray(actual):
+        e = expected[indices].astype(float)  # type: ignore
+        a = actual[indices].astype(float)  # type: ignore
+        absolute = numpy.abs(e - a)
+        nonzero = e != 0
+        relative = absolute[nonzero] / numpy.abs(e[nonzero])
+        return (
+            float(absolute.max()) if absolute.size else 0.0,
+            float(relative.max()) if relative.size else 0.0,
+        )
+
+    max_absolute = 0.0
+    max_relative = 0.0
+    for i in indices:
+        absolute = abs(float(expected[i]) - float(actual[i]))
+        max_absolute = max(max_absolute, absolute)
+        if expected[i]:
+            max_relative = max(max_relative, absolute / abs(float(expected[i])))
+    return max_absolute, max_relative
+
+
+def build_numeric_diff(expected_value, actual_value):
+    # type: (Any, Any) -> Optional[tuple]
+    """
+    Compares long sequences of numbers element-wise in bulk, rendering only a sample
+    of the differing elements, the index ranges at which they differ and the max
+    absolute/relative error, without pretty printing the sequences.
+
+    :param expected_value: the expected value
+    :param actual_value: the actual value
+    :return: tuple of the expected str, actual str and hint, or None if the values
+        are not numeric sequences longer than `structural_diff_limit`
+    """
+    if not (is_ndarray(expected_value) or is_ndarray(actual_value)) and type(
+        expected_value
+    ) is not type(actual_value):
+        return None
+    try:
+        if max(len(expected_value), len(actual_value)) <= config.structural_diff_limit:
+            return None
+    except TypeError:
+        return None
+
+    expected = as_numeric(expected_value)
+    actual = as_numeric(actual_value)
+    if expected is None or actual is None:
+        return None
+    if is_ndarray(expected) != is_ndarray(actual):
+        # e.g. array.array against a list converted by NumPy
+        expected = numpy.asarray(expected)  # type: ignore
+        actual = numpy.asarray(actual)  # type: ignore
+
+    length = min(len(expected), len(actual))
+    indices = list(mismatch_indices(expected, actual, length))
+    if not indices and len(expected) == len(actual):
+        # e.g. assertIs on equal sequences, or values only differing before
+        # conversion, diff their repr instead
+        return None
+
+    max_paths = config.structural_diff_max_paths
+    expected_lines = []
+    actual_lines = []
+    for i in islice(indices, max_paths):
+        path = "[{i}]".format(i=i)
+        expected_lines.append(format_difference(path, element(expected_value, i)))
+        actual_lines.append(format_difference(path, element(actual_value, i)))
+
+    ranges = index_ranges(indices)
+    ranges_repr = ", ".join(
+        (
+            "[{start}]".format(start=start)
+            if stop == start + 1
+            else "[{start}:{stop}]".format(start=start, stop=stop)
+        )
+        for start, stop in ranges[:max_paths]
+    )
+    if len(ranges) > max_paths:
+        ranges_repr += NUMERIC_RANGES_MORE_MSG.format(num=len(ranges) - max_paths)
+
+    hints = []
+    if indices:
+        max_absolute, max_relative = max_errors(expected, actual, indices)
+        hints.append(
+            NUMERIC_DIFF_HINT_MSG.format(
+                num=len(indices),
+                total=length,
+                ranges=ranges_repr,
+                absolute=max_absolute,
+                relative=max_relative,
+            )
+        )
+    if len(expected) != len(actual):
+        hints.append(
+            NUMERIC_LENGTH_HINT_MSG.format(expected=len(expected), actual=len(actual))
+        )
+        if not expected_lines:
+            # only the lengths differ, show the first element past the shorter one
+            path = "[{i}]".format(i=length)
+            expected_lines.append(
+                format_difference(
+                    path,
+                    (
+                        element(expected_value, length)
+                        if len(expected) > length
+                        else MISSING
+                    ),
+                )
+            )
+            actual_lines.append(
+                format_difference(
+                    path,
+                    element(actual_value, length) if len(actual) > length else MISSING,
+                )
+            )
+
+    return (
+        "\n".join(expected_lines),
+        "\n".join(actual_lines),
+        PADDED_NEWLINE.join(hints),
+    )
@@ -1,14 +1,125 @@
+import sys
+
 from nose.plugins import Plugin
 
-from nose_dehaze.diff import ASSERT_METHOD_TO_DIFF_FUNC, dehaze
+from nose_dehaze.cache import diff_cache, disk_cache
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    CACHE_STATS_MSG,
+    COLOR,
+    COLOR_CHOICES,
+    DISK_CACHE_STATS_MSG,
+    FORMAT,
+    FORMAT_CHOICES,
+)
+from nose_dehaze.failure import DehazedFailure, snapshot_frame_locals
+from nose_dehaze.frames import find_assert_frame
+from nose_dehaze.render import resolve_color
+from nose_dehaze.report import ReportWriter
+from nose_dehaze.stats import stats
+from nose_dehaze.workers import WorkerPool
+
+# (option, environment variable, config attribute, help) of the integer settings
+INT_OPTIONS = (
+    (
+        "--dehaze-char-diff-limit",
+        "NOSE_DEHAZE_CHAR_DIFF_LIMIT",
+        "char_diff_limit",
+        "Combined expected and actual size in characters above which diffs are computed line by line.",  # noqa: E501
+    ),
+    (
+        "--dehaze-hunk-diff-limit",
+        "NOSE_DEHAZE_HUNK_DIFF_LIMIT",
+        "hunk_diff_limit",
+        "Size in characters above which a changed hunk of lines is highlighted whole instead of character diffed.",  # noqa: E501
+    ),
+    (
+        "--dehaze-structural-diff-limit",
+        "NOSE_DEHAZE_STRUCTURAL_DIFF_LIMIT",
+        "structural_diff_limit",
+        "Number of nested items above which only the differing paths of dicts, lists and tuples are shown.",  # noqa: E501
+    ),
+    (
+        "--dehaze-dict-diff-context",
+        "NOSE_DEHAZE_DICT_DIFF_CONTEXT",
+        "dict_diff_context",
+        "Number of equal keys shown around each difference of dicts above the structural diff limit.",  # noqa: E501
+    ),
+    (
+        "--dehaze-call-diff-candidates",
+        "NOSE_DEHAZE_CALL_DIFF_CANDIDATES",
+        "call_diff_candidates",
+        "Number of mock calls above which expected calls are only shown against their closest actual calls.",  # noqa: E501
+    ),
+    (
+        "--dehaze-max-depth",
+        "NOSE_DEHAZE_MAX_DEPTH",
+        "max_depth",
+        "Nesting depth after which rendered values are elided.",
+    ),
+    (
+        "--dehaze-max-items",
+        "NOSE_DEHAZE_MAX_ITEMS",
+        "max_items",
+        "Number of items rendered per container.",
+    ),
+    (
+        "--dehaze-max-string",
+        "NOSE_DEHAZE_MAX_STRING",
+        "max_string",
+        "Number of characters rendered per string.",
+    ),
+    (
+        "--dehaze-max-chars",
+        "NOSE_DEHAZE_MAX_CHARS",
+        "max_chars",
+        "Total number of characters rendered per value.",
+    ),
+    (
+        "--dehaze-timeout-ms",
+        "NOSE_DEHAZE_TIMEOUT_MS",
+        "timeout_ms",
+        "Time budget in milliseconds to diff a failure, after which values are shown undiffed. 0 for no limit.",  # noqa: E501
+    ),
+    (
+        "--dehaze-workers",
+        "NOSE_DEHAZE_WORKERS",
+        "workers",
+        "Number of worker processes diffing failures in parallel, 0 to diff in process.",  # noqa: E501
+    ),
+    (
+        "--dehaze-cache-size",
+        "NOSE_DEHAZE_CACHE_SIZE",
+        "cache_size",
+        "Total size in characters of the rendered diffs cached for identical failures, 0 to disable.",  # noqa: E501
+    ),
+    (
+        "--dehaze-disk-cache-size",
+        "NOSE_DEHAZE_DISK_CACHE_SIZE",
+        "disk_cache_size",
+        "Total size in characters of the rendered output kept in the on-disk cache.",
+    ),
+)
 
 
 class Dehaze(Plugin):
     enabled = False
     enableOpt = "dehaze"
     env_opt = "NOSE_DEHAZE"
+    snapshot_env_opt = "NOSE_DEHAZE_SNAPSHOT"
+    cache_dir_env_opt = "NOSE_DEHAZE_CACHE_DIR"
+    color_env_opt = "NOSE_DEHAZE_COLOR"
+    format_env_opt = "NOSE_DEHAZE_FORMAT"
+    report_env_opt = "NOSE_DEHAZE_REPORT"
+    stats_env_opt = "NOSE_DEHAZE_STATS"
+    stats_file_env_opt = "NOSE_DEHAZE_STATS_FILE"
     name = "nose-dehaze"
     score = 1020
+    pool = None
+    report_writer = None
+    report_failures = None
+    stats_file = None
+    color = COLOR
 
     def options(self, parser, env):
         enabled = env.get(self.env_opt, "false").lower() in {"true", "1"}
@@ -21,20 +132,175 @@ class Dehaze(Plugin):
                 self.env_opt
             ),
         )
+        parser.add_option(
+            "--dehaze-snapshot",
+            action="store_true",
+            default=env.get(self.snapshot_env_opt, "false").lower() in {"true", "1"},
+            dest="dehaze_snapshot",
+            help="Render failures as soon as they happen and clear their traceback frame locals so large test data can be garbage collected. Environment variable: {}".format(  # noqa: E501
+                self.snapshot_env_opt
+            ),
+        )
+        parser.add_option(
+            "--dehaze-cache-dir",
+            default=env.get(self.cache_dir_env_opt),
+            dest="dehaze_cache_dir",
+            help="Directory of an on-disk cache of rendered failures shared between runs and processes, disabled by default. Environment variable: {}".format(  # noqa: E501
+                self.cache_dir_env_opt
+            ),
+        )
+        parser.add_option(
+            "--dehaze-color",
+            type="choice",
+            choices=COLOR_CHOICES,
+            default=env.get(self.color_env_opt, COLOR),
+            dest="dehaze_color",
+            help="Colorize output: auto, always or never. auto disables colors when the output is not a terminal or NO_COLOR is set. Environment variable: {}".format(  # noqa: E501
+                self.color_env_opt
+            ),
+        )
+        parser.add_option(
+            "--dehaze-format",
+            type="choice",
+            choices=FORMAT_CHOICES,
+            default=env.get(self.format_env_opt, FORMAT),
+            dest="dehaze_format",
+            help="Output format of failures: ansi, plain, html or json. Environment variable: {}".format(  # noqa: E501
+                self.format_env_opt
+            ),
+        )
+        parser.add_option(
+            "--dehaze-report",
+            default=env.get(self.report_env_opt),
+            dest="dehaze_report",
+            help="Path of a JSON lines file to write a record of every failure to. Environment variable: {}".format(  # noqa: E501
+                self.report_env_opt
+            ),
+        )
+        parser.add_option(
+            "--dehaze-stats",
+            action="store_true",
+            default=env.get(self.stats_env_opt, "false").lower() in {"true", "1"},
+            dest="dehaze_stats",
+            help="Print the time and memory spent dehazing failures after the run. Environment variable: {}".format(  # noqa: E501
+                self.stats_env_opt
+            ),
+        )
+        parser.add_option(
+            "--dehaze-stats-file",
+            default=env.get(self.stats_file_env_opt),
+            dest="dehaze_stats_file",
+            help="Path of a JSON file to dump the time and memory spent dehazing failures to. Environment variable: {}".format(  # noqa: E501
+                self.stats_file_env_opt
+            ),
+        )
+        for option, env_opt, attr, help_text in INT_OPTIONS:
+            parser.add_option(
+                option,
+                type="int",
+                default=env.get(env_opt, getattr(config, attr)),
+                dest="dehaze_" + attr,
+                help="{help} Environment variable: {env_opt}".format(
+                    help=help_text, env_opt=env_opt
+                ),
+            )
+
+    def configure(self, options, conf):
+        super(Dehaze, self).configure(options, conf)
+        if not self.enabled:
+            return
+
+        self.color = options.dehaze_color
+        config.color = resolve_color(self.color, sys.stderr)
+        config.format = options.dehaze_format
+        config.snapshot = options.dehaze_snapshot
+        config.cache_dir = options.dehaze_cache_dir
+        for _, _, attr, _ in INT_OPTIONS:
+            setattr(config, attr, getattr(options, "dehaze_" + attr))
+        self.pool = WorkerPool.create(config.workers)
+        if options.dehaze_report:
+            self.report_writer = ReportWriter(options.dehaze_report)
+            self.report_failures = []
+        config.report = self.report_writer is not None
+        self.stats_file = options.dehaze_stats_file
+        config.stats = options.dehaze_stats or bool(self.stats_file)
+
+    def setOutputStream(self, stream):
+        # the runner's stream decides whether colors are shown, sys.stderr by default
+        config.color = resolve_color(self.color, stream)
+
+    def report(self, stream):
+        if config.stats and not self.stats_file:
+            for line in stats.summary_lines():
+                stream.writeln(line)
+        if diff_cache.hits or diff_cache.misses:
+            stream.writeln(
+                CACHE_STATS_MSG.format(hits=diff_cache.hits, misses=diff_cache.misses)
+            )
+        if disk_cache.hits or disk_cache.misses:
+            stream.writeln(
+                DISK_CACHE_STATS_MSG.format(
+                    hits=disk_cache.hits, misses=disk_cache.misses
+                )
+            )
+
+    def addFailure(self, test, err):
+        if self.report_writer is None:
+            return
+
+        # recorded once the failures were printed, rendering each only once
+        exc_class, exc_instance, _ = err
+        self.report_failures.append((test.id(), exc_class.__name__, exc_instance))
+
+    def write_report(self):
+        for test_id, exception, exc_instance in self.report_failures:
+            record = None
+            if isinstance(exc_instance, DehazedFailure):
+                # a no-op unless the failure was never printed
+                exc_instance.render()
+                record = exc_instance.record
+            if record is None:
+                # failures without a supported assert are reported without a diff
+                record = {
+                    "assert_method": getattr(exc_instance, "assert_method", None),
+                    "paths": [],
+                    "hint": None,
+                    "time": 0.0,
+                }
+            record = dict(record, test=test_id, exception=exception)
+            self.report_writer.write(record)
+        self.report_failures = []
+        self.report_writer.close()
+
+    def finalize(self, result):
+        if self.report_writer is not None:
+            self.write_report()
+        if self.pool is not None:
+            self.pool.shutdown()
+        if self.stats_file:
+            stats.dump(self.stats_file)
+        disk_cache.close()
 
     def formatFailure(self, test, err):
+        with stats.timed("formatFailure"):
+            return self.dehaze_failure(test, err)
+
+    def dehaze_failure(self, test, err):
         exc_class, exc_instance, trace = err
 
-        _tb = trace
-        output = None
-        while trace and output is None:
-            assert_method = trace.tb_frame.f_code.co_name
-            if (
-                assert_method in ASSERT_METHOD_TO_DIFF_FUNC
-                or assert_method == "assert_called_once_with"
-            ):
-                output = dehaze(assert_method, trace.tb_frame.f_locals)
+        assert_frame = find_assert_frame(trace)
+        if assert_frame is None:
+            return err
 
-            trace = trace.tb_next
+        assert_method, frame = assert_frame
+        frame_locals = snapshot_frame_locals(assert_method, frame.f_locals)
+        future = None
+        if self.pool is not None:
+            future = self.pool.submit(assert_method, frame_locals)
 
-        return (exc_class, output if output else exc_instance, _tb)
+        failure = DehazedFailure(exc_instance, assert_method, frame_locals, future)
+        if config.stats:
+            failure.test_id = test.id()
+        if config.snapshot:
+            failure.snapshot(trace)
+        return (exc_class, failure, trace)
@@ -0,0 +1,247 @@
+"""
+bounded pretty printing utils to render values without allocating their full repr
+"""
+from collections import OrderedDict, defaultdict, deque
+from itertools import islice
+from pprint import PrettyPrinter
+from typing import TYPE_CHECKING
+
+from six import binary_type, text_type
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    CONTAINER_SUBCLASS_REPR,
+    MORE_CHARS_REPR,
+    MORE_ITEMS_REPR,
+    RECURSION_REPR,
+    SUMMARY_ITEMS,
+    SUMMARY_MAX_CHARS,
+    SUMMARY_REPR,
+    TRUNCATED_OUTPUT_REPR,
+)
+
+if TYPE_CHECKING:
+    from typing import Any, Dict, Tuple
+
+
+# the exact builtin containers and the collections pprint knows are rebuilt as they
+# are, other subclasses, e.g. Counter or namedtuples, are rebuilt as their builtin
+# base and rendered as `Type(<base>)`, since their own __repr__ would render every
+# item before the budget could stop it
+SEQUENCE_TYPES = (list, tuple, set, frozenset)
+BASE_TYPES = (dict,) + SEQUENCE_TYPES
+STRING_TYPES = (text_type, binary_type)
+NESTED_PLACEHOLDERS = {  # type: Dict[type, str]
+    dict: "{...}",
+    list: "[...]",
+    tuple: "(...)",
+    set: "{...}",
+    frozenset: "frozenset({...})",
+}
+
+
+class Raw(object):
+    """
+    Stand-in for a value that renders as the given, already bounded, text.
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def __repr__(self):
+        return self.text
+
+
+class BudgetExceeded(Exception):
+    pass
+
+
+class BudgetStream(object):
+    """
+    Write-only stream that stops the pretty printer once `max_chars` were written.
+    """
+
+    def __init__(self, max_chars):
+        self.max_chars = max_chars
+        self.remaining = max_chars
+        self.fragments = []
+
+    def write(self, text):
+        if len(text) > self.remaining:
+            self.fragments.append(text[: self.remaining])
+            self.remaining = 0
+            raise BudgetExceeded()
+        self.fragments.append(text)
+        self.remaining -= len(text)
+
+    def getvalue(self):
+        return "".join(self.fragments)
+
+
+class Truncator(object):
+    """
+    Builds a bounded copy of a value, cutting containers at `max_items`, strings at
+    `max_string` and nesting at `max_depth`. The total number of copied nodes is
+    bounded by `max_chars` since every node renders as at least one character.
+    """
+
+    def __init__(self, max_depth, max_items, max_string, max_chars):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string = max_string
+        self.nodes_left = max_chars
+        self.active = set()  # type: set
+
+    def truncate(self, value, depth=0):
+        # type: (Any, int) -> Any
+        self.nodes_left -= 1
+        value_type = type(value)
+
+        if isinstance(value, STRING_TYPES):
+            if len(value) <= self.max_string:
+                return value
+            return Raw(
+                repr(value[: self.max_string])
+                + MORE_CHARS_REPR.format(num=len(value) - self.max_string)
+            )
+
+        if value_type is dict or value_type in SEQUENCE_TYPES:
+            base_type = value_type
+        elif isinstance(value, deque):
+            base_type = list
+        else:
+            for base_type in BASE_TYPES:
+                if isinstance(value, base_type):
+                    break
+            else:
+                return value
+
+        if depth >= self.max_depth:
+            if value_type is base_type:
+                return Raw(NESTED_PLACEHOLDERS[base_type])
+            return Raw(
+                CONTAINER_SUBCLASS_REPR.format(vtype=value_type.__name__, items="...")
+            )
+
+        value_id = id(value)
+        if value_id in self.active:
+            return Raw(RECURSION_REPR.format(vtype=value_type.__name__, id=value_id))
+
+        self.active.add(value_id)
+        try:
+            items, more = self._truncate_items(value, base_type is dict, depth + 1)
+        finally:
+            self.active.discard(value_id)
+        if value_type is base_type:
+            return base_type(items)
+        if value_type is defaultdict:
+            return defaultdict(value.default_factory, items)
+        if value_type in (OrderedDict, deque):
+            return value_type(items)
+        return self._wrap(value, base_type(items), more > 0)
+
+    def _truncate_items(self, value, is_dict, depth):
+        # type: (Any, bool, int) -> Tuple[list, int]
+        """
+        :return: tuple of the truncated items of a dict, or elements of any other
+            container, in order, to rebuild the container from and the number of
+            items cut
+        """
+        limit = max(0, min(self.max_items, self.nodes_left))
+        more = len(value) - limit
+
+        if is_dict:
+            items = [
+                (self.truncate(k, depth), self.truncate(v, depth))
+                for k, v in islice(value.items(), limit)
+            ]
+            if more > 0:
+                items.append((Raw(MORE_ITEMS_REPR.format(num=more)), Raw("...")))
+            return items, more
+
+        elements = [self.truncate(item, depth) for item in islice(value, limit)]
+        if more > 0:
+            elements.append(Raw(MORE_ITEMS_REPR.format(num=more)))
+        return elements, more
+
+    @staticmethod
+    def _wrap(value, copy, truncated):
+        # type: (Any, Any, bool) -> Raw
+        """
+        Renders the truncated copy of a subclass or deque within its type name, with
+        the fields of a namedtuple named.
+        """
+        if getattr(value, "_fields", None) and isinstance(copy, tuple):
+            named = len(copy) - 1 if truncated else len(copy)
+            items = ", ".join(
+                [
+                    "{}={!r}".format(field, item)
+                    for field, item in zip(value._fields, copy[:named])
+                ]
+                + [repr(item) for item in copy[named:]]
+            )
+        else:
+            items = repr(copy)
+        return Raw(
+            CONTAINER_SUBCLASS_REPR.format(vtype=type(value).__name__, items=items)
+        )
+
+
+def truncate(value):
+    # type: (Any) -> Any
+    """
+    Returns a copy of the value with its containers and strings cut down to the
+    configured repr limits.
+    """
+    return Truncator(
+        config.max_depth,
+        config.max_items,
+        config.max_string,
+        config.max_chars,
+    ).truncate(value)
+
+
+def bounded_pformat(value, **kwargs):
+    # type: (Any, **Any) -> str
+    """
+    Drop-in replacement for `pprint.pformat` that never renders more than the
+    configured limits, streaming the output and stopping at the character budget.
+
+    :param value: the value to pretty print
+    :param kwargs: `pprint.PrettyPrinter` keyword arguments, e.g. width
+    :return: the pretty printed, possibly truncated, value
+    """
+    # one extra character for the newline pprint terminates the output with
+    stream = BudgetStream(config.max_chars + 1)
+    printer = PrettyPrinter(stream=stream, **kwargs)  # type: ignore
+    try:
+        printer.pprint(truncate(value))
+    except BudgetExceeded:
+        return stream.getvalue()[: config.max_chars] + TRUNCATED_OUTPUT_REPR
+
+    return stream.getvalue()[:-1]
+
+
+def summarize(value, text):
+    # type: (Any, str) -> str
+    """
+    Compact stand-in for a value in hints, so that a huge value is not rendered a
+    second time.
+
+    :param value: the value
+    :param text: the value as already rendered for the diff
+    :return: the rendered text when short, else the type, len and first items of
+        builtin containers and strings, or the start of the rendered text
+    """
+    if len(text) <= SUMMARY_MAX_CHARS and "\n" not in text:
+        return text
+
+    value_type = type(value)
+    if value_type is dict or value_type in SEQUENCE_TYPES + STRING_TYPES:
+        items = Truncator(1, SUMMARY_ITEMS, SUMMARY_MAX_CHARS, SUMMARY_MAX_CHARS)
+        return SUMMARY_REPR.format(
+            vtype=value_type.__name__,
+            length=len(value),
+            items=repr(items.truncate(value)),
+        )
+    return " ".join(text[:SUMMARY_MAX_CHARS].split()) + TRUNCATED_OUTPUT_REPR
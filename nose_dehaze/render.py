@@ -0,0 +1,297 @@
+"""
+renderers turning styled spans of text into ANSI, plain, HTML or JSON output, with
+the ANSI escape sequences precomputed per style
+"""
+import json
+import os
+import re
+from typing import TYPE_CHECKING
+
+from six import string_types
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import FORMAT_ANSI, FORMAT_HTML, FORMAT_JSON, FORMAT_PLAIN
+
+try:
+    from html import escape, unescape
+except ImportError:  # python 2
+    from cgi import escape  # type: ignore
+    from HTMLParser import HTMLParser  # type: ignore
+
+    unescape = HTMLParser().unescape
+
+if TYPE_CHECKING:
+    from typing import Any, Iterable, List, Mapping, Optional, TextIO, Tuple
+
+    Span = Tuple[Optional[str], str]
+    Lines = List[List[Span]]
+
+
+ANSI_RESET = "\033[0m"
+ANSI_BOLD = "\033[1m"
+ANSI_COLOURS = {
+    "red": "\033[31m",
+    "green": "\033[32m",
+    "yellow": "\033[33m",
+    "cyan": "\033[36m",
+}
+ANSI_ESCAPE_RE = re.compile(r"\033\[[0-9;]*m")
+HTML_SPAN_RE = re.compile(r"</?span[^>]*>")
+# environment variables disabling colour, https://no-color.org and termcolor's
+NO_COLOR_ENV_VARS = ("NO_COLOR", "ANSI_COLORS_DISABLED")
+
+
+class Style(object):
+    deleted = "deleted"
+    inserted = "inserted"
+    header = "header"
+    diff_intro = "diff_intro"
+    reset = "reset"
+    # text already rendered by the active renderer, e.g. a hint with inline styles
+    raw = "raw"
+
+
+# (prefix, suffix) of each style, laid out like termcolor does with the attribute
+# wrapping the colour
+ANSI_STYLES = {
+    None: ("", ""),
+    Style.raw: ("", ""),
+    Style.deleted: (ANSI_BOLD + ANSI_COLOURS["red"], ANSI_RESET),
+    Style.inserted: (ANSI_BOLD + ANSI_COLOURS["green"], ANSI_RESET),
+    Style.header: (ANSI_BOLD + ANSI_COLOURS["yellow"], ANSI_RESET),
+    Style.diff_intro: (ANSI_BOLD + ANSI_COLOURS["cyan"], ANSI_RESET),
+    Style.reset: (ANSI_RESET, ""),
+}
+
+
+def to_text(value):
+    # type: (Any) -> str
+    if isinstance(value, string_types):
+        return value
+    return "%s" % (value,)
+
+
+class Renderer(object):
+    """
+    Renders spans of (style, text), where a style of None is unstyled text.
+    """
+
+    def style(self, style, text):
+        # type: (Optional[str], Any) -> str
+        raise NotImplementedError
+
+    def render(self, spans):
+        # type: (List[Span]) -> str
+        style = self.style
+        return "".join([style(span_style, text) for span_style, text in spans])
+
+    def unstyle(self, text):
+        # type: (str) -> str
+        """
+        :return: the text, styled inline by this renderer, as plain text
+        """
+        return text
+
+    def document(self, assert_method, spans, expected=None, actual=None, hint=None):
+        # type: (str, List[Span], Optional[Lines], Optional[Lines], Optional[str]) -> str
+        """
+        Renders the complete output of a failure.
+
+        :param assert_method: the test assertion method
+        :param spans: the (style, text) spans of the output
+        :param expected: the lines of (style, text) spans of the expected side of
+            the diff, when the output is a diff
+        :param actual: the lines of spans of the actual side of the diff
+        :param hint: the hint of the diff, rendered by this renderer already
+        """
+        return self.render(spans)
+
+
+class AnsiRenderer(Renderer):
+    def style(self, style, text):
+        # type: (Optional[str], Any) -> str
+        prefix, suffix = ANSI_STYLES[style]
+        return "%s%s%s" % (prefix, text, suffix)
+
+    def unstyle(self, text):
+        # type: (str) -> str
+        return ANSI_ESCAPE_RE.sub("", text)
+
+    def render(self, spans):
+        # type: (List[Span]) -> str
+        styles = ANSI_STYLES
+        if len(spans) == 1:
+            # most lines of large diffs are a single span
+            style, text = spans[0]
+            prefix, suffix = styles[style]
+            return prefix + text + suffix
+        return "".join(
+            [styles[style][0] + text + styles[style][1] for style, text in spans]
+        )
+
+
+class PlainRenderer(Renderer):
+    def style(self, style, text):
+        # type: (Optional[str], Any) -> str
+        return to_text(text)
+
+    def render(self, spans):
+        # type: (List[Span]) -> str
+        if len(spans) == 1:
+            return spans[0][1]
+        return "".join([text for _, text in spans])
+
+
+class HtmlRenderer(Renderer):
+    def style(self, style, text):
+        # type: (Optional[str], Any) -> str
+        if style == Style.raw:
+            return to_text(text)
+        if style is None or style == Style.reset:
+            return escape(to_text(text), False)
+        return '<span class="dehaze-{style}">{text}</span>'.format(
+            style=style, text=escape(to_text(text), False)
+        )
+
+    def unstyle(self, text):
+        # type: (str) -> str
+        return unescape(HTML_SPAN_RE.sub("", text))
+
+    def document(self, assert_method, spans, expected=None, actual=None, hint=None):
+        # type: (str, List[Span], Optional[Lines], Optional[Lines], Optional[str]) -> str
+        return '<pre class="dehaze">{}</pre>'.format(self.render(spans))
+
+
+# diff opcode of the text of each style in the lines of a diff
+JSON_OPCODES = {
+    None: "equal",
+    Style.raw: "equal",
+    Style.reset: "equal",
+    Style.header: "equal",
+    Style.deleted: "delete",
+    Style.inserted: "insert",
+    # collapsed unchanged lines
+    Style.diff_intro: "collapsed",
+}
+
+
+class JsonRenderer(PlainRenderer):
+    """
+    Renders inline styles, e.g. of hints, as plain text and failures as a JSON
+    object. Diffs are rendered as their expected and actual lines of spans, each
+    with the diff opcode of its text ("equal", "insert", "delete" or "collapsed"),
+    other output as its spans, with unstyled text in the "reset" style.
+    """
+
+    def json_line(self, line):
+        # type: (Iterable[Span]) -> List[dict]
+        return [
+            {"opcode": JSON_OPCODES[style], "text": text}
+            for style, text in line
+            if text
+        ]
+
+    def document(self, assert_method, spans, expected=None, actual=None, hint=None):
+        # type: (str, List[Span], Optional[Lines], Optional[Lines], Optional[str]) -> str
+        if expected is not None and actual is not None:
+            return json.dumps(
+                {
+                    "assert_method": assert_method,
+                    "expected": [self.json_line(line) for line in expected],
+                    "actual": [self.json_line(line) for line in actual],
+                    "hint": hint,
+                },
+                sort_keys=True,
+            )
+
+        return json.dumps(
+            {
+                "assert_method": assert_method,
+                "spans": [
+                    {
+                        "style": (Style.reset if style in (None, Style.raw) else style),
+                        "text": text,
+                    }
+                    for style, text in spans
+                    # empty style resets and the unstyled padding of lines are
+                    # only needed by the text formats
+                    if text and (style is not None or text.strip())
+                ],
+            },
+            sort_keys=True,
+        )
+
+
+RENDERERS = {
+    FORMAT_ANSI: AnsiRenderer(),
+    FORMAT_PLAIN: PlainRenderer(),
+    FORMAT_HTML: HtmlRenderer(),
+    FORMAT_JSON: JsonRenderer(),
+}
+
+
+def get_renderer():
+    # type: () -> Renderer
+    if config.format == FORMAT_ANSI and not config.color:
+        return RENDERERS[FORMAT_PLAIN]
+    return RENDERERS[config.format]
+
+
+class StyledText(object):
+    """
+    Callable styling text, or any value formatted with `%s`, inline with the active
+    renderer, taking a shortcut through the precomputed escape sequences for ANSI.
+    """
+
+    __slots__ = ("style", "prefix", "suffix")
+
+    def __init__(self, style):
+        # type: (str) -> None
+        self.style = style
+        self.prefix, self.suffix = ANSI_STYLES[style]
+
+    def __call__(self, text):
+        # type: (Any) -> str
+        if config.format == FORMAT_ANSI:
+            if not config.color:
+                return to_text(text)
+            return "%s%s%s" % (self.prefix, text, self.suffix)
+        return RENDERERS[config.format].style(self.style, text)
+
+    def in_diff(self, text):
+        # type: (Any) -> str
+        """
+        Styles text embedded in values that are diffed afterwards, which only ANSI
+        escape sequences pass through as is, so other formats leave it unstyled.
+        """
+        if config.format == FORMAT_ANSI:
+            return self(text)
+        return to_text(text)
+
+
+def resolve_color(color, stream=None, environ=None):
+    # type: (str, Optional[TextIO], Optional[Mapping[str, str]]) -> bool
+    """
+    :param color: one of "always", "never" or "auto"; auto colours output unless
+        a NO_COLOR/ANSI_COLORS_DISABLED environment variable is set or the stream is
+        not a terminal
+    :param stream: the stream output is written to
+    :param environ: the environment, defaults to `os.environ`
+    :return: whether output should be coloured
+    """
+    if color == "always":
+        return True
+    if color == "never":
+        return False
+
+    if environ is None:
+        environ = os.environ
+    if any(environ.get(env_var) for env_var in NO_COLOR_ENV_VARS):
+        return False
+    isatty = getattr(stream, "isatty", None)
+    return bool(isatty is not None and isatty())
+
+
+deleted_text = StyledText(Style.deleted)
+inserted_text = StyledText(Style.inserted)
+header_text = StyledText(Style.header)
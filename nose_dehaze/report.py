@@ -0,0 +1,107 @@
+"""
+machine readable report of the dehazed failures, written as JSON lines
+"""
+import io
+import json
+import os
+from itertools import islice
+from timeit import default_timer
+from typing import TYPE_CHECKING
+
+from six import text_type
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import FRAME_LOCALS_EXPECTED_ACTUAL_KEYS, REPORT_BUFFER_SIZE
+from nose_dehaze.deadline import deadline
+from nose_dehaze.diff import dehaze, dehaze_with_hint
+from nose_dehaze.structural import CONTAINER_TYPES, iter_differences
+
+if TYPE_CHECKING:
+    from typing import List, Optional, Tuple
+
+
+def changed_paths(assert_method, frame_locals):
+    # type: (str, dict) -> List[str]
+    """
+    :return: the paths at which the expected and actual containers of an equality
+        assert differ, up to the configured `structural_diff_max_paths`
+    """
+    keys = FRAME_LOCALS_EXPECTED_ACTUAL_KEYS.get(assert_method)
+    if keys is None or assert_method in ("assertNotEqual", "assertIsNot"):
+        return []
+
+    expected_key, actual_key = keys
+    expected = frame_locals.get(expected_key)
+    actual = frame_locals.get(actual_key)
+    if type(expected) is not type(actual) or not isinstance(expected, CONTAINER_TYPES):
+        return []
+
+    differences = iter_differences(expected, actual)
+    return [
+        path for path, _, _ in islice(differences, config.structural_diff_max_paths)
+    ]
+
+
+def dehaze_with_record(assert_method, frame_locals):
+    # type: (str, dict) -> Tuple[Optional[str], Optional[dict]]
+    """
+    Dehazes a failure, building its report record along with the output when a
+    report is written, so that the diff is only computed once for both. The changed
+    paths are collected within their own `timeout_ms` time budget.
+
+    :param assert_method: the test assertion method
+    :param frame_locals: the snapshot of the assert frame locals
+    :return: tuple of the dehazed output string and a dict of the assert method,
+        changed paths, hint as plain text and the time in seconds it took to build
+        both, or None when no report is written
+    """
+    if not config.report:
+        return dehaze(assert_method, frame_locals), None
+
+    start = default_timer()
+    output, hint = dehaze_with_hint(assert_method, frame_locals)
+    paths = []  # type: List[str]
+    try:
+        with deadline.limit(config.timeout_ms):
+            paths = changed_paths(assert_method, frame_locals)
+    except Exception:
+        # the time budget ran out or the values could not be compared, the failure
+        # is still reported with what was built so far
+        pass
+
+    return output, {
+        "assert_method": assert_method,
+        "paths": paths,
+        "hint": hint,
+        "time": default_timer() - start,
+    }
+
+
+class ReportWriter(object):
+    """
+    Appends records to a JSON lines file through a large write buffer, only flushing
+    and syncing the file to disk once when closed.
+    """
+
+    def __init__(self, path):
+        # type: (str) -> None
+        self.path = path
+        self.file = io.open(
+            path, "w", encoding="utf-8", buffering=REPORT_BUFFER_SIZE
+        )  # type: Optional[io.TextIOWrapper]
+
+    def write(self, record):
+        # type: (dict) -> None
+        if self.file is not None:
+            self.file.write(text_type(json.dumps(record, sort_keys=True)) + "\n")
+
+    def close(self):
+        # type: () -> None
+        if self.file is None:
+            return
+        try:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,153 @@
+"""
+element-wise diff of long lists and tuples, aligning the elements by their hash so
+that only the inserted, deleted, changed and moved elements are rendered
+"""
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING
+
+from nose_dehaze.align import element_key, sequence_opcodes
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    COLLAPSED_ITEMS_MSG,
+    SEQUENCE_DIFF_HINT_MSG,
+    STRUCTURAL_DIFF_HINT_MSG,
+)
+from nose_dehaze.deadline import deadline
+from nose_dehaze.dicts import KeyedDiff
+from nose_dehaze.structural import MISSING, exceeds_size, format_difference
+
+if TYPE_CHECKING:
+    from typing import Any, Deque, Dict, List, Optional, Sequence
+
+
+def index_path(i):
+    # type: (int) -> str
+    return "[{i}]".format(i=i)
+
+
+class SequenceDiff(KeyedDiff):
+    """
+    Collapses the equal elements between differences into a single line, a moved
+    element leaving no line at its new position.
+    """
+
+    def __init__(self, max_paths):
+        # type: (int) -> None
+        super(SequenceDiff, self).__init__(max_paths, COLLAPSED_ITEMS_MSG)
+        self.pending = 0
+
+    def add_collapsed(self, num):
+        # type: (int) -> None
+        self.pending += num
+
+    def flush(self):
+        # type: () -> None
+        if self.pending:
+            super(SequenceDiff, self).add_collapsed(self.pending)
+            self.pending = 0
+
+    def add_difference(self, path, expected, actual, actual_path=None):
+        # type: (str, Any, Any, Optional[str]) -> None
+        self.flush()
+        super(SequenceDiff, self).add_difference(path, expected, actual, actual_path)
+
+    def add_moved(self, i, j, value):
+        # type: (int, int, Any) -> None
+        """
+        Renders an element found at another index, moved elements being equal.
+        """
+        if self.full:
+            self.truncated = True
+            return
+        self.flush()
+        self.paths += 1
+        self.expected_lines.append(format_difference(index_path(i), value))
+        self.actual_lines.append(format_difference(index_path(j), value))
+
+
+def find_moves(opcodes, expected, actual):
+    # type: (List[tuple], Sequence, Sequence) -> Dict[int, int]
+    """
+    Pairs up the elements removed from one place and added in another.
+
+    :return: dict of the expected index of each moved element to its actual index
+    """
+    removed = defaultdict(deque)  # type: Dict[Any, Deque[int]]
+    for op, i1, i2, _, _ in opcodes:
+        if op != "equal":
+            for i in range(i1, i2):
+                removed[element_key(expected[i])].append(i)
+    if not removed:
+        return {}
+
+    moves = {}  # type: Dict[int, int]
+    for op, i1, i2, j1, j2 in opcodes:
+        if op == "equal":
+            continue
+        for j in range(j1, j2):
+            indices = removed.get(element_key(actual[j]))
+            # an element replaced within the same hunk is a change, not a move
+            if indices and not i1 <= indices[0] < i2:
+                moves[indices.popleft()] = j
+    return moves
+
+
+def build_sequence_diff(expected, actual):
+    # type: (Any, Any) -> Optional[tuple]
+    """
+    Compares lists/tuples element by element: the elements are aligned by their
+    hash, or the hash of their repr when unhashable, see `sequence_opcodes`, and
+    only the elements that were inserted, deleted, changed or moved are pretty
+    printed, at their index on each side. Runs of equal elements are collapsed.
+
+    :param expected: the expected value
+    :param actual: the actual value
+    :return: tuple of the expected str, actual str and hint, or None if the values
+        are not lists/tuples of the same type with more than
+        `structural_diff_limit` nested items
+    """
+    if type(expected) is not type(actual) or not isinstance(expected, (list, tuple)):
+        return None
+    limit = config.structural_diff_limit
+    if not (exceeds_size(expected, limit) or exceeds_size(actual, limit)):
+        return None
+
+    opcodes = sequence_opcodes(expected, actual)
+    moves = find_moves(opcodes, expected, actual)
+    moved_to = set(moves.values())
+
+    diff = SequenceDiff(config.structural_diff_max_paths)
+    counts = {"inserted": 0, "deleted": 0, "changed": 0, "moved": len(moves)}
+    for op, i1, i2, j1, j2 in opcodes:
+        deadline.check()
+        if op == "equal":
+            diff.add_collapsed(i2 - i1)
+            continue
+
+        removed = [i for i in range(i1, i2) if i not in moves]
+        added = [j for j in range(j1, j2) if j not in moved_to]
+        paired = min(len(removed), len(added))
+        counts["changed"] += paired
+        counts["deleted"] += len(removed) - paired
+        counts["inserted"] += len(added) - paired
+        if diff.full:
+            diff.truncated = True
+            continue
+
+        for i in range(i1, i2):
+            if i in moves:
+                diff.add_moved(i, moves[i], expected[i])
+        for i, j in zip(removed, added):
+            diff.add_difference(index_path(i), expected[i], actual[j], index_path(j))
+        for i in removed[paired:]:
+            diff.add_difference(index_path(i), expected[i], MISSING)
+        for j in added[paired:]:
+            diff.add_difference(index_path(j), MISSING, actual[j])
+
+    if not diff.full:
+        diff.flush()
+
+    hint = SEQUENCE_DIFF_HINT_MSG.format(**counts)
+    if diff.truncated:
+        hint += ", " + STRUCTURAL_DIFF_HINT_MSG.format(num=diff.max_paths)
+    return "\n".join(diff.expected_lines), "\n".join(diff.actual_lines), hint
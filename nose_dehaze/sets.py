@@ -0,0 +1,66 @@
+"""
+set diff utils rendering only the missing and unexpected members
+"""
+import heapq
+from typing import TYPE_CHECKING
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    SET_DIFF_HINT_MSG,
+    SET_DIFF_TRUNCATED_MSG,
+    SET_EMPTY_REPR,
+)
+from nose_dehaze.pretty import bounded_pformat
+
+if TYPE_CHECKING:
+    from typing import AbstractSet, Any, Optional
+
+
+SET_TYPES = (set, frozenset)
+
+
+def format_members(members, max_members):
+    # type: (AbstractSet, int) -> str
+    """
+    Renders the first `max_members` members by their repr, one per line, so that
+    neither the members shown nor their order depend on the order they were hashed
+    in, e.g. with a different PYTHONHASHSEED.
+    """
+    if not members:
+        return SET_EMPTY_REPR
+    return "\n".join(
+        bounded_pformat(member)
+        for member in heapq.nsmallest(max_members, members, key=repr)
+    )
+
+
+def build_set_diff(expected, actual):
+    # type: (Any, Any) -> Optional[tuple]
+    """
+    Compares sets by hashing, `expected - actual` and `actual - expected` being
+    linear in the size of the sets, without sorting or pretty printing them whole.
+
+    :param expected: the expected value
+    :param actual: the actual value
+    :return: tuple of the members missing from actual, the unexpected members of
+        actual and the hint, or None if the values are not sets with more than
+        `structural_diff_limit` members
+    """
+    if not (isinstance(expected, SET_TYPES) and isinstance(actual, SET_TYPES)):
+        return None
+    if max(len(expected), len(actual)) <= config.structural_diff_limit:
+        return None
+
+    missing = expected - actual
+    unexpected = actual - expected
+    max_members = config.structural_diff_max_paths
+
+    hint = SET_DIFF_HINT_MSG.format(missing=len(missing), unexpected=len(unexpected))
+    if max(len(missing), len(unexpected)) > max_members:
+        hint += SET_DIFF_TRUNCATED_MSG.format(num=max_members)
+
+    return (
+        format_members(missing, max_members),
+        format_members(unexpected, max_members),
+        hint,
+    )
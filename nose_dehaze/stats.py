@@ -0,0 +1,237 @@
+"""
+opt-in instrumentation of the time and memory dehaze itself spends on failures
+"""
+import json
+from contextlib import contextmanager
+from functools import wraps
+from timeit import default_timer
+from typing import TYPE_CHECKING
+
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    STATS_FAILURE_HEADER,
+    STATS_FAILURE_ROW,
+    STATS_HANDLER_HEADER,
+    STATS_HANDLER_ROW,
+    STATS_MATCHER_MSG,
+    STATS_SUMMARY_MSG,
+    STATS_TOP_N,
+)
+
+try:
+    import tracemalloc
+except ImportError:  # python 2
+    tracemalloc = None  # type: ignore
+
+if TYPE_CHECKING:
+    from typing import Dict, Iterator, List, Optional
+
+
+class MemoryPeak(object):
+    """
+    Measures the peak memory allocated within a `with` block. Allocations are only
+    traced for the duration of the block, which slows it down, so that the rest of
+    the run is not. When tracemalloc is tracing already, its peak is reset instead,
+    which requires python 3.9+.
+    """
+
+    def __init__(self):
+        self.peak = None  # type: Optional[int]
+        self.baseline = None  # type: Optional[int]
+        self.started = False
+
+    def __enter__(self):
+        # type: () -> MemoryPeak
+        if tracemalloc is None:
+            return self
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started = True
+        elif hasattr(tracemalloc, "reset_peak"):
+            tracemalloc.reset_peak()
+        else:
+            return self
+        self.baseline = tracemalloc.get_traced_memory()[0]
+        return self
+
+    def __exit__(self, exc_type, exc_value, trace):
+        if self.baseline is not None:
+            self.peak = tracemalloc.get_traced_memory()[1] - self.baseline
+        if self.started:
+            tracemalloc.stop()
+            self.started = False
+        return False
+
+
+class Stats(object):
+    """
+    Collects the wall time and rendered characters per handler, the input sizes of
+    every SequenceMatcher run and, per failure, the time, rendered characters and tracemalloc peak
+    of rendering it. Nothing is recorded unless `config.stats` is enabled.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    @property
+    def enabled(self):
+        # type: () -> bool
+        return config.stats
+
+    def reset(self):
+        # type: () -> None
+        # handler name -> [calls, seconds, rendered characters]
+        self.handlers = {}  # type: Dict[str, List]
+        self.failures = []  # type: List[dict]
+        self.matcher_calls = 0
+        self.matcher_items = 0
+        self.matcher_max_items = 0
+
+    def add(self, name, seconds, chars=0):
+        # type: (str, float, int) -> None
+        totals = self.handlers.setdefault(name, [0, 0.0, 0])
+        totals[0] += 1
+        totals[1] += seconds
+        totals[2] += chars
+
+    @contextmanager
+    def timed(self, name):
+        # type: (str) -> Iterator[None]
+        """
+        Times the block under `name`.
+        """
+        if not self.enabled:
+            yield
+            return
+
+        start = default_timer()
+        try:
+            yield
+        finally:
+            self.add(name, default_timer() - start)
+
+    def measure(self, name, size=len):
+        """
+        Decorator timing every call of the decorated function under `name`, counting
+        `size(result)` as the characters rendered.
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = default_timer()
+                result = func(*args, **kwargs)
+                elapsed = default_timer() - start
+                self.add(name, elapsed, size(result) if result is not None else 0)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    def add_matcher_input(self, lhs_size, rhs_size):
+        # type: (int, int) -> None
+        if not self.enabled:
+            return
+        size = lhs_size + rhs_size
+        self.matcher_calls += 1
+        self.matcher_items += size
+        self.matcher_max_items = max(self.matcher_max_items, size)
+
+    def merge(self, data):
+        # type: (dict) -> None
+        """
+        Adds up the handler and SequenceMatcher stats of `as_dict`, e.g. as recorded
+        by a worker process.
+        """
+        for name, handler in data["handlers"].items():
+            totals = self.handlers.setdefault(name, [0, 0.0, 0])
+            totals[0] += handler["calls"]
+            totals[1] += handler["time"]
+            totals[2] += handler["chars"]
+        matcher = data["sequence_matcher"]
+        self.matcher_calls += matcher["calls"]
+        self.matcher_items += matcher["items"]
+        self.matcher_max_items = max(self.matcher_max_items, matcher["max_items"])
+
+    def add_failure(self, test_id, assert_method, seconds, chars, peak):
+        # type: (Optional[str], str, float, int, Optional[int]) -> None
+        self.failures.append(
+            {
+                "test": test_id,
+                "assert_method": assert_method,
+                "time": seconds,
+                "chars": chars,
+                "peak_memory": peak,
+            }
+        )
+
+    def slowest_failures(self, num=STATS_TOP_N):
+        # type: (int) -> List[dict]
+        return sorted(self.failures, key=lambda f: f["time"], reverse=True)[:num]
+
+    def as_dict(self):
+        # type: () -> dict
+        return {
+            "handlers": {
+                name: {"calls": calls, "time": seconds, "chars": chars}
+                for name, (calls, seconds, chars) in self.handlers.items()
+            },
+            "failures": self.failures,
+            "sequence_matcher": {
+                "calls": self.matcher_calls,
+                "items": self.matcher_items,
+                "max_items": self.matcher_max_items,
+            },
+        }
+
+    def dump(self, path):
+        # type: (str) -> None
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2, sort_keys=True)
+
+    def summary_lines(self):
+        # type: () -> List[str]
+        lines = [
+            STATS_SUMMARY_MSG.format(
+                num=len(self.failures),
+                time=sum(f["time"] for f in self.failures) * 1000,
+                chars=sum(f["chars"] for f in self.failures),
+            ),
+            STATS_HANDLER_HEADER.format("handler", "calls", "time (ms)", "chars"),
+        ]
+        for name, (calls, seconds, chars) in sorted(
+            self.handlers.items(), key=lambda item: item[1][1], reverse=True
+        ):
+            lines.append(STATS_HANDLER_ROW.format(name, calls, seconds * 1000, chars))
+
+        lines.append(
+            STATS_MATCHER_MSG.format(
+                calls=self.matcher_calls,
+                items=self.matcher_items,
+                max_items=self.matcher_max_items,
+            )
+        )
+
+        slowest = self.slowest_failures()
+        if slowest:
+            lines.append(
+                STATS_FAILURE_HEADER.format(
+                    "slowest failures", "time (ms)", "peak (KiB)"
+                )
+            )
+        for failure in slowest:
+            peak = failure["peak_memory"]
+            lines.append(
+                STATS_FAILURE_ROW.format(
+                    failure["test"] or failure["assert_method"],
+                    failure["time"] * 1000,
+                    "-" if peak is None else peak // 1024,
+                )
+            )
+        return lines
+
+
+stats = Stats()
@@ -0,0 +1,132 @@
+"""
+structural diff utils to compare nested dicts/lists/tuples without pretty printing
+the parts that are equal
+"""
+from typing import TYPE_CHECKING
+
+from nose_dehaze.align import sequence_opcodes
+from nose_dehaze.constants import MISSING_VALUE_REPR
+from nose_dehaze.pretty import bounded_pformat
+
+if TYPE_CHECKING:
+    from typing import Any, Iterator
+
+
+CONTAINER_TYPES = (dict, list, tuple)
+
+
+class Missing(object):
+    """
+    Placeholder for a key or index only present on one side of the comparison.
+    """
+
+    def __repr__(self):
+        return MISSING_VALUE_REPR
+
+
+MISSING = Missing()
+
+
+def is_equal(expected, actual):
+    # type: (Any, Any) -> bool
+    if expected is actual:
+        return True
+    try:
+        return bool(expected == actual)
+    except Exception:
+        # e.g. objects with an ambiguous truth value, treat them as differing leaves
+        return False
+
+
+def exceeds_size(value, limit):
+    # type: (Any, int) -> bool
+    """
+    Counts the nodes of a nested container, stopping as soon as `limit` is exceeded
+    so that the cost is bounded by the limit rather than the size of the value.
+
+    :param value: the (possibly nested) value to measure
+    :param limit: the number of nodes allowed
+    :return: whether the value has more than `limit` nodes
+    """
+    count = 0
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        count += 1
+        if count > limit:
+            return True
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, (list, tuple, set, frozenset)):
+            stack.extend(node)
+    return False
+
+
+def iter_differences(expected, actual, path=""):
+    # type: (Any, Any, str) -> Iterator[tuple]
+    """
+    Walks expected and actual in parallel, skipping equal subtrees, and yields the
+    paths at which they differ.
+
+    :param expected: the expected value
+    :param actual: the actual value
+    :param path: the path of expected/actual from the root of the comparison
+    :return: iterator of (path, expected, actual) tuples, where a side missing the
+        key or index is represented by `MISSING`. Elements of sequences are aligned
+        by `sequence_opcodes`, the path of a changed element is its expected index
+        and the path of an inserted element its actual index
+    """
+    if is_equal(expected, actual):
+        return
+
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        for key, expected_value in expected.items():
+            key_path = "{path}[{key!r}]".format(path=path, key=key)
+            if key not in actual:
+                yield key_path, expected_value, MISSING
+            else:
+                for difference in iter_differences(
+                    expected_value, actual[key], key_path
+                ):
+                    yield difference
+        for key, actual_value in actual.items():
+            if key not in expected:
+                key_path = "{path}[{key!r}]".format(path=path, key=key)
+                yield key_path, MISSING, actual_value
+        return
+
+    if (
+        isinstance(expected, (list, tuple))
+        and isinstance(actual, (list, tuple))
+        and type(expected) is type(actual)
+    ):
+        # aligned by element hash, pairing up the elements of changed hunks
+        for op, i1, i2, j1, j2 in sequence_opcodes(expected, actual):
+            if op == "equal":
+                continue
+            paired = min(i2 - i1, j2 - j1)
+            for k in range(paired):
+                for difference in iter_differences(
+                    expected[i1 + k],
+                    actual[j1 + k],
+                    "{path}[{i}]".format(path=path, i=i1 + k),
+                ):
+                    yield difference
+            for i in range(i1 + paired, i2):
+                yield "{path}[{i}]".format(path=path, i=i), expected[i], MISSING
+            for j in range(j1 + paired, j2):
+                yield "{path}[{j}]".format(path=path, j=j), MISSING, actual[j]
+        return
+
+    yield path, expected, actual
+
+
+def format_difference(path, value):
+    # type: (str, Any) -> str
+    """
+    Renders a single differing value prefixed by its path, indenting any continuation
+    lines so that multi-line values stay aligned under the first line.
+    """
+    prefix = "{path}: ".format(path=path)
+    value_repr = bounded_pformat(value) if value is not MISSING else repr(value)
+    return prefix + value_repr.replace("\n", "\n" + " " * len(prefix))
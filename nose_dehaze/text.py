@@ -0,0 +1,206 @@
+"""
+line then word level diff of long strings, skipping their common head and tail
+"""
+import re
+from typing import TYPE_CHECKING
+
+from six import string_types
+
+from nose_dehaze.align import (
+    anchored_opcodes,
+    common_prefix_length,
+    common_suffix_length,
+)
+from nose_dehaze.config import config
+from nose_dehaze.constants import (
+    CARRIAGE_RETURN_REPR,
+    COLLAPSED_LINES_MSG,
+    TEXT_DIFF_CONTEXT,
+    TRUNCATED_OUTPUT_REPR,
+)
+from nose_dehaze.deadline import SequenceMatcher, deadline
+from nose_dehaze.render import Style
+
+if TYPE_CHECKING:
+    from typing import Any, List, Tuple
+
+
+WORD_RE = re.compile(r"\w+|\s+|[^\w\s]+", re.UNICODE)
+
+
+def collapse_lines(lines, keep_head, keep_tail):
+    # type: (List[str], bool, bool) -> List[list]
+    """
+    Renders unchanged lines, collapsing all but `TEXT_DIFF_CONTEXT` lines next to a
+    change into a single line counting the lines left out.
+
+    :param lines: the unchanged lines
+    :param keep_head: whether the first lines follow a change and are kept
+    :param keep_tail: whether the last lines precede a change and are kept
+    :return: list of lines of (style, text) spans
+    """
+    head = TEXT_DIFF_CONTEXT if keep_head else 0
+    tail = TEXT_DIFF_CONTEXT if keep_tail else 0
+    if len(lines) <= head + tail + 1:
+        return [[(Style.reset, line)] for line in lines]
+
+    collapsed = [[(Style.reset, line)] for line in lines[:head]]
+    collapsed.append(
+        [(Style.diff_intro, COLLAPSED_LINES_MSG.format(num=len(lines) - head - tail))]
+    )
+    collapsed.extend([(Style.reset, line)] for line in lines[len(lines) - tail :])
+    return collapsed
+
+
+def append_span(spans, style, text):
+    # type: (list, str, str) -> None
+    if spans and spans[-1][0] == style:
+        spans[-1] = (style, spans[-1][1] + text)
+    else:
+        spans.append((style, text))
+
+
+def word_diff_spans(lhs_line, rhs_line):
+    # type: (str, str) -> Tuple[list, list]
+    """
+    Compares a changed pair of lines word by word, where whitespace and runs of
+    punctuation count as words of their own. Only the words between the common
+    leading and trailing words are diffed, which keeps huge single line strings,
+    e.g. minified HTML, cheap to compare.
+
+    :return: tuple of the "left" and "right" (style, text) spans of the line
+    """
+    lhs_words = WORD_RE.findall(lhs_line)
+    rhs_words = WORD_RE.findall(rhs_line)
+    prefix = common_prefix_length(lhs_words, rhs_words)
+    suffix = common_suffix_length(
+        lhs_words, rhs_words, min(len(lhs_words), len(rhs_words)) - prefix
+    )
+    lhs_spans = []  # type: list
+    rhs_spans = []  # type: list
+    if prefix:
+        head = "".join(lhs_words[:prefix])
+        append_span(lhs_spans, Style.reset, head)
+        append_span(rhs_spans, Style.reset, head)
+
+    lhs_middle = lhs_words[prefix : len(lhs_words) - suffix]
+    rhs_middle = rhs_words[prefix : len(rhs_words) - suffix]
+    matcher = SequenceMatcher(None, lhs_middle, rhs_middle, autojunk=False)
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        lhs_style, rhs_style = Style.inserted, Style.deleted
+        if op == "equal":
+            lhs_style = rhs_style = Style.reset
+        if i2 > i1:
+            append_span(lhs_spans, lhs_style, "".join(lhs_middle[i1:i2]))
+        if j2 > j1:
+            append_span(rhs_spans, rhs_style, "".join(rhs_middle[j1:j2]))
+
+    if suffix:
+        tail = "".join(lhs_words[len(lhs_words) - suffix :])
+        append_span(lhs_spans, Style.reset, tail)
+        append_span(rhs_spans, Style.reset, tail)
+    return lhs_spans, rhs_spans
+
+
+class TextDiff(object):
+    """
+    Accumulates the rendered lines of both sides, cut off once either side exceeds
+    the configured `max_chars`.
+    """
+
+    def __init__(self):
+        self.lhs_out = []  # type: List[list]
+        self.rhs_out = []  # type: List[list]
+        self.lhs_size = 0
+        self.rhs_size = 0
+        self.truncated = False
+
+    def extend(self, lhs_lines, rhs_lines):
+        # type: (List[list], List[list]) -> bool
+        """
+        :return: whether there is room for more lines
+        """
+        if self.truncated:
+            return False
+        for line in lhs_lines:
+            if self.lhs_size > config.max_chars:
+                break
+            self.lhs_out.append(line)
+            self.lhs_size += sum(len(text) for _, text in line)
+        for line in rhs_lines:
+            if self.rhs_size > config.max_chars:
+                break
+            self.rhs_out.append(line)
+            self.rhs_size += sum(len(text) for _, text in line)
+        if max(self.lhs_size, self.rhs_size) > config.max_chars:
+            self.truncated = True
+            self.lhs_out.append([(Style.reset, TRUNCATED_OUTPUT_REPR)])
+            self.rhs_out.append([(Style.reset, TRUNCATED_OUTPUT_REPR)])
+        return not self.truncated
+
+
+def text_split_diff_spans(lhs_text, rhs_text):
+    # type: (str, str) -> Tuple[List[list], List[list]]
+    """
+    Compares two strings line by line and the changed lines word by word, showing
+    the strings themselves rather than their repr, see `anchored_opcodes`.
+    Unchanged lines are collapsed around the changes.
+
+    :param lhs_text: the "left" string i.e. actual
+    :param rhs_text: the "right" string i.e. expected
+    :return: tuple of the "left" and "right" lists of lines of (style, text) spans
+    """
+    # split on newlines only and escape carriage returns in changed lines, so that
+    # differing line endings remain visible
+    lhs_lines = lhs_text.split("\n")
+    rhs_lines = rhs_text.split("\n")
+
+    diff = TextDiff()
+    for op, i1, i2, j1, j2 in anchored_opcodes(lhs_lines, rhs_lines):
+        deadline.check()
+        if op == "equal":
+            lines = collapse_lines(
+                lhs_lines[i1:i2],
+                i1 > 0 or j1 > 0,
+                i2 < len(lhs_lines) or j2 < len(rhs_lines),
+            )
+            if not diff.extend(lines, lines):
+                break
+            continue
+
+        lhs_hunk = [
+            line.replace("\r", CARRIAGE_RETURN_REPR) for line in lhs_lines[i1:i2]
+        ]
+        rhs_hunk = [
+            line.replace("\r", CARRIAGE_RETURN_REPR) for line in rhs_lines[j1:j2]
+        ]
+        lhs_diff = []  # type: List[list]
+        rhs_diff = []  # type: List[list]
+        if op == "replace":
+            for lhs_line, rhs_line in zip(lhs_hunk, rhs_hunk):
+                deadline.check()
+                lhs_spans, rhs_spans = word_diff_spans(lhs_line, rhs_line)
+                lhs_diff.append(lhs_spans)
+                rhs_diff.append(rhs_spans)
+            paired = min(len(lhs_hunk), len(rhs_hunk))
+            lhs_hunk = lhs_hunk[paired:]
+            rhs_hunk = rhs_hunk[paired:]
+        lhs_diff.extend([(Style.inserted, line)] for line in lhs_hunk)
+        rhs_diff.extend([(Style.deleted, line)] for line in rhs_hunk)
+        if not diff.extend(lhs_diff, rhs_diff):
+            break
+
+    return diff.lhs_out, diff.rhs_out
+
+
+def is_long_text(expected, actual):
+    # type: (Any, Any) -> bool
+    """
+    :return: whether expected and actual are strings of the same type, long enough
+        to skip the character level diff of their reprs
+    """
+    return (
+        type(expected) is type(actual)
+        and isinstance(expected, string_types)
+        and len(expected) + len(actual) > config.char_diff_limit
+    )
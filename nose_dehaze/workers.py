@@ -0,0 +1,85 @@
+"""
+process pool rendering dehazed failures in parallel with the test run
+"""
+import logging
+import pickle
+from typing import TYPE_CHECKING
+
+from nose_dehaze.config import config
+from nose_dehaze.report import dehaze_with_record
+from nose_dehaze.stats import stats
+
+try:
+    from concurrent.futures import ProcessPoolExecutor
+except ImportError:  # python 2 without the futures backport
+    ProcessPoolExecutor = None  # type: ignore
+
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+    from typing import Optional, Tuple
+
+log = logging.getLogger(__name__)
+
+
+def dehaze_pickled(payload):
+    # type: (bytes) -> Tuple[Optional[str], Optional[dict], Optional[dict]]
+    """
+    Worker entry point, applies the main process' config before dehazing since the
+    worker processes only ever see the config defaults otherwise.
+
+    :return: tuple of the dehazed output, report record, see
+        `nose_dehaze.report.dehaze_with_record`, and the stats recorded while
+        dehazing, for the main process to merge, or None when stats are disabled
+    """
+    settings, assert_method, frame_locals = pickle.loads(payload)
+    config.__dict__.update(settings)
+    # workers are reused across failures, only this failure's stats are returned
+    stats.reset()
+    output, record = dehaze_with_record(assert_method, frame_locals)
+    return output, record, stats.as_dict() if stats.enabled else None
+
+
+class WorkerPool(object):
+    """
+    Lazily started process pool shipping the diff work of failures with picklable
+    frame locals, e.g. plain expected/actual data, to worker processes. Failures
+    referencing unpicklable values, such as Mock instances, are left to be rendered
+    in process.
+    """
+
+    def __init__(self, workers):
+        # type: (int) -> None
+        self.workers = workers
+        self.executor = None  # type: Optional[ProcessPoolExecutor]
+
+    @classmethod
+    def create(cls, workers):
+        # type: (int) -> Optional[WorkerPool]
+        if workers <= 0:
+            return None
+        if ProcessPoolExecutor is None:
+            log.warning(
+                "--dehaze-workers requires concurrent.futures, rendering in process"
+            )
+            return None
+        return cls(workers)
+
+    def submit(self, assert_method, frame_locals):
+        # type: (str, dict) -> Optional[Future]
+        try:
+            payload = pickle.dumps(
+                (dict(vars(config)), assert_method, frame_locals),
+                pickle.HIGHEST_PROTOCOL,
+            )
+        except Exception:
+            return None
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self.executor.submit(dehaze_pickled, payload)
+
+    def shutdown(self):
+        # type: () -> None
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
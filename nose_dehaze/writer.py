@@ -0,0 +1,62 @@
+"""
+output writers collecting styled spans of text, rendered once instead of
+concatenated
+"""
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from typing import Iterable, List, Optional, Tuple
+
+    Span = Tuple[Optional[str], str]
+
+
+class Writer(object):
+    """
+    Sink of (style, text) spans, see `nose_dehaze.render.Style`. Spans are only
+    joined when rendered, so that building the output is linear in its size rather
+    than quadratic as with `+=`, and the same spans render to any output format.
+    """
+
+    def __init__(self):
+        self.spans = []  # type: List[Span]
+
+    def write(self, text, style=None):
+        # type: (str, Optional[str]) -> None
+        self.spans.append((style, text))
+
+    def write_joined(self, separator, lines):
+        # type: (str, Iterable[Iterable[Span]]) -> None
+        """
+        Writes the lines of spans with the unstyled `separator` in between, like
+        `separator.join` without building the intermediate string.
+        """
+        for i, spans in enumerate(lines):
+            if i:
+                self.spans.append((None, separator))
+            self.spans.extend(spans)
+
+
+class LineWriter(Writer):
+    """
+    Writer collecting its output as a list of lines of spans, ending the current line
+    on `newline` instead of writing newline characters to split again afterwards.
+    """
+
+    def __init__(self):
+        super(LineWriter, self).__init__()
+        self.lines = []  # type: List[List[Span]]
+
+    def newline(self):
+        # type: () -> None
+        self.lines.append(self.spans)
+        self.spans = []
+
+    def getlines(self):
+        # type: () -> List[List[Span]]
+        """
+        :return: the written lines, like `str.splitlines` of the written output
+            without a trailing empty line
+        """
+        if self.spans:
+            return self.lines + [self.spans]
+        return list(self.lines)
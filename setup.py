@@ -30,7 +30,6 @@ setup(
     install_requires=[
         'nose',
         'six',
-        'termcolor',
     ],
     python_requires=">=2.7, !=3.0.*, !=3.1.*, !=3.2.*, !=3.3.*, != 3.4.*, !=3.5.*",
 )
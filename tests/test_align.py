@@ -0,0 +1,113 @@
+from unittest import TestCase
+
+from nose_dehaze.align import (
+    anchored_opcodes,
+    common_prefix_length,
+    common_suffix_length,
+    element_key,
+    sequence_opcodes,
+    unique_anchors,
+)
+from nose_dehaze.deadline import SequenceMatcher
+
+
+class CommonAffixLengthTest(TestCase):
+    def test_common_prefix_length(self):
+        self.assertEqual(common_prefix_length(["a", "b", "c"], ["a", "b", "d"]), 2)
+        self.assertEqual(common_prefix_length("x" * 1000 + "a", "x" * 1000 + "b"), 1000)
+        self.assertEqual(common_prefix_length("abc", "abc"), 3)
+        self.assertEqual(common_prefix_length("", "abc"), 0)
+
+    def test_common_suffix_length(self):
+        self.assertEqual(
+            common_suffix_length("a" + "x" * 1000, "b" + "x" * 1000, 1001), 1000
+        )
+        self.assertEqual(common_suffix_length(["c", "a"], ["b", "c", "a"], 2), 2)
+
+    def test_common_suffix_length_bounded_by_limit(self):
+        self.assertEqual(common_suffix_length("aaa", "aa", 0), 0)
+        self.assertEqual(common_suffix_length("aaa", "aa", 1), 1)
+
+
+class UniqueAnchorsTest(TestCase):
+    def test_only_items_unique_on_both_sides(self):
+        lhs = ["}", "a", "}", "b", "c"]
+        rhs = ["}", "a", "}", "c", "d"]
+
+        self.assertEqual(unique_anchors(lhs, rhs), [(1, 1), (4, 3)])
+
+    def test_longest_run_in_the_same_order(self):
+        lhs = ["a", "b", "c", "d"]
+        rhs = ["d", "a", "b", "c"]
+
+        self.assertEqual(unique_anchors(lhs, rhs), [(0, 1), (1, 2), (2, 3)])
+
+
+class AnchoredOpcodesTest(TestCase):
+    def test_anchored_opcodes(self):
+        lhs = ["head", "x", "}", "same", "}", "y", "tail"]
+        rhs = ["head", "}", "same", "}", "z", "tail"]
+
+        self.assertEqual(
+            anchored_opcodes(lhs, rhs),
+            [
+                ("equal", 0, 1, 0, 1),
+                ("delete", 1, 2, 1, 1),
+                ("equal", 2, 5, 1, 4),
+                ("replace", 5, 6, 4, 5),
+                ("equal", 6, 7, 5, 6),
+            ],
+        )
+
+    def test_same_changes_as_sequence_matcher(self):
+        lhs = ["line %d" % i for i in range(50)]
+        rhs = list(lhs)
+        rhs[10] = "changed"
+        del rhs[30]
+        rhs.insert(40, "inserted")
+
+        self.assertEqual(
+            anchored_opcodes(lhs, rhs), SequenceMatcher(None, lhs, rhs).get_opcodes()
+        )
+
+    def test_repetitive_lines_are_not_junked(self):
+        lhs = ["}"] * 300
+        rhs = list(lhs)
+        rhs[100] = "x"
+
+        self.assertEqual(
+            anchored_opcodes(lhs, rhs),
+            [
+                ("equal", 0, 100, 0, 100),
+                ("replace", 100, 101, 100, 101),
+                ("equal", 101, 300, 101, 300),
+            ],
+        )
+
+    def test_identical(self):
+        self.assertEqual(
+            anchored_opcodes(["a", "b"], ["a", "b"]), [("equal", 0, 2, 0, 2)]
+        )
+        self.assertEqual(anchored_opcodes([], []), [])
+
+
+class SequenceOpcodesTest(TestCase):
+    def test_unhashable_elements_are_keyed_by_repr(self):
+        self.assertEqual(element_key([1, 2]), element_key([1, 2]))
+        self.assertNotEqual(element_key([1, 2]), element_key([1, 3]))
+        self.assertNotEqual(element_key([1]), element_key("[1]"))
+        self.assertEqual(element_key((1, "a")), (1, "a"))
+
+    def test_insertion_does_not_shift_following_elements(self):
+        expected = [{"id": i} for i in range(5)]
+        actual = [{"id": -1}] + expected[:3] + [{"id": 3, "x": 1}] + expected[4:]
+
+        self.assertEqual(
+            sequence_opcodes(expected, actual),
+            [
+                ("insert", 0, 0, 0, 1),
+                ("equal", 0, 3, 1, 4),
+                ("replace", 3, 4, 4, 5),
+                ("equal", 4, 5, 5, 6),
+            ],
+        )
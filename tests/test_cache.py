@@ -0,0 +1,111 @@
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+from nose_dehaze.cache import DiffCache, DiskCache, make_key
+from nose_dehaze.config import config
+
+
+class MakeKeyTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_same_parts_hash_the_same(self):
+        self.assertEqual(make_key("a", "bc"), make_key("a", "bc"))
+
+    def test_parts_are_length_prefixed(self):
+        self.assertNotEqual(make_key("a", "bc"), make_key("ab", "c"))
+
+    def test_key_depends_on_config(self):
+        key = make_key("a", "b")
+        config.char_diff_limit = 1
+
+        self.assertNotEqual(key, make_key("a", "b"))
+
+
+class DiffCacheTest(TestCase):
+    def setUp(self):
+        self.cache = DiffCache()
+
+    def tearDown(self):
+        config.reset()
+
+    def test_counts_hits_and_misses(self):
+        self.assertIsNone(self.cache.get("key"))
+        self.cache.set("key", "value", 5)
+
+        self.assertEqual("value", self.cache.get("key"))
+        self.assertEqual((1, 1), (self.cache.hits, self.cache.misses))
+
+    def test_evicts_least_recently_used_over_cache_size(self):
+        config.cache_size = 10
+        self.cache.set("a", "a", 4)
+        self.cache.set("b", "b", 4)
+        self.cache.get("a")
+
+        self.cache.set("c", "c", 4)
+
+        self.assertEqual(["a", "c"], list(self.cache.entries))
+        self.assertEqual(8, self.cache.size)
+
+    def test_values_larger_than_cache_size_are_not_cached(self):
+        config.cache_size = 10
+
+        self.cache.set("a", "a", 11)
+
+        self.assertEqual(0, self.cache.size)
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_disabled_with_zero_cache_size(self):
+        config.cache_size = 0
+        self.assertFalse(self.cache.enabled)
+
+
+class DiskCacheTest(TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        config.cache_dir = os.path.join(self.cache_dir, "nested")
+        self.cache = DiskCache()
+
+    def tearDown(self):
+        self.cache.close()
+        shutil.rmtree(self.cache_dir)
+        config.reset()
+
+    def test_disabled_without_cache_dir(self):
+        config.cache_dir = None
+        self.assertFalse(self.cache.enabled)
+
+    def test_persists_between_instances(self):
+        key = self.cache.make_key("assertEqual", "1", "2", "")
+        self.assertIsNone(self.cache.get(key))
+        self.cache.set(key, "rendered")
+
+        other = DiskCache()
+        try:
+            self.assertEqual("rendered", other.get(key))
+        finally:
+            other.close()
+        self.assertEqual((0, 1), (self.cache.hits, self.cache.misses))
+        self.assertEqual((1, 0), (other.hits, other.misses))
+
+    def test_evicts_least_recently_used_over_disk_cache_size(self):
+        config.disk_cache_size = 10
+        self.cache.set("a", "aaaa")
+        self.cache.set("b", "bbbb")
+        self.cache.get("a")
+
+        self.cache.set("c", "cccc")
+
+        self.assertEqual("aaaa", self.cache.get("a"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual("cccc", self.cache.get("c"))
+
+    def test_errors_are_cache_misses(self):
+        config.cache_dir = os.path.join(self.cache_dir, "file")
+        open(config.cache_dir, "w").close()
+
+        self.cache.set("a", "aaaa")
+
+        self.assertIsNone(self.cache.get("a"))
@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+try:
+    from unittest.mock import call, patch
+except ImportError:
+    from mock import call, patch
+
+from nose_dehaze.calls import (
+    CallIndex,
+    align_calls,
+    call_similarity,
+    nearest_calls,
+    split_call,
+)
+
+
+class SplitCallTest(TestCase):
+    def test_splits_call_args_list_entries_and_built_calls(self):
+        self.assertEqual(((1, 2), {"a": 3}), split_call(call(1, 2, a=3)))
+        self.assertEqual(((1,), {}), split_call(((1,), {})))
+
+
+class CallSimilarityTest(TestCase):
+    def test_counts_equal_args_and_penalizes_missing_ones(self):
+        self.assertEqual(2, call_similarity((1, 2), {}, (1, 2), {}))
+        self.assertEqual(2, call_similarity((1, 2), {"a": 1}, (1, 3), {"a": 1}))
+        self.assertEqual(-3, call_similarity((1,), {"a": 1}, (2, 3), {"b": 1}))
+
+
+class CallIndexTest(TestCase):
+    def test_only_indexes_values_of_expected_calls(self):
+        calls = [call(1, 2), call(1, a=2), call(1, a=[3]), call(4, 2, 3)]
+        index = CallIndex(calls, [call(1, a=2), call(9)])
+
+        self.assertEqual({(0, 1): [0, 1, 2], ("a", 2): [1]}, index.features)
+
+    def test_only_scores_calls_sharing_values(self):
+        calls = [call(1, 2), call(1, a=2), call(1, a=3), call(1, 2, 3)]
+        index = CallIndex(calls, [call(1, a=2)])
+
+        self.assertEqual([1, 0, 2, 3], index.candidates((1,), {"a": 2}, 2, set()))
+        self.assertEqual([1, 2], index.nearest(call(1, a=2), 2))
+
+    def test_tops_up_with_same_shaped_calls_then_all_calls(self):
+        calls = [call(1, 2), call(1, a=2), call(5, 6, 7), call(8, 9)]
+        index = CallIndex(calls, [call(1, 5)])
+
+        self.assertEqual([0, 1, 3], index.candidates((1, 5), {}, 3, set()))
+        self.assertEqual([0, 3, 1], index.nearest(call(1, 5), 3))
+
+    def test_scores_more_calls_against_unhashable_values(self):
+        calls = [call([i]) for i in range(10)]
+        index = CallIndex(calls, [call([7])])
+
+        self.assertEqual([7], index.nearest(call([7]), 1))
+
+    @patch("nose_dehaze.calls.CALL_DIFF_MAX_SCORED", 2)
+    def test_values_held_by_most_calls_are_not_counted(self):
+        calls = [call(i, key="same") for i in range(5)]
+        index = CallIndex(calls, [call(3, key="same"), call(9, key="same")])
+
+        self.assertEqual([3], index.candidates((3,), {"key": "same"}, 1, set()))
+        # calls holding the common value still come before unrelated calls
+        self.assertEqual([0, 1], index.candidates((9,), {"key": "same"}, 2, set()))
+        self.assertEqual([3, 0], index.nearest(call(3, key="same"), 2))
+
+    def test_excluded_calls_are_skipped(self):
+        index = CallIndex([call(1), call(1), call(2)], [call(1)])
+
+        self.assertEqual([1, 2], index.nearest(call(1), 2, {0}))
+
+
+class NearestCallsTest(TestCase):
+    def test_returns_closest_calls_first(self):
+        calls = [call(i, kw=i % 3) for i in range(100)]
+
+        self.assertEqual([50, 2], nearest_calls(call(50, kw=2), calls, 2))
+
+
+class AlignCallsTest(TestCase):
+    def test_aligns_each_expected_call_with_an_unused_actual_call(self):
+        actual_calls = [call(1), call(2), call(3)]
+
+        result = align_calls([call(2), call(2), call(9), call(9)], actual_calls)
+
+        self.assertEqual([1, 0, 2, None], result)
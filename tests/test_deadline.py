@@ -0,0 +1,103 @@
+from unittest import TestCase
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from nose_dehaze.config import config
+from nose_dehaze.deadline import (
+    Deadline,
+    DeadlineExceeded,
+    SequenceMatcher,
+    deadline,
+)
+from nose_dehaze.diff import ASSERT_METHOD_TO_DIFF_FUNC, dehaze
+
+
+class DeadlineTest(TestCase):
+    def setUp(self):
+        self.p_default_timer = patch("nose_dehaze.deadline.default_timer")
+        self.m_default_timer = self.p_default_timer.start()
+        self.m_default_timer.return_value = 100.0
+        self.deadline = Deadline()
+
+    def tearDown(self):
+        self.p_default_timer.stop()
+
+    def test_check_without_limit(self):
+        self.m_default_timer.return_value = 1e9
+        self.deadline.check()
+
+    def test_check_within_limit(self):
+        with self.deadline.limit(500):
+            self.m_default_timer.return_value = 100.5
+            self.deadline.check()
+
+    def test_check_exceeded(self):
+        with self.deadline.limit(500):
+            self.m_default_timer.return_value = 100.6
+            with self.assertRaises(DeadlineExceeded):
+                self.deadline.check()
+        self.assertIsNone(self.deadline.expires)
+
+    def test_zero_timeout_is_no_limit(self):
+        with self.deadline.limit(0):
+            self.assertIsNone(self.deadline.expires)
+
+    def test_nested_limit_keeps_outer_deadline(self):
+        with self.deadline.limit(500):
+            with self.deadline.limit(10000):
+                self.assertEqual(self.deadline.expires, 100.5)
+            self.assertEqual(self.deadline.expires, 100.5)
+
+
+class SequenceMatcherTest(TestCase):
+    def test_checks_deadline(self):
+        with patch.object(deadline, "check") as m_check:
+            opcodes = SequenceMatcher(None, "abcd", "abxd").get_opcodes()
+
+        self.assertEqual(
+            opcodes,
+            [("equal", 0, 2, 0, 2), ("replace", 2, 3, 2, 3), ("equal", 3, 4, 3, 4)],
+        )
+        self.assertTrue(m_check.called)
+
+    def test_deadline_exceeded(self):
+        with patch.object(deadline, "check", side_effect=DeadlineExceeded):
+            with self.assertRaises(DeadlineExceeded):
+                SequenceMatcher(None, "abcd", "abxd").get_opcodes()
+
+
+class DehazeTimeoutTest(TestCase):
+    def setUp(self):
+        config.color = False
+        config.timeout_ms = 1000
+
+    def tearDown(self):
+        config.reset()
+
+    @patch("nose_dehaze.diff.split_diff_spans", side_effect=DeadlineExceeded)
+    def test_falls_back_to_undiffed_values(self, m_split_diff_spans):
+        output = dehaze("assertEqual", {"first": "x" * 3000, "second": "y"})
+
+        self.assertEqual(
+            output,
+            "\n\nExpected: '{x}...<truncated>\n  Actual: 'y'".format(x="x" * 1999)
+            + "\n\n    hint: diff exceeded the 1000 ms time budget, showing values "
+            "undiffed",
+        )
+
+    def test_falls_back_to_exception_without_values(self):
+        m_diff_func = Mock(side_effect=DeadlineExceeded)
+        with patch.dict(ASSERT_METHOD_TO_DIFF_FUNC, {"assertEqual": m_diff_func}):
+            self.assertIsNone(dehaze("assertEqual", {"first": 1, "second": 2}))
+
+    @patch("nose_dehaze.diff.split_diff_spans", side_effect=DeadlineExceeded)
+    @patch("nose_dehaze.diff.disk_cache")
+    def test_fallback_not_cached(self, m_disk_cache, m_split_diff_spans):
+        m_disk_cache.get.return_value = None
+
+        dehaze("assertEqual", {"first": 1, "second": 2})
+
+        m_disk_cache.set.assert_not_called()
@@ -0,0 +1,85 @@
+from unittest import TestCase
+
+from nose_dehaze.config import config
+from nose_dehaze.dicts import build_dict_diff, context_windows
+
+
+class ContextWindowsTest(TestCase):
+    def test_merges_overlapping_windows(self):
+        self.assertEqual(context_windows([2, 4, 20], 2, 22), [(0, 7), (18, 22)])
+
+    def test_no_context(self):
+        self.assertEqual(context_windows([0, 1, 5], 0, 6), [(0, 2), (5, 6)])
+
+
+class BuildDictDiffTest(TestCase):
+    def setUp(self):
+        config.structural_diff_limit = 5
+        config.dict_diff_context = 1
+
+    def tearDown(self):
+        config.reset()
+
+    def test_small_dicts_are_not_handled(self):
+        self.assertIsNone(build_dict_diff({"a": 1}, {"a": 2}))
+
+    def test_different_types_are_not_handled(self):
+        self.assertIsNone(build_dict_diff({}, []))
+
+    def test_partitions_keys(self):
+        expected = {"k{}".format(i): i for i in range(10)}
+        actual = dict(expected, k3=-3, extra=1)
+        del actual["k7"]
+
+        result = build_dict_diff(expected, actual)
+
+        self.assertEqual(
+            result,
+            (
+                "... 2 equal keys ...\n"
+                "['k2']: 2\n['k3']: 3\n['k4']: 4\n"
+                "... 1 equal keys ...\n"
+                "['k6']: 6\n['k7']: 7\n['k8']: 8\n"
+                "... 1 equal keys ...\n"
+                "['extra']: <missing>",
+                "... 2 equal keys ...\n"
+                "['k2']: 2\n['k3']: -3\n['k4']: 4\n"
+                "... 1 equal keys ...\n"
+                "['k6']: 6\n['k7']: <missing>\n['k8']: 8\n"
+                "... 1 equal keys ...\n"
+                "['extra']: 1",
+                "1 missing keys, 1 unexpected keys, 1 changed values",
+            ),
+        )
+
+    def test_recurses_into_changed_values_only(self):
+        expected = {"a": {"x": 1, "y": [1, 2]}, "b": list(range(10))}
+        actual = {"a": {"x": 1, "y": [1, 3]}, "b": list(range(10))}
+        config.dict_diff_context = 0
+
+        result = build_dict_diff(expected, actual)
+
+        self.assertEqual(
+            result,
+            (
+                "['a']['y'][1]: 2\n... 1 equal keys ...",
+                "['a']['y'][1]: 3\n... 1 equal keys ...",
+                "0 missing keys, 0 unexpected keys, 1 changed values",
+            ),
+        )
+
+    def test_stops_after_max_paths(self):
+        config.structural_diff_max_paths = 2
+        config.dict_diff_context = 0
+        expected = {i: i for i in range(10)}
+        actual = {i: -i for i in range(10)}
+
+        expected_str, actual_str, hint = build_dict_diff(expected, actual)
+
+        self.assertEqual(expected_str, "... 1 equal keys ...\n[1]: 1\n[2]: 2")
+        self.assertEqual(actual_str, "... 1 equal keys ...\n[1]: -1\n[2]: -2")
+        self.assertEqual(
+            hint,
+            "0 missing keys, 0 unexpected keys, 9 changed values, "
+            "showing the first 2 differing paths",
+        )
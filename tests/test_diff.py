@@ -1,3 +1,5 @@
+import json
+from pprint import pformat
 from unittest import TestCase
 
 from six import PY2
@@ -7,6 +9,8 @@ try:
 except ImportError:
     from mock import Mock, call, patch
 
+from nose_dehaze.cache import diff_cache
+from nose_dehaze.config import config
 from nose_dehaze.diff import (
     assert_bool_diff,
     assert_call_count_diff,
@@ -15,10 +19,13 @@ from nose_dehaze.diff import (
     assert_is_instance_diff,
     assert_is_none_diff,
     build_call_args_diff_output,
+    build_split_diff,
     dehaze,
     get_assert_equal_diff,
     get_mock_assert_diff,
+    split_diff_spans,
 )
+from nose_dehaze.render import Style
 
 
 class AssertBoolDiffTest(TestCase):
@@ -61,6 +68,21 @@ class AssertBoolDiffTest(TestCase):
         hint = "\x1b[1m\x1b[31m''\x1b[0m is \x1b[1m\x1b[31mfalsy\x1b[0m"
         self.assertEqual((expected, actual, hint), result)
 
+    def test_actual_is_large_truthy_container_returns_with_summary_hint(self):
+        frame_locals = {
+            "expr": list(range(1000)),
+            "msg": None,
+            "self": Mock(),  # unittest.TestCase instance
+        }
+        result = assert_bool_diff("assertFalse", frame_locals)
+
+        expected = "False"
+        hint = (
+            "\x1b[1m\x1b[31mlist of len 1000: [0, 1, 2, ...<997 more items>]\x1b[0m"
+            " is \x1b[1m\x1b[31mtruthy\x1b[0m"
+        )
+        self.assertEqual((expected, pformat(list(range(1000))), hint), result)
+
 
 class AssertIsNoneDiffTest(TestCase):
     def test_is_none_returns_expected_is_and_actual_is_not(self):
@@ -93,6 +115,18 @@ class AssertIsNoneDiffTest(TestCase):
 
 
 class AssertIsInstanceDiffTest(TestCase):
+    def test_large_instance_is_summarized_in_hint(self):
+        frame_locals = {"cls": dict, "obj": list(range(100000))}
+
+        result = assert_is_instance_diff("assertIsInstance", frame_locals)
+
+        self.assertEqual(
+            "\x1b[1m\x1b[33mlist of len 100000: [0, 1, 2, ...<99997 more items>]"
+            "\x1b[0m \x1b[1m\x1b[31mis not\x1b[0m an instance of "
+            "\x1b[1m\x1b[33m{0}\x1b[0m.".format(str(dict)),
+            result[2],
+        )
+
     def test_single_expected_instance(self):
         frame_locals = {
             "cls": dict,
@@ -110,7 +144,7 @@ class AssertIsInstanceDiffTest(TestCase):
             else "({0},\n {1})".format(str(str), str(object))
         )
         hint = (
-            "\x1b[1m\x1b[33mhello\x1b[0m "
+            "\x1b[1m\x1b[33m'hello'\x1b[0m "
             "\x1b[1m\x1b[31mis not\x1b[0m "
             "an instance of "
             "\x1b[1m\x1b[33m{instance}\x1b[0m."
@@ -285,6 +319,20 @@ class AssertCalledWithDiffTest(TestCase):
         hint = "\x1b[1m\x1b[33mmockname\x1b[0m not called."
         self.assertEqual((expected, actual, hint), result)
 
+    def test_values_containing_call_are_not_renamed(self):
+        mock_instance = Mock(name=self.mock_name)
+        mock_instance("recall")
+
+        frame_locals = {
+            "args": ("recall2",),  # expected args
+            "kwargs": {},  # expected kwargs
+            "self": mock_instance,
+        }
+        result = assert_called_with_diff(
+            self.assert_method, mock_instance, self.mock_name, frame_locals
+        )
+        self.assertEqual(("mockname('recall2')", "[mockname('recall')]", None), result)
+
     def test_single_actual_call_but_expected_args_and_kwargs_mismatch(self):
         mock_instance = Mock(name=self.mock_name)
         mock_instance("1", 2, kw_a="a", kw_b="b")
@@ -359,6 +407,27 @@ class AssertCalledWithDiffTest(TestCase):
         actual = "[mockname('1', 2, kw_a='a', kw_b='b')]"
         self.assertEqual((expected, actual, None), result)
 
+    def test_many_actual_calls_shows_only_closest_calls(self):
+        mock_instance = Mock(name=self.mock_name)
+        for i in range(10):
+            mock_instance(i, kw_a="a")
+        mock_instance(4, kw_a="b")
+        frame_locals = {
+            "args": (4,),  # expected args
+            "kwargs": {"kw_a": "expected"},  # expected kwargs
+            "self": mock_instance,
+        }
+        config.call_diff_candidates = 2
+        self.addCleanup(config.reset)
+
+        result = assert_called_with_diff(
+            self.assert_method, mock_instance, self.mock_name, frame_locals
+        )
+        expected = "mockname(4, kw_a='expected')"
+        actual = "[mockname(4, kw_a='a'),\n mockname(4, kw_a='b')]"
+        hint = "showing the 2 closest of 11 calls, at indices 4, 10"
+        self.assertEqual((expected, actual, hint), result)
+
 
 class AssertHasCallsDiffTest(TestCase):
     @classmethod
@@ -412,6 +481,33 @@ class AssertHasCallsDiffTest(TestCase):
         hint = None
         self.assertEqual((expected, actual, hint), result)
 
+    def test_many_actual_calls_aligns_each_expected_call_with_its_closest_call(self):
+        mock_instance = Mock(name=self.mock_name)
+        for i in range(4):
+            mock_instance(i, i)
+        mock_instance(1, 5)
+        frame_locals = {
+            "expected": [call(1, 5), call(3, 4), call(7, 7)],  # expected calls
+            "self": mock_instance,
+        }
+        config.call_diff_candidates = 3
+        self.addCleanup(config.reset)
+
+        result = assert_has_calls_diff(
+            self.assert_method, mock_instance, self.mock_name, frame_locals
+        )
+
+        expected = "[multi_call(1, 5),\n multi_call(3, 4),\n multi_call(7, 7)]"
+        actual = "[multi_call(1, 5),\n multi_call(3, 3),\n multi_call(0, 0)]"
+        hint = (
+            "expected and actual call counts differ\n\n"
+            "          \x1b[1m\x1b[33mExpected: \x1b[0mMock \x1b[1m\x1b[33mmulti_call\x1b[0m called \x1b[1m\x1b[31m3\x1b[0m times.\n"  # noqa: E501
+            "            \x1b[1m\x1b[33mActual: \x1b[0mMock \x1b[1m\x1b[33mmulti_call\x1b[0m called \x1b[1m\x1b[32m5\x1b[0m times.\n"  # noqa: E501
+            "          each expected call is shown against its closest of 5 calls, "
+            "at indices [4, 3, 0]"
+        )
+        self.assertEqual((expected, actual, hint), result)
+
 
 class GetAssertEqualDiffTest(TestCase):
     def test_same_types_returns_formatted_expected_and_actual_with_no_hint(self):
@@ -638,6 +734,28 @@ class GetAssertEqualDiffTest(TestCase):
             result,
         )
 
+    def test_large_containers_render_only_differing_paths(self):
+        expected = {"items": [{"price": i} for i in range(100)]}
+        actual = {"items": [{"price": i} for i in range(100)]}
+        actual["items"][42]["price"] = 0
+        frame_locals = {
+            "first": expected,
+            "msg": None,
+            "second": actual,
+            "self": Mock(),  # TestCase class of current test method
+        }
+
+        result = get_assert_equal_diff("assertEqual", frame_locals)
+
+        self.assertEqual(
+            (
+                "['items'][42]['price']: 42",
+                "['items'][42]['price']: 0",
+                "0 missing keys, 0 unexpected keys, 1 changed values",
+            ),
+            result,
+        )
+
 
 class GetMockAssertDiffTest(TestCase):
     def test_assert_called_once_returns_call_count_diff(self):
@@ -725,6 +843,78 @@ class GetMockAssertDiffTest(TestCase):
         self.assertEqual((expected, actual, hint), result)
 
 
+class BuildSplitDiffTest(TestCase):
+    def tearDown(self):
+        config.reset()
+        diff_cache.clear()
+
+    def test_under_char_diff_limit_diffs_characters(self):
+        result = build_split_diff("hello world", "hello")
+
+        expected = (
+            ["\x1b[0mhello\x1b[1m\x1b[32m world\x1b[0m"],
+            ["\x1b[0mhello"],
+        )
+        self.assertEqual(expected, result)
+
+    def test_over_char_diff_limit_diffs_lines_then_characters_within_hunks(self):
+        config.char_diff_limit = 0
+
+        result = build_split_diff("x\nab\ny\nz", "x\nac\ny")
+
+        expected = (
+            [
+                "\x1b[0mx",
+                "\x1b[0ma\x1b[1m\x1b[32mb\x1b[0m",
+                "\x1b[0my",
+                "\x1b[1m\x1b[32mz\x1b[0m",
+            ],
+            [
+                "\x1b[0mx",
+                "\x1b[0ma\x1b[1m\x1b[31mc\x1b[0m",
+                "\x1b[0my",
+            ],
+        )
+        self.assertEqual(expected, result)
+
+    def test_newlines_between_changed_lines_are_kept(self):
+        result = build_split_diff("a\nb", "0\n1")
+
+        expected = (
+            ["\x1b[1m\x1b[32ma\x1b[0m", "\x1b[1m\x1b[32mb\x1b[0m"],
+            ["\x1b[1m\x1b[31m0\x1b[0m", "\x1b[1m\x1b[31m1\x1b[0m"],
+        )
+        self.assertEqual(expected, result)
+
+    @patch("nose_dehaze.diff.char_split_diff_spans")
+    def test_identical_reprs_are_diffed_once(self, m_char_split_diff_spans):
+        m_char_split_diff_spans.return_value = (
+            [[(Style.reset, "lhs")]],
+            [[(Style.reset, "rhs")]],
+        )
+
+        first = build_split_diff("cached lhs", "cached rhs")
+        second = build_split_diff("cached lhs", "cached rhs")
+        spans = split_diff_spans("cached lhs", "cached rhs")
+
+        self.assertEqual((["\x1b[0mlhs"], ["\x1b[0mrhs"]), first)
+        self.assertEqual(first, second)
+        self.assertEqual(m_char_split_diff_spans.return_value, spans)
+        m_char_split_diff_spans.assert_called_once_with("cached lhs", "cached rhs")
+
+    def test_over_hunk_diff_limit_highlights_whole_hunk(self):
+        config.char_diff_limit = 0
+        config.hunk_diff_limit = 0
+
+        result = build_split_diff("x\nab\ny", "x\nac\ny")
+
+        expected = (
+            ["\x1b[0mx", "\x1b[1m\x1b[32mab\x1b[0m", "\x1b[0my"],
+            ["\x1b[0mx", "\x1b[1m\x1b[31mac\x1b[0m", "\x1b[0my"],
+        )
+        self.assertEqual(expected, result)
+
+
 class BuildCallArgsDiffOutputTest(TestCase):
     def setUp(self):
         pass
@@ -865,6 +1055,61 @@ class DehazeTest(TestCase):
         )
         self.assertEqual(expected, result)
 
+    def test_plain_format_renders_without_escape_sequences(self):
+        self.m_get_assert_equal_diff.return_value = ("hello", "hello world", "hint")
+        config.format = "plain"
+        self.addCleanup(config.reset)
+
+        result = dehaze("assertEqual", {})
+
+        expected = "\n\nExpected: hello\n  Actual: hello world\n\n    hint: hint"
+        self.assertEqual(expected, result)
+
+    def test_html_format_renders_spans(self):
+        self.m_get_assert_equal_diff.return_value = ("<a>", "<b>", None)
+        config.format = "html"
+        self.addCleanup(config.reset)
+
+        result = dehaze("assertEqual", {})
+
+        expected = (
+            '<pre class="dehaze">\n\n'
+            '<span class="dehaze-diff_intro">Expected:</span> &lt;'
+            '<span class="dehaze-deleted">a</span>&gt;\n  '
+            '<span class="dehaze-diff_intro">Actual:</span> &lt;'
+            '<span class="dehaze-inserted">b</span>&gt;</pre>'
+        )
+        self.assertEqual(expected, result)
+
+    def test_json_format_renders_lines_with_opcodes(self):
+        self.m_get_assert_equal_diff.return_value = ("[1,\n 2]", "[1,\n 3]", "hint")
+        config.format = "json"
+        self.addCleanup(config.reset)
+
+        result = json.loads(dehaze("assertEqual", {}))
+
+        expected = {
+            "assert_method": "assertEqual",
+            "expected": [
+                [{"opcode": "equal", "text": "[1,"}],
+                [
+                    {"opcode": "equal", "text": " "},
+                    {"opcode": "delete", "text": "2"},
+                    {"opcode": "equal", "text": "]"},
+                ],
+            ],
+            "actual": [
+                [{"opcode": "equal", "text": "[1,"}],
+                [
+                    {"opcode": "equal", "text": " "},
+                    {"opcode": "insert", "text": "3"},
+                    {"opcode": "equal", "text": "]"},
+                ],
+            ],
+            "hint": "hint",
+        }
+        self.assertEqual(expected, result)
+
     def test_unsupported_assert_method_returns_none(self):
         result = dehaze("assertRegex", {})
         self.assertIsNone(result)
@@ -0,0 +1,119 @@
+import sys
+from unittest import TestCase, skipIf
+
+from six import PY2
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from nose_dehaze.failure import DehazedFailure, snapshot_frame_locals
+from nose_dehaze.stats import Stats
+
+
+class SnapshotFrameLocalsTest(TestCase):
+    def test_keeps_only_keys_read_by_the_diff_function(self):
+        frame_locals = {
+            "first": 1,
+            "msg": None,
+            "second": 2,
+            "self": Mock(),  # TestCase class of current test method
+        }
+
+        result = snapshot_frame_locals("assertEqual", frame_locals)
+
+        self.assertEqual({"first": 1, "second": 2}, result)
+
+    def test_missing_keys_are_skipped(self):
+        mock_instance = Mock()
+
+        result = snapshot_frame_locals("assert_has_calls", {"self": mock_instance})
+
+        self.assertEqual({"self": mock_instance}, result)
+
+
+class DehazedFailureTest(TestCase):
+    def setUp(self):
+        self.p_dehaze = patch("nose_dehaze.failure.dehaze_with_record")
+        self.m_dehaze = self.p_dehaze.start()
+
+    def tearDown(self):
+        self.p_dehaze.stop()
+
+    def test_diff_is_deferred_until_rendered_and_memoized(self):
+        self.m_dehaze.return_value = ("dehazed output", {"hint": None})
+        frame_locals = {"first": 1, "second": 2}
+
+        failure = DehazedFailure(AssertionError("1 != 2"), "assertEqual", frame_locals)
+        self.m_dehaze.assert_not_called()
+
+        self.assertEqual("dehazed output", str(failure))
+        self.assertEqual("dehazed output", str(failure))
+        self.m_dehaze.assert_called_once_with("assertEqual", frame_locals)
+        self.assertIsNone(failure.frame_locals)
+        self.assertEqual({"hint": None}, failure.record)
+
+    def test_joins_worker_result(self):
+        future = Mock()
+        future.result.return_value = ("worker output", {"hint": None}, None)
+
+        failure = DehazedFailure(AssertionError("1 != 2"), "assertEqual", {}, future)
+
+        self.assertEqual("worker output", str(failure))
+        self.assertEqual({"hint": None}, failure.record)
+        self.m_dehaze.assert_not_called()
+
+    @patch("nose_dehaze.failure.stats", new_callable=Stats)
+    def test_merges_worker_stats(self, m_stats):
+        worker_stats = {
+            "handlers": {"dehaze": {"calls": 1, "time": 0.5, "chars": 10}},
+            "failures": [],
+            "sequence_matcher": {"calls": 1, "items": 3, "max_items": 3},
+        }
+        future = Mock()
+        future.result.return_value = ("worker output", None, worker_stats)
+        m_stats.add("dehaze", 0.25, 5)
+
+        str(DehazedFailure(AssertionError("1 != 2"), "assertEqual", {}, future))
+
+        self.assertEqual({"dehaze": [2, 0.75, 15]}, m_stats.handlers)
+        self.assertEqual(1, m_stats.matcher_calls)
+
+    def test_failed_worker_falls_back_to_dehazing_in_process(self):
+        self.m_dehaze.return_value = ("dehazed output", None)
+        future = Mock()
+        future.result.side_effect = RuntimeError("worker died")
+
+        failure = DehazedFailure(AssertionError("1 != 2"), "assertEqual", {}, future)
+
+        self.assertEqual("dehazed output", str(failure))
+        self.m_dehaze.assert_called_once_with("assertEqual", {})
+
+    def test_falls_back_to_original_exception_message(self):
+        self.m_dehaze.return_value = (None, None)
+
+        failure = DehazedFailure(AssertionError("1 != 2"), "assertEqual", {})
+
+        self.assertEqual("1 != 2", str(failure))
+
+    @skipIf(PY2, "traceback.clear_frames is python 3.4+ only")
+    def test_snapshot_renders_and_clears_finished_frames(self):
+        self.m_dehaze.return_value = ("dehazed output", None)
+
+        def fail():
+            large_local = list(range(10))  # noqa: F841
+            raise AssertionError("1 != 2")
+
+        try:
+            fail()
+        except AssertionError:
+            exc_instance, trace = sys.exc_info()[1:]
+
+        failure = DehazedFailure(exc_instance, "assertEqual", {"first": 1})
+        failure.snapshot(trace)
+
+        self.assertEqual("dehazed output", failure.output)
+        self.assertIsNone(failure.frame_locals)
+        self.assertIsNone(failure.exc_instance)
+        self.assertEqual({}, trace.tb_next.tb_frame.f_locals)
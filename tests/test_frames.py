@@ -0,0 +1,57 @@
+import sys
+from unittest import TestCase
+
+try:
+    from unittest.mock import Mock
+except ImportError:
+    from mock import Mock
+
+from nose_dehaze.frames import build_assert_code_index, find_assert_frame
+
+
+def get_traceback(func, *args, **kwargs):
+    try:
+        func(*args, **kwargs)
+    except AssertionError:
+        return sys.exc_info()[2]
+
+
+class BuildAssertCodeIndexTest(TestCase):
+    def test_indexes_supported_methods_by_code_object(self):
+        index, unsupported = build_assert_code_index([TestCase], ["assertEqual"])
+
+        self.assertEqual("assertEqual", index[TestCase.assertEqual.__code__])
+        self.assertIn(TestCase.assertIn.__code__, unsupported)
+        self.assertNotIn(TestCase.assertEqual.__code__, unsupported)
+
+
+class FindAssertFrameTest(TestCase):
+    def test_finds_assert_equal_frame(self):
+        trace = get_traceback(self.assertEqual, {"a": 1}, {"a": 2})
+
+        assert_method, frame = find_assert_frame(trace)
+
+        self.assertEqual("assertEqual", assert_method)
+        self.assertEqual({"a": 1}, frame.f_locals["first"])
+
+    def test_finds_outermost_mock_assert_frame(self):
+        mock_instance = Mock()
+        trace = get_traceback(mock_instance.assert_called_once_with, 1)
+
+        assert_method, frame = find_assert_frame(trace)
+
+        self.assertEqual("assert_called_once_with", assert_method)
+        self.assertIs(mock_instance, frame.f_locals["self"])
+
+    def test_ignores_user_functions_named_like_assert_methods(self):
+        def assertEqual(first, second):
+            assert first == second
+
+        trace = get_traceback(assertEqual, 1, 2)
+
+        self.assertIsNone(find_assert_frame(trace))
+
+    def test_stops_at_unsupported_assert_method(self):
+        trace = get_traceback(self.assertIn, 1, [2])
+
+        self.assertIsNone(find_assert_frame(trace))
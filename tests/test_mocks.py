@@ -0,0 +1,78 @@
+import gc
+from unittest import TestCase
+
+try:
+    from unittest.mock import Mock, call, patch
+except ImportError:
+    from mock import Mock, call, patch
+
+from nose_dehaze.config import config
+from nose_dehaze.mocks import MockNames, extract_mock_name, format_call, format_calls
+from nose_dehaze.structural import MISSING
+
+
+class ExtractMockNameTest(TestCase):
+    def test_child_mocks(self):
+        parent = Mock(name="parent")
+
+        self.assertEqual(
+            "parent.child().method", extract_mock_name(parent.child().method)
+        )
+        self.assertEqual("mock", extract_mock_name(Mock()))
+
+
+class MockNamesTest(TestCase):
+    def test_names_are_memoized(self):
+        mock_names = MockNames()
+        mock_instance = Mock(name="memoized")
+
+        with patch(
+            "nose_dehaze.mocks.extract_mock_name", wraps=extract_mock_name
+        ) as m_extract_mock_name:
+            self.assertEqual("memoized", mock_names.get(mock_instance))
+            self.assertEqual("memoized", mock_names.get(mock_instance))
+
+        m_extract_mock_name.assert_called_once_with(mock_instance)
+
+    def test_names_are_dropped_with_their_mock(self):
+        mock_names = MockNames()
+        mock_instance = Mock(name="collected")
+        mock_names.get(mock_instance)
+
+        del mock_instance
+        gc.collect()
+
+        self.assertEqual({}, mock_names.names)
+
+
+class FormatCallTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_values_containing_call_are_kept(self):
+        self.assertEqual(
+            "m('recall', a='call')", format_call("m", call("recall", a="call"))
+        )
+
+    def test_named_calls(self):
+        self.assertEqual("m.method(1)", format_call("m", call.method(1)))
+        self.assertEqual("m().method(1)", format_call("m", call().method(1)))
+
+    def test_call_args_list_entries(self):
+        mock_instance = Mock()
+        mock_instance(1, a=2)
+
+        self.assertEqual("m(1, a=2)", format_call("m", mock_instance.call_args_list[0]))
+
+    def test_args_are_truncated(self):
+        config.max_items = 2
+
+        self.assertEqual(
+            "m([1, 2, ...<1 more items>])", format_call("m", call([1, 2, 3]))
+        )
+
+    def test_format_calls(self):
+        self.assertEqual(
+            "[m(1),\n <missing>,\n m.method(2)]",
+            format_calls("m", [call(1), MISSING, call.method(2)]),
+        )
@@ -0,0 +1,137 @@
+from array import array
+from unittest import TestCase, skipIf
+
+from nose_dehaze.config import config
+from nose_dehaze.numeric import (
+    as_numeric,
+    build_numeric_diff,
+    index_ranges,
+    max_errors,
+    mismatch_indices,
+    numpy,
+)
+
+
+class AsNumericTest(TestCase):
+    def test_numbers(self):
+        self.assertEqual(list(as_numeric([1, 2, 3])), [1, 2, 3])
+        self.assertEqual(list(as_numeric((1.5, 2))), [1.5, 2.0])
+
+    def test_not_numbers(self):
+        self.assertIsNone(as_numeric([1, "2"]))
+        self.assertIsNone(as_numeric([1, None]))
+        self.assertIsNone(as_numeric([[1], [2]]))
+        self.assertIsNone(as_numeric({1, 2}))
+
+    @skipIf(numpy is not None, "NumPy keeps large ints as objects")
+    def test_large_ints_are_not_converted_to_floats(self):
+        self.assertIsNone(as_numeric([2**64, 1]))
+
+    def test_array(self):
+        value = array("i", [1, 2])
+        self.assertEqual(list(as_numeric(value)), [1, 2])
+
+
+class MismatchIndicesTest(TestCase):
+    def test_matching_nans_are_equal(self):
+        nan = float("nan")
+        expected = array("d", [nan, 1.0, nan, 2.0])
+        actual = array("d", [nan, 1.0, 3.0, nan])
+
+        self.assertEqual(list(mismatch_indices(expected, actual, 4)), [2, 3])
+
+    @skipIf(numpy is None, "NumPy is not installed")
+    def test_matching_nans_are_equal_in_ndarrays(self):
+        expected = numpy.array([numpy.nan, 1.0, numpy.nan, 2.0])
+        actual = numpy.array([numpy.nan, 1.0, 3.0, numpy.nan])
+
+        self.assertEqual(list(mismatch_indices(expected, actual, 4)), [2, 3])
+
+
+class IndexRangesTest(TestCase):
+    def test_index_ranges(self):
+        self.assertEqual(index_ranges([1, 2, 3, 7, 9, 10]), [(1, 4), (7, 8), (9, 11)])
+        self.assertEqual(index_ranges([]), [])
+
+
+class MaxErrorsTest(TestCase):
+    def test_max_errors(self):
+        self.assertEqual(max_errors([0, 2, 10], [1, 3, 15], [0, 1, 2]), (5.0, 0.5))
+
+
+class BuildNumericDiffTest(TestCase):
+    def setUp(self):
+        config.structural_diff_limit = 5
+
+    def tearDown(self):
+        config.reset()
+
+    def test_short_sequences_are_not_handled(self):
+        self.assertIsNone(build_numeric_diff([1, 2], [1, 3]))
+
+    def test_different_types_are_not_handled(self):
+        self.assertIsNone(build_numeric_diff(list(range(10)), tuple(range(10))))
+
+    def test_mismatches(self):
+        expected = [float(i) for i in range(10)]
+        actual = list(expected)
+        actual[2] = 2.5
+        actual[3] = 4.0
+        actual[8] = -8.0
+
+        result = build_numeric_diff(expected, actual)
+
+        self.assertEqual(
+            result,
+            (
+                "[2]: 2.0\n[3]: 3.0\n[8]: 8.0",
+                "[2]: 2.5\n[3]: 4.0\n[8]: -8.0",
+                "3 of 10 elements differ at [2:4], [8], max absolute error 16, max "
+                "relative error 2",
+            ),
+        )
+
+    def test_sample_is_bounded(self):
+        config.structural_diff_max_paths = 2
+
+        expected, actual, hint = build_numeric_diff(list(range(10)), list(range(1, 11)))
+
+        self.assertEqual(expected, "[0]: 0\n[1]: 1")
+        self.assertEqual(actual, "[0]: 1\n[1]: 2")
+        self.assertIn("10 of 10 elements differ at [0:10]", hint)
+
+    def test_only_lengths_differ(self):
+        result = build_numeric_diff(list(range(10)), list(range(11)))
+
+        self.assertEqual(
+            result,
+            ("[10]: <missing>", "[10]: 10", "expected 10 elements, actual 11 elements"),
+        )
+
+    def test_no_difference_found_falls_back(self):
+        # e.g. assertIs on equal lists
+        self.assertIsNone(build_numeric_diff(list(range(10)), list(range(10))))
+
+    def test_only_matching_nans_falls_back(self):
+        expected = [float(i) for i in range(10)]
+        expected[3] = float("nan")
+
+        self.assertIsNone(build_numeric_diff(expected, list(expected)))
+
+    @skipIf(numpy is None, "NumPy is not installed")
+    def test_ndarrays(self):
+        expected = numpy.arange(10.0)
+        actual = expected.copy()
+        actual[4] = 40.0
+
+        result = build_numeric_diff(expected, actual)
+
+        self.assertEqual(
+            result,
+            (
+                "[4]: 4.0",
+                "[4]: 40.0",
+                "1 of 10 elements differ at [4], max absolute error 36, max relative "
+                "error 9",
+            ),
+        )
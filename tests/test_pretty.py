@@ -0,0 +1,161 @@
+from collections import Counter, OrderedDict, defaultdict, deque, namedtuple
+from unittest import TestCase
+
+from nose_dehaze.config import config
+from nose_dehaze.pretty import bounded_pformat, summarize, truncate
+
+
+class BoundedPformatTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_within_limits_matches_pformat(self):
+        value = {"hello": "world", "number": [1, 2, {"nested": (3, 4)}]}
+
+        result = bounded_pformat(value, width=1)
+
+        expected = (
+            "{'hello': 'world',\n"
+            " 'number': [1,\n"
+            "            2,\n"
+            "            {'nested': (3,\n"
+            "                        4)}]}"
+        )
+        self.assertEqual(expected, result)
+
+    def test_containers_cut_at_max_items(self):
+        config.max_items = 3
+
+        self.assertEqual(
+            "[0, 1, 2, ...<997 more items>]", bounded_pformat(list(range(1000)))
+        )
+        self.assertEqual(
+            "{0: 0, 1: 1, 2: 2, ...<7 more items>: ...}",
+            bounded_pformat({i: i for i in range(10)}),
+        )
+
+    def test_strings_cut_at_max_string(self):
+        config.max_string = 5
+
+        self.assertEqual("['hello'...<6 more chars>]", bounded_pformat(["hello world"]))
+
+    def test_nesting_cut_at_max_depth(self):
+        config.max_depth = 2
+
+        self.assertEqual("[[[...], {...}]]", bounded_pformat([[[1], {"a": 1}]]))
+
+    def test_output_cut_at_max_chars(self):
+        config.max_chars = 10
+
+        self.assertEqual(
+            "[1000, 100...<truncated>", bounded_pformat([1000, 1001, 1002])
+        )
+
+    def test_collections_rebuilt_as_their_type(self):
+        config.max_items = 2
+
+        self.assertEqual(
+            "OrderedDict([(0, 0), (1, 1), (...<1 more items>, ...)])",
+            bounded_pformat(OrderedDict((i, i) for i in range(3))),
+        )
+        self.assertEqual(
+            "defaultdict(<class 'list'>, {0: [0], 1: [1], ...<1 more items>: ...})",
+            bounded_pformat(defaultdict(list, {i: [i] for i in range(3)})),
+        )
+        self.assertEqual(
+            "deque([0, 1, ...<1 more items>])", bounded_pformat(deque(range(3)))
+        )
+
+    def test_subclasses_cut_at_max_items(self):
+        class MyList(list):
+            pass
+
+        class MyDict(dict):
+            pass
+
+        point = namedtuple("Point", "x y z")
+        config.max_items = 2
+
+        self.assertEqual(
+            "MyList([0, 1, ...<998 more items>])",
+            bounded_pformat(MyList(range(1000))),
+        )
+        self.assertEqual(
+            "MyDict({0: 0, 1: 1, ...<998 more items>: ...})",
+            bounded_pformat(MyDict((i, i) for i in range(1000))),
+        )
+        self.assertEqual(
+            "Counter({0: 1, 1: 1, ...<998 more items>: ...})",
+            bounded_pformat(Counter(range(1000))),
+        )
+        self.assertEqual(
+            "Point(x=1, y=2, ...<1 more items>)", bounded_pformat(point(1, 2, 3))
+        )
+
+    def test_subclasses_cut_at_max_depth(self):
+        class MyList(list):
+            pass
+
+        config.max_depth = 1
+
+        self.assertEqual(
+            "[MyList(...), OrderedDict(...)]",
+            bounded_pformat([MyList([1]), OrderedDict(a=1)]),
+        )
+
+    def test_string_subclasses_cut_at_max_string(self):
+        class MyStr(str):
+            pass
+
+        config.max_string = 5
+
+        self.assertEqual(
+            "'hello'...<6 more chars>", bounded_pformat(MyStr("hello world"))
+        )
+
+    def test_recursive_containers(self):
+        value = [1]
+        value.append(value)
+
+        result = bounded_pformat(value)
+
+        self.assertEqual(
+            "[1, <Recursion on list with id={id}>]".format(id=id(value)), result
+        )
+
+
+class TruncateTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_leaves_other_objects_untouched(self):
+        value = object()
+        self.assertIs(value, truncate(value))
+
+    def test_copies_are_bounded_by_character_budget(self):
+        config.max_chars = 5
+
+        result = truncate([[1, 2, 3], [4, 5, 6]])
+
+        self.assertEqual("[[1, 2, 3], [...<3 more items>]]", repr(result))
+
+
+class SummarizeTest(TestCase):
+    def test_short_text_is_kept(self):
+        self.assertEqual("[1, 2]", summarize([1, 2], "[1, 2]"))
+
+    def test_containers_show_type_len_and_first_items(self):
+        value = {"k{}".format(i): [i] * 100 for i in range(100)}
+
+        result = summarize(value, bounded_pformat(value))
+
+        self.assertEqual(
+            "dict of len 100: {'k0': [...], 'k1': [...], 'k2': [...], "
+            "...<97 more items>: ...}",
+            result,
+        )
+
+    def test_other_values_show_the_start_of_their_text(self):
+        result = summarize(object(), "x\n" * 100)
+
+        self.assertEqual(("x " * 100).strip() + "...<truncated>", result)
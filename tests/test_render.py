@@ -0,0 +1,157 @@
+import json
+from unittest import TestCase
+
+from nose_dehaze.config import config
+from nose_dehaze.render import (
+    RENDERERS,
+    Style,
+    deleted_text,
+    get_renderer,
+    header_text,
+    resolve_color,
+)
+
+
+class Stream(object):
+    def __init__(self, tty):
+        self.tty = tty
+
+    def isatty(self):
+        return self.tty
+
+
+class StyledTextTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_wraps_text_in_escape_sequences(self):
+        self.assertEqual("\x1b[1m\x1b[31mtext\x1b[0m", deleted_text("text"))
+        self.assertEqual("\x1b[1m\x1b[33m3\x1b[0m", header_text(3))
+
+    def test_color_disabled_returns_plain_text(self):
+        config.color = False
+
+        self.assertEqual("text", deleted_text("text"))
+        self.assertEqual("<class 'int'>", header_text(int))
+
+    def test_other_formats_style_inline_with_their_renderer(self):
+        config.format = "html"
+
+        self.assertEqual(
+            '<span class="dehaze-deleted">a&lt;b</span>', deleted_text("a<b")
+        )
+        self.assertEqual("mock", header_text.in_diff("mock"))
+
+        config.format = "json"
+
+        self.assertEqual("text", deleted_text("text"))
+
+
+class RendererTest(TestCase):
+    spans = [
+        (Style.reset, ""),
+        (Style.diff_intro, "Expected:"),
+        (None, " "),
+        (Style.reset, "a"),
+        (Style.inserted, "<b>"),
+        (None, "\n"),
+        (Style.raw, "hint"),
+    ]
+
+    def tearDown(self):
+        config.reset()
+
+    def test_ansi(self):
+        self.assertEqual(
+            "\x1b[0m\x1b[1m\x1b[36mExpected:\x1b[0m \x1b[0ma"
+            "\x1b[1m\x1b[32m<b>\x1b[0m\nhint",
+            RENDERERS["ansi"].document("assertEqual", self.spans),
+        )
+
+    def test_plain(self):
+        self.assertEqual(
+            "Expected: a<b>\nhint",
+            RENDERERS["plain"].document("assertEqual", self.spans),
+        )
+
+    def test_html_escapes_text_but_not_raw_spans(self):
+        self.assertEqual(
+            '<pre class="dehaze"><span class="dehaze-diff_intro">Expected:</span> a'
+            '<span class="dehaze-inserted">&lt;b&gt;</span>\nhint</pre>',
+            RENDERERS["html"].document("assertEqual", self.spans),
+        )
+
+    def test_json_spans_without_padding(self):
+        result = json.loads(RENDERERS["json"].document("assertEqual", self.spans))
+
+        self.assertEqual("assertEqual", result["assert_method"])
+        self.assertEqual(
+            [
+                {"style": "diff_intro", "text": "Expected:"},
+                {"style": "reset", "text": "a"},
+                {"style": "inserted", "text": "<b>"},
+                {"style": "reset", "text": "hint"},
+            ],
+            result["spans"],
+        )
+
+    def test_json_diff_lines(self):
+        result = json.loads(
+            RENDERERS["json"].document(
+                "assertEqual",
+                self.spans,
+                [[(Style.reset, "a"), (Style.deleted, "")]],
+                [
+                    [(Style.reset, "a"), (Style.inserted, " ")],
+                    [(Style.diff_intro, "...")],
+                ],
+                "hint",
+            )
+        )
+
+        self.assertEqual(
+            {
+                "assert_method": "assertEqual",
+                "expected": [[{"opcode": "equal", "text": "a"}]],
+                "actual": [
+                    [
+                        {"opcode": "equal", "text": "a"},
+                        {"opcode": "insert", "text": " "},
+                    ],
+                    [{"opcode": "collapsed", "text": "..."}],
+                ],
+                "hint": "hint",
+            },
+            result,
+        )
+
+    def test_unstyle_returns_inline_styled_text_as_plain_text(self):
+        for name, renderer in RENDERERS.items():
+            styled = renderer.style(Style.deleted, "a<b&c") + renderer.style(None, " d")
+
+            self.assertEqual("a<b&c d", renderer.unstyle(styled), name)
+
+    def test_get_renderer_falls_back_to_plain_without_color(self):
+        self.assertIs(RENDERERS["ansi"], get_renderer())
+        config.color = False
+        self.assertIs(RENDERERS["plain"], get_renderer())
+        config.format = "html"
+        self.assertIs(RENDERERS["html"], get_renderer())
+
+
+class ResolveColorTest(TestCase):
+    def test_always_and_never(self):
+        self.assertTrue(resolve_color("always", Stream(False), {"NO_COLOR": "1"}))
+        self.assertFalse(resolve_color("never", Stream(True), {}))
+
+    def test_auto_colors_terminals(self):
+        self.assertTrue(resolve_color("auto", Stream(True), {}))
+        self.assertFalse(resolve_color("auto", Stream(False), {}))
+        self.assertFalse(resolve_color("auto", None, {}))
+
+    def test_auto_respects_no_color_environment_variables(self):
+        self.assertFalse(resolve_color("auto", Stream(True), {"NO_COLOR": "1"}))
+        self.assertFalse(
+            resolve_color("auto", Stream(True), {"ANSI_COLORS_DISABLED": "1"})
+        )
+        self.assertTrue(resolve_color("auto", Stream(True), {"NO_COLOR": ""}))
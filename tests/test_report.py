@@ -0,0 +1,121 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from nose_dehaze.config import config
+from nose_dehaze.deadline import DeadlineExceeded
+from nose_dehaze.diff import dehaze_with_hint
+from nose_dehaze.report import ReportWriter, changed_paths, dehaze_with_record
+
+
+class ChangedPathsTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_returns_differing_paths_of_containers(self):
+        frame_locals = {"first": {"a": [1, 2], "b": 1}, "second": {"a": [1, 3]}}
+
+        result = changed_paths("assertEqual", frame_locals)
+
+        self.assertEqual(["['a'][1]", "['b']"], sorted(result))
+
+    def test_limited_to_structural_diff_max_paths(self):
+        config.structural_diff_max_paths = 2
+        frame_locals = {"list1": [1, 2, 3], "list2": [4, 5, 6]}
+
+        self.assertEqual(["[0]", "[1]"], changed_paths("assertListEqual", frame_locals))
+
+    def test_no_paths_for_other_asserts_and_values(self):
+        self.assertEqual([], changed_paths("assertEqual", {"first": 1, "second": 2}))
+        self.assertEqual([], changed_paths("assertEqual", {"first": [], "second": ()}))
+        self.assertEqual(
+            [], changed_paths("assertNotEqual", {"first": [], "second": []})
+        )
+        self.assertEqual([], changed_paths("assertTrue", {"expr": 0}))
+
+
+class DehazeWithRecordTest(TestCase):
+    def setUp(self):
+        config.report = True
+
+    def tearDown(self):
+        config.reset()
+
+    @patch("nose_dehaze.report.default_timer", side_effect=[1.0, 1.5])
+    def test_builds_the_record_with_the_output(self, m_default_timer):
+        frame_locals = {"first": 1, "second": "1"}
+
+        with patch(
+            "nose_dehaze.report.dehaze_with_hint", wraps=dehaze_with_hint
+        ) as m_dehaze_with_hint:
+            output, record = dehaze_with_record("assertEqual", frame_locals)
+
+        m_dehaze_with_hint.assert_called_once_with("assertEqual", frame_locals)
+        self.assertIn("\x1b[", output)
+        self.assertEqual(
+            {
+                "assert_method": "assertEqual",
+                "paths": [],
+                "hint": (
+                    "expected and actual are different types\n\n"
+                    "          Expected: <class 'int'>\n"
+                    "            Actual: <class 'str'>"
+                ),
+                "time": 0.5,
+            },
+            record,
+        )
+
+    def test_records_the_changed_paths(self):
+        frame_locals = {"first": {"a": [1, 2]}, "second": {"a": [1, 3]}}
+
+        _, record = dehaze_with_record("assertEqual", frame_locals)
+
+        self.assertEqual(["['a'][1]"], record["paths"])
+
+    @patch("nose_dehaze.report.changed_paths", side_effect=DeadlineExceeded())
+    def test_paths_are_empty_when_the_time_budget_runs_out(self, m_changed_paths):
+        frame_locals = {"first": [1], "second": [2]}
+
+        output, record = dehaze_with_record("assertEqual", frame_locals)
+
+        self.assertIsNotNone(output)
+        self.assertEqual([], record["paths"])
+
+    def test_no_record_without_a_report(self):
+        config.report = False
+
+        output, record = dehaze_with_record("assertEqual", {"first": 1, "second": 2})
+
+        self.assertIsNotNone(output)
+        self.assertIsNone(record)
+
+
+class ReportWriterTest(TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "report.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @patch("nose_dehaze.report.os.fsync")
+    def test_writes_json_lines_and_syncs_once_on_close(self, m_fsync):
+        writer = ReportWriter(self.path)
+        writer.write({"test": "a"})
+        writer.write({"test": "b"})
+        writer.close()
+        writer.close()
+        writer.write({"test": "c"})
+
+        with open(self.path) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([{"test": "a"}, {"test": "b"}], records)
+        m_fsync.assert_called_once()
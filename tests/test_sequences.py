@@ -0,0 +1,71 @@
+from unittest import TestCase
+
+from nose_dehaze.config import config
+from nose_dehaze.sequences import build_sequence_diff
+
+
+class BuildSequenceDiffTest(TestCase):
+    def setUp(self):
+        config.structural_diff_limit = 5
+
+    def tearDown(self):
+        config.reset()
+
+    def test_small_sequences_are_not_handled(self):
+        self.assertIsNone(build_sequence_diff([1], [2]))
+
+    def test_different_types_are_not_handled(self):
+        self.assertIsNone(build_sequence_diff(list(range(10)), tuple(range(10))))
+
+    def test_inserted_deleted_and_changed_elements(self):
+        expected = [{"id": i} for i in range(10)]
+        actual = [{"id": -1}] + expected[:4] + [{"id": 4, "x": 1}] + expected[5:9]
+
+        result = build_sequence_diff(expected, actual)
+
+        self.assertEqual(
+            result,
+            (
+                "[0]: <missing>\n"
+                "... 4 equal items ...\n"
+                "[4]['x']: <missing>\n"
+                "... 4 equal items ...\n"
+                "[9]: {'id': 9}",
+                "[0]: {'id': -1}\n"
+                "... 4 equal items ...\n"
+                "[5]['x']: 1\n"
+                "... 4 equal items ...\n"
+                "[9]: <missing>",
+                "1 inserted, 1 deleted, 1 changed and 0 moved items",
+            ),
+        )
+
+    def test_moved_elements(self):
+        expected = list(range(10))
+        actual = expected[:2] + expected[3:8] + [2] + expected[8:]
+
+        result = build_sequence_diff(expected, actual)
+
+        self.assertEqual(
+            result,
+            (
+                "... 2 equal items ...\n[2]: 2\n... 7 equal items ...",
+                "... 2 equal items ...\n[7]: 2\n... 7 equal items ...",
+                "0 inserted, 0 deleted, 0 changed and 1 moved items",
+            ),
+        )
+
+    def test_stops_after_max_paths(self):
+        config.structural_diff_max_paths = 2
+
+        result = build_sequence_diff(list(range(10)), list(range(10, 20)))
+
+        self.assertEqual(
+            result,
+            (
+                "[0]: 0\n[1]: 1",
+                "[0]: 10\n[1]: 11",
+                "0 inserted, 0 deleted, 10 changed and 0 moved items, "
+                "showing the first 2 differing paths",
+            ),
+        )
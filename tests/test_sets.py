@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+from nose_dehaze.config import config
+from nose_dehaze.diff import get_assert_equal_diff
+from nose_dehaze.sets import build_set_diff, format_members
+
+
+class FormatMembersTest(TestCase):
+    def test_sorted_by_repr(self):
+        self.assertEqual(format_members({"b", "a", None}, 10), "'a'\n'b'\nNone")
+
+    def test_bounded(self):
+        self.assertEqual(len(format_members(set(range(100)), 3).split("\n")), 3)
+
+    def test_bounded_members_are_the_first_by_repr(self):
+        members = set(str(i) for i in range(100))
+
+        self.assertEqual("'0'\n'1'\n'10'", format_members(members, 3))
+
+    def test_empty(self):
+        self.assertEqual(format_members(set(), 3), "<none>")
+
+
+class BuildSetDiffTest(TestCase):
+    def setUp(self):
+        config.structural_diff_limit = 5
+
+    def tearDown(self):
+        config.reset()
+
+    def test_small_sets_are_not_handled(self):
+        self.assertIsNone(build_set_diff({1, 2}, {1, 3}))
+
+    def test_not_sets(self):
+        self.assertIsNone(build_set_diff(list(range(10)), list(range(10))))
+
+    def test_missing_and_unexpected_members(self):
+        expected = set(range(10))
+        actual = frozenset(range(2, 10)) | {"x"}
+
+        self.assertEqual(
+            build_set_diff(expected, actual),
+            (
+                "0\n1",
+                "'x'",
+                "expected shows the 2 members missing from actual, actual the 1 "
+                "members not expected",
+            ),
+        )
+
+    def test_counts_are_bounded(self):
+        config.structural_diff_max_paths = 2
+
+        expected, actual, hint = build_set_diff(set(range(100)), set())
+
+        self.assertEqual(len(expected.split("\n")), 2)
+        self.assertEqual(actual, "<none>")
+        self.assertEqual(
+            hint,
+            "expected shows the 100 members missing from actual, actual the 0 "
+            "members not expected, showing the first 2 of each",
+        )
+
+    def test_assert_set_equal(self):
+        result = get_assert_equal_diff(
+            "assertSetEqual", {"set1": set(range(10)), "set2": set(range(1, 10))}
+        )
+
+        self.assertEqual(result[:2], ("0", "<none>"))
@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+try:
+    from unittest.mock import patch
+except ImportError:
+    from mock import patch
+
+from nose_dehaze.config import config
+from nose_dehaze.diff import dehaze
+from nose_dehaze.stats import MemoryPeak, Stats, tracemalloc
+
+
+class MemoryPeakTest(TestCase):
+    def setUp(self):
+        if tracemalloc is None:
+            self.skipTest("tracemalloc requires python 3.4+")
+
+    def test_traces_only_within_the_block(self):
+        self.assertFalse(tracemalloc.is_tracing())
+
+        with MemoryPeak() as memory:
+            self.assertTrue(tracemalloc.is_tracing())
+            data = bytearray(1024 * 1024)
+
+        self.assertFalse(tracemalloc.is_tracing())
+        self.assertGreaterEqual(memory.peak, len(data))
+
+    def test_keeps_tracing_started_elsewhere(self):
+        if not hasattr(tracemalloc, "reset_peak"):
+            self.skipTest("tracemalloc.reset_peak requires python 3.9+")
+        tracemalloc.start()
+        self.addCleanup(tracemalloc.stop)
+
+        with MemoryPeak() as memory:
+            bytearray(1024 * 1024)
+
+        self.assertTrue(tracemalloc.is_tracing())
+        self.assertGreaterEqual(memory.peak, 1024 * 1024)
+
+
+class StatsTest(TestCase):
+    def setUp(self):
+        self.stats = Stats()
+        config.stats = True
+
+    def tearDown(self):
+        config.reset()
+
+    def test_nothing_is_recorded_when_disabled(self):
+        config.stats = False
+        with self.stats.timed("handler"):
+            pass
+        self.stats.add_matcher_input(1, 2)
+
+        self.assertEqual({}, self.stats.handlers)
+        self.assertEqual(0, self.stats.matcher_calls)
+
+    @patch("nose_dehaze.stats.default_timer", side_effect=[1.0, 1.5, 2.0, 2.25])
+    def test_timed_and_measure_add_up_per_handler(self, m_default_timer):
+        with self.stats.timed("handler"):
+            pass
+
+        @self.stats.measure("handler")
+        def render():
+            return "rendered"
+
+        self.assertEqual("rendered", render())
+        self.assertEqual({"handler": [2, 0.75, 8]}, self.stats.handlers)
+
+    def test_matcher_inputs(self):
+        self.stats.add_matcher_input(1, 2)
+        self.stats.add_matcher_input(10, 20)
+
+        self.assertEqual(
+            {"calls": 2, "items": 33, "max_items": 30},
+            self.stats.as_dict()["sequence_matcher"],
+        )
+
+    def test_slowest_failures_first(self):
+        for i, seconds in enumerate([0.1, 0.3, 0.2]):
+            self.stats.add_failure("test_{}".format(i), "assertEqual", seconds, 1, None)
+
+        result = self.stats.slowest_failures(2)
+
+        self.assertEqual(["test_1", "test_2"], [f["test"] for f in result])
+
+    def test_summary_lines(self):
+        self.stats.add("dehaze", 0.002, 100)
+        self.stats.add_matcher_input(40, 60)
+        self.stats.add_failure("tests.test_a", "assertEqual", 0.002, 100, 2048)
+
+        result = self.stats.summary_lines()
+
+        self.assertEqual(
+            [
+                "dehaze stats: 1 failures rendered in 2.00 ms, 100 characters",
+                "  handler                                     calls    time (ms)        chars",  # noqa: E501
+                "  dehaze                                          1         2.00          100",  # noqa: E501
+                "  SequenceMatcher inputs: 1 matchers, 100 items, largest 100",
+                "  slowest failures                                                time (ms)   peak (KiB)",  # noqa: E501
+                "  tests.test_a                                                         2.00            2",  # noqa: E501
+            ],
+            result,
+        )
+
+    def test_dump(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, "stats.json")
+        self.stats.add("dehaze", 0.5, 10)
+
+        self.stats.dump(path)
+
+        with open(path) as f:
+            result = json.load(f)
+        self.assertEqual(
+            {"dehaze": {"calls": 1, "time": 0.5, "chars": 10}}, result["handlers"]
+        )
+
+
+class InstrumentationTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    @patch("nose_dehaze.deadline.stats", new_callable=Stats)
+    @patch("nose_dehaze.diff.stats", new_callable=Stats)
+    def test_dehaze_records_its_handler_and_matcher_inputs(
+        self, m_stats, m_matcher_stats
+    ):
+        config.stats = True
+
+        dehaze("assertEqual", {"first": "hello", "second": "world"})
+
+        self.assertIn("get_assert_equal_diff", m_stats.handlers)
+        self.assertEqual(1, m_matcher_stats.matcher_calls)
+
+    @patch("nose_dehaze.deadline.stats", new_callable=Stats)
+    def test_matcher_inputs_are_recorded_once_per_matcher(self, m_matcher_stats):
+        config.stats = True
+        config.char_diff_limit = 10
+
+        dehaze(
+            "assertEqual",
+            {"first": {"a": 1, "b": 2, "c": 3}, "second": {"a": 1, "b": 5, "c": 3}},
+        )
+
+        # the changed line among the lines, then its characters
+        self.assertEqual(2, m_matcher_stats.matcher_calls)
+        self.assertEqual(2 + 2 * len(" 'b': 2,"), m_matcher_stats.matcher_items)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+from nose_dehaze.structural import (
+    MISSING,
+    exceeds_size,
+    format_difference,
+    iter_differences,
+)
+
+
+class ExceedsSizeTest(TestCase):
+    def test_counts_nested_nodes(self):
+        value = {"a": [1, 2], "b": (3,)}
+
+        self.assertFalse(exceeds_size(value, 6))
+        self.assertTrue(exceeds_size(value, 5))
+
+
+class IterDifferencesTest(TestCase):
+    def test_equal_values_yield_nothing(self):
+        value = {"items": [{"price": 1}]}
+        self.assertEqual([], list(iter_differences(value, {"items": [{"price": 1}]})))
+
+    def test_yields_differing_paths_only(self):
+        expected = {"items": [{"price": 1, "name": "a"}, {"price": 2}], "meta": {}}
+        actual = {"items": [{"price": 1, "name": "b"}, {"price": 2}], "meta": {"x": 1}}
+
+        result = list(iter_differences(expected, actual))
+
+        self.assertEqual(
+            [
+                ("['items'][0]['name']", "a", "b"),
+                ("['meta']['x']", MISSING, 1),
+            ],
+            result,
+        )
+
+    def test_different_length_sequences_yield_missing_indices(self):
+        result = list(iter_differences([1, 2], [1, 2, 3, 4]))
+
+        self.assertEqual([("[2]", MISSING, 3), ("[3]", MISSING, 4)], result)
+
+    def test_sequence_elements_are_aligned(self):
+        result = list(iter_differences([[1], [2], [3]], [[0], [1], [2], [4]]))
+
+        self.assertEqual(
+            [("[0]", MISSING, [0]), ("[2][0]", 3, 4)],
+            result,
+        )
+
+    def test_different_sequence_types_are_a_leaf_difference(self):
+        result = list(iter_differences({"a": [1]}, {"a": (1,)}))
+
+        self.assertEqual([("['a']", [1], (1,))], result)
+
+
+class FormatDifferenceTest(TestCase):
+    def test_renders_the_value_after_its_path(self):
+        self.assertEqual("['a'][1]: 2", format_difference("['a'][1]", 2))
+        self.assertEqual("[0]: <missing>", format_difference("[0]", MISSING))
+
+    def test_multi_line_values_are_indented_under_the_path(self):
+        result = format_difference("['a']", ["x" * 40, "y" * 40])
+
+        self.assertEqual(
+            "['a']: ['{x}',\n        '{y}']".format(x="x" * 40, y="y" * 40), result
+        )
@@ -0,0 +1,143 @@
+from unittest import TestCase
+
+from nose_dehaze.config import config
+from nose_dehaze.diff import dehaze
+from nose_dehaze.render import Style
+from nose_dehaze.text import (
+    collapse_lines,
+    is_long_text,
+    text_split_diff_spans,
+    word_diff_spans,
+)
+
+
+class CollapseLinesTest(TestCase):
+    def test_short_run_is_kept(self):
+        lines = [str(i) for i in range(7)]
+        self.assertEqual(
+            collapse_lines(lines, True, True),
+            [[(Style.reset, line)] for line in lines],
+        )
+
+    def test_long_run_is_collapsed(self):
+        lines = [str(i) for i in range(10)]
+        self.assertEqual(
+            collapse_lines(lines, True, False),
+            [
+                [(Style.reset, "0")],
+                [(Style.reset, "1")],
+                [(Style.reset, "2")],
+                [(Style.diff_intro, "... 7 identical lines ...")],
+            ],
+        )
+        self.assertEqual(
+            collapse_lines(lines, False, False),
+            [[(Style.diff_intro, "... 10 identical lines ...")]],
+        )
+
+
+class WordDiffSpansTest(TestCase):
+    def test_word_diff_spans(self):
+        self.assertEqual(
+            word_diff_spans("SELECT id, name FROM users", "SELECT id FROM users"),
+            (
+                [
+                    (Style.reset, "SELECT id"),
+                    (Style.inserted, ", name"),
+                    (Style.reset, " FROM users"),
+                ],
+                [(Style.reset, "SELECT id FROM users")],
+            ),
+        )
+
+    def test_replaced_words(self):
+        self.assertEqual(
+            word_diff_spans("a b c", "a x c"),
+            (
+                [(Style.reset, "a "), (Style.inserted, "b"), (Style.reset, " c")],
+                [(Style.reset, "a "), (Style.deleted, "x"), (Style.reset, " c")],
+            ),
+        )
+
+
+class TextSplitDiffSpansTest(TestCase):
+    def tearDown(self):
+        config.reset()
+
+    def test_text_split_diff_spans(self):
+        lhs = "\n".join(["same"] * 10 + ["a b c", "gone"] + ["same"] * 10)
+        rhs = "\n".join(["same"] * 10 + ["a x c"] + ["same"] * 10 + ["new"])
+
+        lhs_out, rhs_out = text_split_diff_spans(lhs, rhs)
+
+        collapsed = [(Style.diff_intro, "... 7 identical lines ...")]
+        middle = [(Style.diff_intro, "... 4 identical lines ...")]
+        same = [(Style.reset, "same")]
+        self.assertEqual(
+            lhs_out,
+            [collapsed, same, same, same]
+            + [[(Style.reset, "a "), (Style.inserted, "b"), (Style.reset, " c")]]
+            + [[(Style.inserted, "gone")]]
+            + [same, same, same, middle, same, same, same],
+        )
+        self.assertEqual(
+            rhs_out,
+            [collapsed, same, same, same]
+            + [[(Style.reset, "a "), (Style.deleted, "x"), (Style.reset, " c")]]
+            + [same, same, same, middle, same, same, same]
+            + [[(Style.deleted, "new")]],
+        )
+
+    def test_carriage_returns_shown_in_changed_lines(self):
+        lhs_out, rhs_out = text_split_diff_spans("a\r\nb\r\nc", "a\nb\r\nc")
+
+        self.assertEqual(
+            ["a\\r", "b\r", "c"],
+            ["".join(text for _, text in line) for line in lhs_out],
+        )
+        self.assertEqual(
+            ["a", "b\r", "c"],
+            ["".join(text for _, text in line) for line in rhs_out],
+        )
+        self.assertIn((Style.inserted, "\\r"), lhs_out[0])
+
+    def test_output_bounded_by_max_chars(self):
+        config.max_chars = 10
+        lhs_out, rhs_out = text_split_diff_spans(
+            "\n".join("a%d" % i for i in range(100)),
+            "\n".join("b%d" % i for i in range(100)),
+        )
+
+        self.assertEqual(lhs_out[-1], [(Style.reset, "...<truncated>")])
+        self.assertEqual(rhs_out[-1], [(Style.reset, "...<truncated>")])
+        self.assertLess(len(lhs_out), 100)
+
+    def test_is_long_text(self):
+        config.char_diff_limit = 4
+        self.assertTrue(is_long_text("abc", "def"))
+        self.assertFalse(is_long_text("ab", "cd"))
+        self.assertFalse(is_long_text("abc", b"def" if str is not bytes else "def"))
+        self.assertFalse(is_long_text(["abc"], ["def"]))
+
+
+class DehazeTextTest(TestCase):
+    def setUp(self):
+        config.color = False
+        config.char_diff_limit = 4
+
+    def tearDown(self):
+        config.reset()
+
+    def test_long_strings_diffed_as_text(self):
+        output = dehaze("assertEqual", {"first": "a\nb c", "second": "a\nb d"})
+
+        self.assertEqual(
+            output, "\n\nExpected: a\n          b c\n  Actual: a\n          b d"
+        )
+
+    def test_not_equal_diffs_reprs(self):
+        output = dehaze("assertNotEqual", {"first": "a\nb", "second": "a\nb"})
+
+        self.assertEqual(
+            output, "\n\nExpected: 'a\\nb' != 'a\\nb'\n  Actual: 'a\\nb' == 'a\\nb'"
+        )
@@ -0,0 +1,74 @@
+import pickle
+from unittest import TestCase
+
+try:
+    from unittest.mock import Mock, patch
+except ImportError:
+    from mock import Mock, patch
+
+from nose_dehaze.config import config
+from nose_dehaze.stats import stats
+from nose_dehaze.workers import WorkerPool, dehaze_pickled
+
+
+class WorkerPoolTest(TestCase):
+    def test_no_workers_returns_no_pool(self):
+        self.assertIsNone(WorkerPool.create(0))
+
+    @patch("nose_dehaze.workers.ProcessPoolExecutor", None)
+    def test_missing_concurrent_futures_returns_no_pool(self):
+        self.assertIsNone(WorkerPool.create(2))
+
+    def test_unpicklable_frame_locals_are_not_submitted(self):
+        pool = WorkerPool(2)
+
+        result = pool.submit("assert_called_with", {"self": Mock()})
+
+        self.assertIsNone(result)
+        self.assertIsNone(pool.executor)
+
+    def test_submits_picklable_frame_locals_to_worker(self):
+        pool = WorkerPool(1)
+        try:
+            future = pool.submit("assertEqual", {"first": [1], "second": [2]})
+            result = future.result()
+        finally:
+            pool.shutdown()
+
+        expected = (
+            "\n"
+            "\n"
+            "\x1b[0m\x1b[1m\x1b[36mExpected:\x1b[0m \x1b[0m[\x1b[1m\x1b[31m1\x1b[0m\x1b[0m]\n"  # noqa: E501
+            "  \x1b[0m\x1b[1m\x1b[36mActual:\x1b[0m \x1b[0m[\x1b[1m\x1b[32m2\x1b[0m\x1b[0m]"  # noqa: E501
+        )
+        self.assertEqual((expected, None, None), result)
+        self.assertIsNone(pool.executor)
+
+
+class DehazePickledTest(TestCase):
+    def tearDown(self):
+        config.reset()
+        stats.reset()
+
+    @patch("nose_dehaze.workers.dehaze_with_record", return_value=("output", None))
+    def test_applies_main_process_config(self, m_dehaze_with_record):
+        settings = dict(vars(config), max_items=3)
+        payload = pickle.dumps((settings, "assertEqual", {"first": 1}))
+
+        result = dehaze_pickled(payload)
+
+        self.assertEqual(("output", None, None), result)
+        m_dehaze_with_record.assert_called_once_with("assertEqual", {"first": 1})
+        self.assertEqual(3, config.max_items)
+
+    def test_returns_the_stats_of_the_failure(self):
+        stats.add("previous failure", 1.0)
+        settings = dict(vars(config), stats=True)
+        payload = pickle.dumps(
+            (settings, "assertEqual", {"first": "hello", "second": "world"})
+        )
+
+        _, _, result = dehaze_pickled(payload)
+
+        self.assertNotIn("previous failure", result["handlers"])
+        self.assertEqual(1, result["handlers"]["dehaze"]["calls"])
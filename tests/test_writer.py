@@ -0,0 +1,30 @@
+from unittest import TestCase
+
+from nose_dehaze.writer import LineWriter, Writer
+
+
+class WriterTest(TestCase):
+    def test_collects_spans_with_separators(self):
+        writer = Writer()
+        writer.write("a", "header")
+        writer.write_joined(", ", [[("deleted", "b")], [(None, "c")]])
+        writer.write_joined(", ", [])
+
+        self.assertEqual(
+            [("header", "a"), ("deleted", "b"), (None, ", "), (None, "c")],
+            writer.spans,
+        )
+
+
+class LineWriterTest(TestCase):
+    def test_getlines_matches_splitlines_of_the_written_output(self):
+        for output in ["", "a", "a\n", "a\n\nb", "\n", "a\nb\n\n", "ab\nc"]:
+            writer = LineWriter()
+            for i, line in enumerate(output.split("\n")):
+                if i:
+                    writer.newline()
+                for char in line:
+                    writer.write(char)
+
+            lines = ["".join(text for _, text in spans) for spans in writer.getlines()]
+            self.assertEqual(output.splitlines(), lines, output)